@@ -0,0 +1,21 @@
+"""
+gunicorn 설정 (멀티 워커 배포용)
+
+    gunicorn -c gunicorn.conf.py src.server:app
+
+마스터 프로세스에서 Vector DB를 미리 로드한 뒤 워커를 fork하므로
+워커가 늘어도 인덱스/메타데이터 메모리는 copy-on-write로 공유됩니다.
+(uvicorn --workers는 spawn 방식이라 fork 공유가 되지 않고, mmap 파일 페이지만 공유됩니다)
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def on_starting(server):
+    from src.rag.engine import preload_for_fork
+
+    preload_for_fork()
@@ -0,0 +1,3 @@
+"""
+성능 측정용 스크립트 모음 (python -m src.bench.<이름>)
+"""
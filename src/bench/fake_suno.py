@@ -0,0 +1,135 @@
+"""
+로컬 가짜 Suno API (콜백/폴링 동작 확인용)
+
+    python -m src.bench.fake_suno --port 8100 --render-sec 5
+    python -m src.bench.fake_suno --port 8100 --no-callback    # 콜백 없이 폴링만
+
+서버 실행 시 다음처럼 연결한다.
+    SUNO_BASE_URL=http://127.0.0.1:8100/api/v1
+    SUNO_CALLBACK_URL=http://127.0.0.1:8000/suno/callback
+    SUNO_CALLBACK_TOKEN=<임의 값>
+
+POST /api/v1/generate 를 받으면 render-sec 뒤에 작업을 완료 처리하고
+callBackUrl로 text → first → complete 콜백을 보낸다. (실제 Suno와 같은 snake_case 본문)
+GET/POST /api/v1/generate/record-info 는 현재 상태를 돌려주고,
+GET /stats 로 요청/콜백 횟수를 확인할 수 있다.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import requests
+from fastapi import FastAPI, Request
+
+from src.core.executor import run_io_bound
+
+
+def create_app(render_sec: float = 5.0, send_callback: bool = True) -> FastAPI:
+    """
+    가짜 Suno 앱을 만듭니다.
+
+    Args:
+        render_sec: 생성 요청 후 완료까지 걸리는 시간(초)
+        send_callback: 완료 시 callBackUrl로 콜백을 보낼지 여부
+
+    Returns:
+        FastAPI 앱
+    """
+    app = FastAPI(title="Fake Suno API")
+    tasks: Dict[str, Dict[str, Any]] = {}
+    stats = {"generate": 0, "record_info": 0, "callbacks_sent": 0, "callbacks_failed": 0}
+
+    def _tracks(task_id: str) -> list:
+        return [
+            {
+                "id": f"{task_id}-{i}",
+                "title": "Learning Song",
+                "audio_url": f"https://example.com/{task_id}-{i}.mp3",
+                "image_url": f"https://example.com/{task_id}-{i}.jpg",
+            }
+            for i in range(2)
+        ]
+
+    def _post_callback(url: str, body: Dict[str, Any]) -> None:
+        try:
+            requests.post(url, json=body, timeout=10).raise_for_status()
+            stats["callbacks_sent"] += 1
+        except requests.exceptions.RequestException as e:
+            stats["callbacks_failed"] += 1
+            print(f"[FakeSuno] 콜백 전송 실패: {e}")
+
+    async def _render(task_id: str, callback_url: Optional[str]) -> None:
+        await asyncio.sleep(render_sec)
+        tasks[task_id]["status"] = "SUCCESS"
+        if not (send_callback and callback_url):
+            return
+        for callback_type in ("text", "first", "complete"):
+            body = {
+                "code": 200,
+                "msg": "All generated successfully.",
+                "data": {
+                    "callbackType": callback_type,
+                    "task_id": task_id,
+                    "data": _tracks(task_id) if callback_type == "complete" else [],
+                },
+            }
+            await run_io_bound(_post_callback, callback_url, body)
+
+    @app.post("/api/v1/generate")
+    async def generate(request: Request) -> Dict[str, Any]:
+        payload = await request.json()
+        stats["generate"] += 1
+        task_id = uuid.uuid4().hex
+        tasks[task_id] = {"status": "PENDING", "created_at": time.time()}
+        asyncio.create_task(_render(task_id, payload.get("callBackUrl")))
+        return {"code": 200, "msg": "success", "data": {"taskId": task_id}}
+
+    async def _record_info(task_id: Optional[str]) -> Dict[str, Any]:
+        stats["record_info"] += 1
+        task = tasks.get(task_id or "")
+        if task is None:
+            return {"code": 404, "msg": f"task not found: {task_id}"}
+        data: Dict[str, Any] = {"taskId": task_id, "status": task["status"]}
+        if task["status"] == "SUCCESS":
+            data["response"] = {
+                "sunoData": [
+                    {"id": t["id"], "title": t["title"], "audioUrl": t["audio_url"], "imageUrl": t["image_url"]}
+                    for t in _tracks(task_id)
+                ]
+            }
+        return {"code": 200, "msg": "success", "data": data}
+
+    @app.get("/api/v1/generate/record-info")
+    async def record_info_get(taskId: Optional[str] = None) -> Dict[str, Any]:
+        return await _record_info(taskId)
+
+    @app.post("/api/v1/generate/record-info")
+    async def record_info_post(request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        return await _record_info(body.get("taskId"))
+
+    @app.get("/stats")
+    async def get_stats() -> Dict[str, Any]:
+        return dict(stats, tasks=len(tasks))
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="로컬 가짜 Suno API (콜백/폴링 확인용)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--render-sec", type=float, default=5.0, help="생성 완료까지 걸리는 시간(초)")
+    parser.add_argument("--no-callback", action="store_true", help="콜백을 보내지 않음 (폴링만)")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    print(f"[FakeSuno] http://{args.host}:{args.port}/api/v1 (render={args.render_sec}s, callback={not args.no_callback})")
+    uvicorn.run(create_app(args.render_sec, not args.no_callback), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+서버 콜드 스타트 import 시간 리포트
+
+    python -m src.bench.startup                     # src.server import 시간 분석
+    python -m src.bench.startup --budget-ms 600     # 예산 초과 시 종료 코드 1 (CI용)
+    python -m src.bench.startup --module src.rag.engine --top 30
+
+새 프로세스에서 `python -X importtime -c "import <모듈>"`을 실행해
+모듈별 import 시간(self / cumulative)과 최상위 패키지별 합계를 보여준다.
+바이트코드 캐시 등의 영향을 줄이려고 여러 번 실행해 전체 시간이 가장 짧은 결과를 사용한다.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+project_root = Path(__file__).parent.parent.parent
+
+# "import time:       234 |      40655 |   src.core.mureka_utils"
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def measure_imports(module: str = "src.server") -> Dict[str, Any]:
+    """
+    새 인터프리터에서 모듈을 import하며 -X importtime 결과를 수집합니다.
+
+    Args:
+        module: import할 모듈 이름
+
+    Returns:
+        {"module", "total_ms", "wall_ms", "imports": [{"name", "self_ms", "cumulative_ms", "depth"}]}
+    """
+    code = (
+        "import time; _t = time.perf_counter(); "
+        f"import {module}; "
+        "print((time.perf_counter() - _t) * 1000)"
+    )
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(project_root), env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(project_root),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{module} import 실패:\n{proc.stderr[-2000:]}")
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        imports.append({
+            "name": name,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            # 들여쓰기 2칸 = 한 단계 깊이 (최상위 import는 1칸)
+            "depth": (len(indent) - 1) // 2,
+        })
+
+    root = next((item for item in imports if item["name"] == module), None)
+    return {
+        "module": module,
+        "total_ms": root["cumulative_ms"] if root else sum(item["self_ms"] for item in imports),
+        "wall_ms": float(proc.stdout.strip().splitlines()[-1]),
+        "imports": imports,
+    }
+
+
+def summarize_by_package(imports: List[Dict[str, Any]]) -> Dict[str, float]:
+    """최상위 패키지별 self 시간 합계 (ms, 큰 순)"""
+    totals: Dict[str, float] = defaultdict(float)
+    for item in imports:
+        name = item["name"]
+        # 프로젝트 모듈은 src.<하위 패키지> 단위로 묶음
+        parts = name.split(".")
+        package = ".".join(parts[:2]) if parts[0] == "src" and len(parts) > 1 else parts[0]
+        totals[package] += item["self_ms"]
+    return dict(sorted(totals.items(), key=lambda kv: kv[1], reverse=True))
+
+
+def print_report(result: Dict[str, Any], top: int) -> None:
+    print(f"📦 {result['module']} import: {result['total_ms']:.1f}ms (wall {result['wall_ms']:.1f}ms)")
+
+    print(f"\n[패키지별 self 시간 상위 {top}]")
+    for package, ms in list(summarize_by_package(result["imports"]).items())[:top]:
+        print(f"  {ms:9.1f}ms  {package}")
+
+    print(f"\n[모듈별 cumulative 시간 상위 {top}]")
+    slowest = sorted(result["imports"], key=lambda item: item["cumulative_ms"], reverse=True)[:top]
+    for item in slowest:
+        print(f"  {item['cumulative_ms']:9.1f}ms  (self {item['self_ms']:7.1f}ms)  {item['name']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="서버 콜드 스타트 import 시간 리포트")
+    parser.add_argument("--module", default="src.server", help="측정할 모듈 (기본: src.server)")
+    parser.add_argument("--top", type=int, default=20, help="표시할 항목 수")
+    parser.add_argument("--repeat", type=int, default=3, help="측정 반복 횟수 (가장 빠른 결과 사용)")
+    parser.add_argument("--budget-ms", type=float, default=None, help="import 시간 예산 (초과 시 종료 코드 1)")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = parser.parse_args()
+
+    runs = [measure_imports(args.module) for _ in range(max(1, args.repeat))]
+    best = min(runs, key=lambda run: run["total_ms"])
+
+    if args.json:
+        best["packages"] = summarize_by_package(best["imports"])
+        print(json.dumps(best, ensure_ascii=False, indent=2))
+    else:
+        print_report(best, args.top)
+
+    if args.budget_ms is not None:
+        if best["total_ms"] > args.budget_ms:
+            print(f"\n❌ 시작 시간 예산 초과: {best['total_ms']:.1f}ms > {args.budget_ms:.1f}ms", file=sys.stderr)
+            sys.exit(1)
+        if not args.json:
+            print(f"\n✅ 시작 시간 예산 이내: {best['total_ms']:.1f}ms <= {args.budget_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
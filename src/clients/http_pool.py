@@ -0,0 +1,90 @@
+"""
+외부 HTTP API(Suno / Mureka)용 공용 커넥션 풀
+서비스별로 requests.Session을 프로세스에 하나만 만들어 keep-alive 연결을 재사용한다.
+(폴링마다 TCP+TLS 핸드셰이크를 새로 하지 않음)
+I/O 스레드 풀의 여러 스레드가 같은 세션을 공유하므로 풀 크기는 IO_EXECUTOR_WORKERS 이상으로 둔다.
+모든 응답은 요청 트레이스에 http span(메서드, 경로, 상태 코드)으로 기록된다.
+"""
+import os
+import threading
+from typing import Any, Dict, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.core.tracing import record_span
+
+# 호스트별 커넥션 풀 개수 (서비스당 보통 호스트 1~2개)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+# 호스트당 유지할 최대 keep-alive 연결 수 (동시 요청이 이보다 많으면 대기)
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+# 연결/응답 대기 시간(초)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "45"))
+# 연결 실패(요청을 보내기 전 단계)만 재시도하는 횟수
+HTTP_CONNECT_RETRIES = int(os.getenv("HTTP_CONNECT_RETRIES", "2"))
+
+_sessions: Dict[str, requests.Session] = {}
+_lock = threading.Lock()
+
+
+def http_timeout() -> Tuple[float, float]:
+    """requests timeout 인자 (연결, 응답)"""
+    return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+
+def _trace_response(response: requests.Response, *args: Any, **kwargs: Any) -> None:
+    """응답 훅: 요청 하나를 http span으로 기록 (쿼리 문자열은 토큰이 있을 수 있어 제외)"""
+    record_span(
+        "http",
+        response.elapsed.total_seconds(),
+        method=response.request.method,
+        url=urlsplit(response.url)._replace(query="").geturl(),
+        status=response.status_code,
+    )
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    session.hooks["response"].append(_trace_response)
+    # 응답을 받은 뒤의 재시도는 각 클라이언트가 직접 처리하므로 연결 단계만 재시도
+    retry = Retry(total=None, connect=HTTP_CONNECT_RETRIES, read=0, redirect=0, status=0, backoff_factor=0.2)
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+        pool_block=True,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(name: str) -> requests.Session:
+    """
+    서비스별 공용 세션을 반환합니다. (처음 호출 시 생성)
+
+    Args:
+        name: 서비스 이름 (예: "suno", "mureka")
+
+    Returns:
+        keep-alive 커넥션 풀을 가진 requests.Session
+    """
+    session = _sessions.get(name)
+    if session is None:
+        with _lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = _build_session()
+                _sessions[name] = session
+    return session
+
+
+def close_sessions() -> None:
+    """모든 공용 세션의 연결을 닫음 (서버 종료 시)"""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -1,9 +1,12 @@
 import time
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import requests
 from requests import HTTPError
 
+from src.clients.http_pool import get_session
+from src.core.metrics import timed
+
 
 class MurekaClient:
     """
@@ -20,6 +23,7 @@ class MurekaClient:
         timeout_seconds: float = 180.0,
         max_retries: int = 3,
         retry_backoff: float = 10.0,
+        session: Optional[requests.Session] = None,
     ) -> None:
         self.api_key = api_key
         self.base_url = base_url.rstrip("/")
@@ -27,6 +31,8 @@ class MurekaClient:
         self.timeout_seconds = timeout_seconds
         self.max_retries = max_retries
         self.retry_backoff = retry_backoff
+        # Process-wide keep-alive session shared by every Mureka call
+        self.session = session or get_session("mureka")
 
     def _headers(self) -> Dict[str, str]:
         return {
@@ -35,6 +41,7 @@ class MurekaClient:
             "Accept": "application/json",
         }
 
+    @timed("mureka_create")
     def create_song(self, payload: Dict[str, Any]) -> str:
         """
         Submit a generation request. Returns the task ID.
@@ -45,7 +52,7 @@ class MurekaClient:
         backoff = self.retry_backoff
         while True:
             try:
-                resp = requests.post(url, json=payload, headers=self._headers(), timeout=30)
+                resp = self.session.post(url, json=payload, headers=self._headers(), timeout=30)
                 resp.raise_for_status()
                 data = resp.json()
                 task_id = data.get("id")
@@ -61,6 +68,7 @@ class MurekaClient:
                     continue
                 raise
 
+    @timed("mureka_wait")
     def poll_result(self, task_id: str) -> Dict[str, Any]:
         """
         Poll the task endpoint until completion or failure.
@@ -68,7 +76,7 @@ class MurekaClient:
         url = f"{self.base_url}/song/tasks/{task_id}"
         elapsed = 0.0
         while elapsed <= self.timeout_seconds:
-            resp = requests.get(url, headers=self._headers(), timeout=30)
+            resp = self.session.get(url, headers=self._headers(), timeout=30)
             resp.raise_for_status()
             data = resp.json()
             status = data.get("status")
@@ -0,0 +1,210 @@
+"""
+OpenAI 클라이언트 공용 팩토리
+API 키별로 동기/비동기 클라이언트를 하나씩만 만들어 모든 에이전트가 커넥션 풀을 공유
+"""
+import functools
+import json
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+from src.core import llm_cache
+from src.core.admission import upstream, upstream_async
+from src.core.deadline import call_timeout
+from src.core.executor import run_io_bound
+from src.core.metrics import record_llm_usage
+from src.core.tracing import span
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+
+@functools.lru_cache(maxsize=8)
+def get_openai_client(api_key: str) -> "OpenAI":
+    """동기 OpenAI 클라이언트 (API 키별 싱글턴)"""
+    # openai 패키지는 import 비용이 커서 처음 클라이언트를 만들 때 import
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key)
+
+
+@functools.lru_cache(maxsize=8)
+def get_async_openai_client(api_key: str) -> "AsyncOpenAI":
+    """비동기 OpenAI 클라이언트 (API 키별 싱글턴)"""
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=api_key)
+
+
+# ---- 업스트림 동시 호출 제한을 거치는 호출 헬퍼 ----
+# 모든 OpenAI 호출은 아래 헬퍼를 통해 업스트림별 제한기(src.core.admission)를 거친다.
+# 호출마다 트레이스 span(llm.<upstream>)을 남긴다. (모델, 프롬프트 글자 수, 토큰 수)
+# chat 호출은 먼저 응답 캐시(src.core.llm_cache)를 확인하고, 적중하면 제한기와 OpenAI를 거치지 않는다.
+# 시간 예산(src.core.deadline) 안에서 호출되면 남은 시간을 타임아웃으로 주고 재시도하지 않는다.
+
+def _prompt_chars(kwargs: Dict[str, Any]) -> int:
+    """요청 메시지/입력의 텍스트 글자 수 (이미지 data URL 제외)"""
+    if "input" in kwargs:
+        value = kwargs["input"]
+        return sum(len(v) for v in value) if isinstance(value, list) else len(str(value))
+    total = 0
+    for message in kwargs.get("messages") or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            total += len(content)
+        elif isinstance(content, list):
+            total += sum(len(part.get("text", "")) for part in content if isinstance(part, dict))
+    return total
+
+
+def _usage_attributes(response: Any) -> Dict[str, Any]:
+    """응답 usage를 span 속성으로 변환"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+    }
+
+
+def _with_deadline(client: Any, kwargs: Dict[str, Any]) -> Any:
+    """
+    현재 deadline의 남은 시간을 호출 타임아웃으로 적용 (kwargs를 직접 수정)
+
+    Returns:
+        호출에 사용할 클라이언트 (deadline이 있으면 재시도 없는 복사본)
+    """
+    if "timeout" in kwargs:
+        return client
+    timeout = call_timeout()
+    if timeout is None:
+        return client
+    kwargs["timeout"] = timeout
+    return client.with_options(max_retries=0)
+
+
+def _chat_cache_key(client: Any, endpoint: str, kwargs: Dict[str, Any], cache: Optional[bool]) -> Optional[str]:
+    """응답 캐시 키 (요청 인자 + 접속 주소, 캐시하지 않으면 None)"""
+    return llm_cache.cache_key(endpoint, dict(kwargs, base_url=str(getattr(client, "base_url", ""))), cache)
+
+
+def _load_completion(raw: bytes) -> Any:
+    from openai.types.chat import ChatCompletion
+
+    return ChatCompletion.model_validate_json(raw)
+
+
+def _store_completion(key: Optional[str], response: Any) -> None:
+    # 내용이 없는 응답(오류 응답 형태 등)은 캐시하지 않음
+    if key is not None and getattr(response, "choices", None) and hasattr(response, "model_dump_json"):
+        llm_cache.store(key, response.model_dump_json().encode("utf-8"))
+
+
+def chat_completion(client: "OpenAI", upstream_name: str = "chat", cache: Optional[bool] = None, **kwargs: Any) -> Any:
+    """
+    client.chat.completions.create 호출 (응답 캐시 → 동시 호출 제한 순)
+
+    Args:
+        client: 동기 OpenAI 클라이언트
+        upstream_name: 제한기 이름 ("chat" 또는 이미지 입력이면 "vision")
+        cache: 응답 캐시 사용 여부 (None이면 LLM_CACHE_MODE 기본값, False면 항상 새로 호출)
+        kwargs: chat.completions.create 인자
+
+    Returns:
+        ChatCompletion 응답
+    """
+    with span(f"llm.{upstream_name}", model=kwargs.get("model"), prompt_chars=_prompt_chars(kwargs)) as s:
+        key = _chat_cache_key(client, "chat", kwargs, cache)
+        cached = llm_cache.lookup(key, "chat") if key is not None else None
+        if cached is not None:
+            s.set(cache="hit")
+            return _load_completion(cached)
+        call_client = _with_deadline(client, kwargs)
+        with upstream(upstream_name):
+            response = call_client.chat.completions.create(**kwargs)
+        s.set(cache="miss" if key is not None else "off", **_usage_attributes(response))
+        _store_completion(key, response)
+    record_llm_usage(kwargs.get("model"), upstream_name, response)
+    return response
+
+
+async def chat_completion_async(
+    client: "AsyncOpenAI",
+    upstream_name: str = "chat",
+    cache: Optional[bool] = None,
+    **kwargs: Any
+) -> Any:
+    """chat_completion의 비동기 버전 (캐시 조회/저장은 I/O 스레드 풀에서)"""
+    with span(f"llm.{upstream_name}", model=kwargs.get("model"), prompt_chars=_prompt_chars(kwargs)) as s:
+        key = _chat_cache_key(client, "chat", kwargs, cache)
+        cached = await run_io_bound(llm_cache.lookup, key, "chat") if key is not None else None
+        if cached is not None:
+            s.set(cache="hit")
+            return _load_completion(cached)
+        call_client = _with_deadline(client, kwargs)
+        async with upstream_async(upstream_name):
+            response = await call_client.chat.completions.create(**kwargs)
+        s.set(cache="miss" if key is not None else "off", **_usage_attributes(response))
+        if key is not None:
+            await run_io_bound(_store_completion, key, response)
+    record_llm_usage(kwargs.get("model"), upstream_name, response)
+    return response
+
+
+async def chat_completion_stream_async(
+    client: "AsyncOpenAI",
+    upstream_name: str = "chat",
+    cache: Optional[bool] = None,
+    **kwargs: Any
+) -> AsyncIterator[Any]:
+    """
+    스트리밍 chat.completions 호출 (스트림이 끝날 때까지 슬롯 점유)
+    캐시 적중 시 저장해 둔 청크를 그대로 다시 내보냅니다. (끝까지 받은 스트림만 저장)
+    """
+    with span(f"llm.{upstream_name}", model=kwargs.get("model"), prompt_chars=_prompt_chars(kwargs), stream=True) as s:
+        key = _chat_cache_key(client, "chat.stream", kwargs, cache)
+        cached = await run_io_bound(llm_cache.lookup, key, "chat.stream") if key is not None else None
+        if cached is not None:
+            from openai.types.chat import ChatCompletionChunk
+
+            s.set(cache="hit")
+            for raw_chunk in json.loads(cached):
+                yield ChatCompletionChunk.model_validate(raw_chunk)
+            return
+
+        call_client = _with_deadline(client, kwargs)
+        async with upstream_async(upstream_name):
+            stream = await call_client.chat.completions.create(**kwargs, stream=True)
+            # 스트리밍 응답에는 usage가 없으므로 호출 수만 기록
+            record_llm_usage(kwargs.get("model"), upstream_name, None)
+            recorded: Optional[List[Dict[str, Any]]] = [] if key is not None else None
+            chunks = 0
+            async for chunk in stream:
+                chunks += 1
+                if recorded is not None:
+                    recorded.append(chunk.model_dump(mode="json"))
+                yield chunk
+            s.set(chunks=chunks, cache="miss" if key is not None else "off")
+        if recorded:
+            await run_io_bound(llm_cache.store, key, json.dumps(recorded, ensure_ascii=False).encode("utf-8"))
+
+
+def create_embeddings(client: "OpenAI", **kwargs: Any) -> Any:
+    """client.embeddings.create 호출 (동시 호출 제한 적용)"""
+    with span("llm.embeddings", model=kwargs.get("model"), prompt_chars=_prompt_chars(kwargs)) as s:
+        call_client = _with_deadline(client, kwargs)
+        with upstream("embeddings"):
+            response = call_client.embeddings.create(**kwargs)
+        s.set(**_usage_attributes(response))
+    record_llm_usage(kwargs.get("model"), "embeddings", response)
+    return response
+
+
+async def create_embeddings_async(client: "AsyncOpenAI", **kwargs: Any) -> Any:
+    """create_embeddings의 비동기 버전"""
+    with span("llm.embeddings", model=kwargs.get("model"), prompt_chars=_prompt_chars(kwargs)) as s:
+        call_client = _with_deadline(client, kwargs)
+        async with upstream_async("embeddings"):
+            response = await call_client.embeddings.create(**kwargs)
+        s.set(**_usage_attributes(response))
+    record_llm_usage(kwargs.get("model"), "embeddings", response)
+    return response
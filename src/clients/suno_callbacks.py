@@ -0,0 +1,278 @@
+"""
+Suno 완료 콜백 수신 / 대기 작업 레지스트리
+Suno는 렌더링이 끝나면 callBackUrl로 결과를 POST한다. 이 콜백을 /suno/callback 에서 받아
+기다리던 폴링 루프(동기 스레드 / 비동기 코루틴)를 바로 깨운다.
+콜백을 받을 수 있으면 record-info 폴링은 느린 안전망(SUNO_SAFETY_POLL_SEC 간격)으로만 남는다.
+
+설정:
+    SUNO_CALLBACK_URL     이 서버의 공개 주소 + /suno/callback (예: https://example.com/suno/callback)
+    SUNO_CALLBACK_TOKEN   콜백 검증용 비밀 값 (설정해야 콜백 모드가 켜짐, URL에 token=으로 붙음)
+
+콜백은 요청을 보낸 워커가 아닌 다른 워커로 들어올 수 있다.
+그 경우 해당 워커의 대기자는 안전망 폴링으로 완료를 감지한다.
+"""
+import asyncio
+import hmac
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Suno가 요구하는 callBackUrl 기본값 (콜백 모드가 아니면 결과를 받지 않는 더미 주소)
+DEFAULT_CALLBACK_URL = "https://httpbin.org/post"
+# 콜백 모드에서 record-info 안전망 폴링 간격(초)
+SUNO_SAFETY_POLL_SEC = float(os.getenv("SUNO_SAFETY_POLL_SEC", "30"))
+# 콜백 결과 보관 시간(초) (대기자가 등록되기 전에 도착한 콜백 포함)
+SUNO_CALLBACK_TTL_SEC = float(os.getenv("SUNO_CALLBACK_TTL_SEC", "3600"))
+# 보관할 최대 작업 수
+SUNO_CALLBACK_MAX_ENTRIES = 1000
+
+# 완료/실패로 간주하는 callbackType
+_COMPLETE_TYPES = {"complete"}
+_ERROR_TYPES = {"error"}
+
+
+def callback_token() -> Optional[str]:
+    """콜백 검증 토큰 (없으면 콜백 모드 꺼짐)"""
+    return os.getenv("SUNO_CALLBACK_TOKEN") or None
+
+
+def callbacks_enabled() -> bool:
+    """콜백으로 완료를 받을 수 있는지 여부"""
+    return bool(callback_token() and os.getenv("SUNO_CALLBACK_URL"))
+
+
+def build_callback_url() -> str:
+    """
+    Suno 요청 페이로드에 넣을 callBackUrl
+    콜백 모드면 검증 토큰을 쿼리 문자열로 붙입니다.
+    """
+    url = os.getenv("SUNO_CALLBACK_URL", DEFAULT_CALLBACK_URL)
+    token = callback_token()
+    if not token:
+        return url
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != "token"]
+    query.append(("token", token))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def verify_callback_token(token: Optional[str]) -> bool:
+    """콜백 요청의 토큰 검증 (콜백 모드가 아니면 항상 False)"""
+    expected = callback_token()
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8"))
+
+
+def parse_callback(body: Dict[str, Any]) -> Tuple[str, str, Optional[List[dict]], Optional[str]]:
+    """
+    Suno 콜백 본문을 해석합니다.
+    {"code": 200, "msg": "...", "data": {"callbackType": "complete", "task_id": "...", "data": [...]}}
+
+    Args:
+        body: 콜백 JSON
+
+    Returns:
+        (task_id, callbackType, 트랙 목록 또는 None, 오류 메시지 또는 None)
+
+    Raises:
+        ValueError: task_id가 없는 등 형식이 맞지 않을 때
+    """
+    if not isinstance(body, dict):
+        raise ValueError("콜백 본문이 JSON 객체가 아닙니다.")
+    data = body.get("data") if isinstance(body.get("data"), dict) else {}
+    task_id = data.get("task_id") or data.get("taskId") or body.get("task_id") or body.get("taskId")
+    if not task_id:
+        raise ValueError("콜백에 task_id가 없습니다.")
+
+    callback_type = str(data.get("callbackType") or data.get("callback_type") or "").lower()
+    code = body.get("code")
+    if code is not None and code != 200:
+        error = body.get("msg") or body.get("message") or f"code={code}"
+        return str(task_id), "error", None, str(error)
+    if callback_type in _ERROR_TYPES:
+        return str(task_id), callback_type, None, str(body.get("msg") or "Suno 생성 실패")
+
+    raw = data.get("data")
+    if isinstance(raw, dict):
+        raw = [raw]
+    tracks = None
+    if isinstance(raw, list):
+        tracks = [
+            {
+                "id": it.get("id"),
+                "title": it.get("title") or "Learning Song",
+                "audioUrl": it.get("audio_url") or it.get("audioUrl")
+                or it.get("source_audio_url") or it.get("stream_audio_url"),
+                "imageUrl": it.get("image_url") or it.get("imageUrl"),
+                "raw": it,
+            }
+            for it in raw if isinstance(it, dict)
+        ] or None
+    return str(task_id), callback_type, tracks, None
+
+
+class _TaskEntry:
+    """작업 하나의 콜백 상태와 대기자"""
+
+    __slots__ = ("status", "result", "error", "event", "futures", "updated_at")
+
+    def __init__(self):
+        self.status: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # 동기 대기자(스레드)는 Event, 비동기 대기자는 Future로 깨움
+        self.event = threading.Event()
+        self.futures: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self.updated_at = time.monotonic()
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None or self.error is not None
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class SunoTaskRegistry:
+    """task_id별 콜백 결과를 보관하고 기다리는 폴링 루프를 깨우는 레지스트리 (워커 프로세스 단위)"""
+
+    def __init__(self, ttl_seconds: float = SUNO_CALLBACK_TTL_SEC, max_entries: int = SUNO_CALLBACK_MAX_ENTRIES):
+        """
+        Args:
+            ttl_seconds: 결과 보관 시간(초)
+            max_entries: 보관할 최대 작업 수
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _TaskEntry] = {}
+        self.received = 0
+        self.woken = 0
+
+    def _entry(self, task_id: str) -> _TaskEntry:
+        """항목 조회/생성 (lock 안에서 호출)"""
+        entry = self._entries.get(task_id)
+        if entry is None:
+            self._evict()
+            entry = _TaskEntry()
+            self._entries[task_id] = entry
+        return entry
+
+    def _evict(self) -> None:
+        """TTL이 지난 항목 제거, 최대 개수를 넘으면 오래된 항목부터 제거 (lock 안에서 호출)"""
+        now = time.monotonic()
+        for task_id in [k for k, e in self._entries.items() if now - e.updated_at > self.ttl_seconds]:
+            del self._entries[task_id]
+        overflow = len(self._entries) - self.max_entries + 1
+        if overflow > 0:
+            oldest = sorted(self._entries, key=lambda k: self._entries[k].updated_at)[:overflow]
+            for task_id in oldest:
+                del self._entries[task_id]
+
+    def deliver(
+        self,
+        task_id: str,
+        status: str,
+        tracks: Optional[List[dict]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        콜백 결과를 기록하고, 완료/실패면 기다리던 대기자를 깨웁니다.
+        대기자가 아직 없으면 결과를 보관해 두었다가 나중에 바로 돌려줍니다.
+
+        Args:
+            task_id: Suno 작업 ID
+            status: callbackType ("text", "first", "complete", "error")
+            tracks: 트랙 목록 (완료 시)
+            error: 오류 메시지 (실패 시)
+        """
+        with self._lock:
+            self.received += 1
+            entry = self._entry(task_id)
+            if entry.done:
+                return
+            entry.status = status
+            entry.updated_at = time.monotonic()
+            if error is not None:
+                entry.error = error
+            elif status in _COMPLETE_TYPES and tracks:
+                entry.result = {"task_id": task_id, "tracks": tracks, "status": "SUCCESS"}
+            else:
+                # 중간 단계(text/first) 콜백은 상태만 기록
+                return
+            entry.event.set()
+            futures, entry.futures = entry.futures, []
+            self.woken += len(futures)
+        for loop, future in futures:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def _take(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """완료된 결과 반환 (실패면 RuntimeError). 아직이면 None (lock 안에서 호출)"""
+        entry = self._entries.get(task_id)
+        if entry is None or not entry.done:
+            return None
+        if entry.error is not None:
+            raise RuntimeError(f"Suno 생성 실패 콜백 수신: {entry.error} (task_id={task_id})")
+        return entry.result
+
+    def wait(self, task_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        콜백으로 완료될 때까지 최대 timeout초 기다립니다. (스레드에서 블로킹)
+
+        Returns:
+            완료 결과 또는 None (시간 초과)
+        """
+        with self._lock:
+            result = self._take(task_id)
+            if result is not None:
+                return result
+            event = self._entry(task_id).event
+        event.wait(timeout)
+        with self._lock:
+            return self._take(task_id)
+
+    async def wait_async(self, task_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """wait의 비동기 버전 (이벤트 루프를 막지 않음)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            result = self._take(task_id)
+            if result is not None:
+                return result
+            entry = self._entry(task_id)
+            entry.futures.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                entry.futures = [(l, f) for l, f in entry.futures if f is not future]
+        with self._lock:
+            return self._take(task_id)
+
+    def discard(self, task_id: str) -> None:
+        """결과를 가져간 작업 정리"""
+        with self._lock:
+            entry = self._entries.get(task_id)
+            if entry is not None and not entry.futures:
+                del self._entries[task_id]
+
+    def stats(self) -> Dict[str, int]:
+        """콜백 수신 통계"""
+        with self._lock:
+            return {
+                "pending": sum(1 for e in self._entries.values() if not e.done),
+                "stored": len(self._entries),
+                "received": self.received,
+                "woken": self.woken,
+            }
+
+
+# 프로세스 전역 레지스트리
+suno_tasks = SunoTaskRegistry()
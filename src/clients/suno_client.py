@@ -1,8 +1,69 @@
+import asyncio
+import functools
+import os
 import time
 from typing import Any, Dict, Tuple, Optional, List
 
 import requests
 
+from src.clients.http_pool import get_session, http_timeout
+from src.clients.suno_callbacks import SUNO_SAFETY_POLL_SEC, callbacks_enabled, suno_tasks
+from src.core.admission import UpstreamBusyError, upstream
+from src.core.executor import run_io_bound
+from src.core.metrics import timed
+from src.core.tracing import current_span
+
+
+def parse_items(st: dict) -> Tuple[Optional[str], Optional[List[dict]]]:
+    """
+    상태 문자열과 결과 아이템 리스트를 다양한 스키마에서 추출.
+    """
+    data_field = st.get("data") or {}
+
+    # 상태 문자열 후보
+    status = (
+        data_field.get("status")
+        or st.get("status")
+        or data_field.get("taskStatus")
+        or st.get("taskStatus")
+    )
+
+    # 결과 blob
+    resp = data_field.get("response")  # dict 또는 None
+    raw = None
+    if isinstance(resp, dict):
+        raw = resp.get("sunoData") or resp.get("data") or resp.get("songs")
+    if raw is None:
+        raw = data_field.get("sunoData") or data_field.get("data") or st.get("result")
+
+    # raw 정규화: list로
+    if isinstance(raw, dict):
+        raw = [raw]
+    if raw is not None and not isinstance(raw, list):
+        raw = None
+
+    # 아이템 정규화: 공통 키로 맞춤
+    items = None
+    if raw:
+        items = []
+        for it in raw:
+            if not isinstance(it, dict):
+                continue
+            items.append({
+                "id": it.get("id") or it.get("musicId") or it.get("songId"),
+                "title": it.get("title") or data_field.get("title") or "Learning Song",
+                "audioUrl": it.get("audioUrl") or it.get("sourceAudioUrl") or it.get("streamAudioUrl"),
+                "imageUrl": it.get("imageUrl") or it.get("coverUrl"),
+                "raw": it,
+            })
+        if not items:
+            items = None
+
+    return status, items
+
+
+DEFAULT_BASE_URL = "https://api.sunoapi.org/api/v1"
+
 
 class SunoClient:
     """
@@ -14,26 +75,33 @@ class SunoClient:
     def __init__(
         self,
         api_key: str,
-        base_url: str = "https://api.sunoapi.org/api/v1",
+        base_url: Optional[str] = None,
         poll_interval: float = 2.5,
         timeout_seconds: float = 600.0,
         verbose: bool = True,
+        session: Optional[requests.Session] = None,
     ) -> None:
         self.api_key = api_key
-        self.base_url = base_url.rstrip("/")
+        # SUNO_BASE_URL로 다른 서버(예: 로컬 가짜 Suno)를 지정할 수 있음
+        self.base_url = (base_url or os.getenv("SUNO_BASE_URL", DEFAULT_BASE_URL)).rstrip("/")
         self.poll_interval = poll_interval
         self.timeout_seconds = timeout_seconds
         self.verbose = verbose
-
-    def _headers(self) -> Dict[str, str]:
-        return {
+        # 프로세스 공용 keep-alive 세션 (폴링마다 새 연결을 맺지 않음)
+        self.session = session or get_session("suno")
+        # record-info가 GET을 거절하면 이후에는 POST부터 시도
+        self._record_methods = ("GET", "POST")
+        self._header_values = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "Accept": "application/json",
             "User-Agent": "melody-learning/1.0 (+requests)",
-            "Connection": "close",
         }
 
+    def _headers(self) -> Dict[str, str]:
+        return self._header_values
+
+    @timed("suno_create")
     def create_song(self, payload: Dict[str, Any]) -> str:
         """
         음악 생성 요청을 제출합니다. task_id를 반환합니다.
@@ -45,7 +113,8 @@ class SunoClient:
         if self.verbose:
             print(f"[Suno] POST {url_generate}")
 
-        r = requests.post(url_generate, headers=self._headers(), json=payload, timeout=(10, 45))
+        with upstream("suno_create"):
+            r = self.session.post(url_generate, headers=self._headers(), json=payload, timeout=http_timeout())
         try:
             r.raise_for_status()
         except Exception:
@@ -80,145 +149,175 @@ class SunoClient:
 
         return str(task_id)
 
+    @timed("suno_wait")
     def poll_result(self, task_id: str) -> Dict[str, Any]:
         """
-        작업이 완료될 때까지 폴링합니다.
+        작업이 완료될 때까지 기다립니다.
+        콜백 모드면 /suno/callback 수신 시 바로 반환하고, record-info는 느린 안전망으로만 조회합니다.
         """
-        url_record = f"{self.base_url}/generate/record-info"
         start = time.time()
         attempt = 0
         last_status = None
+        use_callback = callbacks_enabled()
 
-        def parse_items(st: dict) -> Tuple[Optional[str], Optional[List[dict]]]:
-            """
-            상태 문자열과 결과 아이템 리스트를 다양한 스키마에서 추출.
-            """
-            data_field = st.get("data") or {}
-
-            # 상태 문자열 후보
-            status = (
-                data_field.get("status")
-                or st.get("status")
-                or data_field.get("taskStatus")
-                or st.get("taskStatus")
-            )
-
-            # 결과 blob
-            resp = data_field.get("response")  # dict 또는 None
-            raw = None
-            if isinstance(resp, dict):
-                raw = resp.get("sunoData") or resp.get("data") or resp.get("songs")
-            if raw is None:
-                raw = data_field.get("sunoData") or data_field.get("data") or st.get("result")
-
-            # raw 정규화: list로
-            if isinstance(raw, dict):
-                raw = [raw]
-            if raw is not None and not isinstance(raw, list):
-                raw = None
-
-            # 아이템 정규화: 공통 키로 맞춤
-            items = None
-            if raw:
-                items = []
-                for it in raw:
-                    if not isinstance(it, dict):
-                        continue
-                    items.append({
-                        "id": it.get("id") or it.get("musicId") or it.get("songId"),
-                        "title": it.get("title") or data_field.get("title") or "Learning Song",
-                        "audioUrl": it.get("audioUrl") or it.get("sourceAudioUrl") or it.get("streamAudioUrl"),
-                        "imageUrl": it.get("imageUrl") or it.get("coverUrl"),
-                        "raw": it,
-                    })
-                if not items:
-                    items = None
-
-            return status, items
-
-        while time.time() - start < self.timeout_seconds:
-            attempt += 1
-            if attempt > 1:
-                # 점진적 백오프(최대 8초)
-                time.sleep(min(self.poll_interval * (1 + attempt * 0.25), 8.0))
-
-            # --- GET 시도 ---
-            try:
-                s = requests.get(
-                    url_record,
-                    headers=self._headers(),
-                    params={"taskId": task_id, "task_id": task_id, "workId": task_id},
-                    timeout=(10, 45),
-                )
-                if s.status_code == 200:
-                    try:
-                        st = s.json()
-                    except ValueError:
-                        st = None
-                    if st:
-                        if self.verbose and (attempt % 3 == 1):
-                            print("[Suno][GET] 응답:", str(st)[:800])
-                        if st.get("code") and st["code"] != 200:
-                            raise RuntimeError(
-                                f"Suno record-info 에러 GET code={st.get('code')}, "
-                                f"msg={st.get('msg') or st.get('message') or st}"
-                            )
-                        status, items = parse_items(st)
-                        if status and status != last_status:
-                            last_status = status
-                            if self.verbose:
-                                print(f"[Suno] status={status} (attempt {attempt})")
-                        if status in {"SUCCESS", "DONE", "COMPLETED"}:
-                            if items:
-                                return {"task_id": task_id, "tracks": items, "status": status}
-                            continue
-                        if status in {"FAILED", "ERROR"}:
-                            raise RuntimeError(f"Suno 생성 실패 상태 수신(GET): {st}")
-                        continue
-            except requests.exceptions.RequestException:
-                pass
+        try:
+            while time.time() - start < self.timeout_seconds:
+                attempt += 1
+                if use_callback:
+                    remaining = self.timeout_seconds - (time.time() - start)
+                    result = suno_tasks.wait(task_id, min(SUNO_SAFETY_POLL_SEC, remaining))
+                    if result is not None:
+                        return self._callback_result(result, attempt)
+                elif attempt > 1:
+                    time.sleep(self._poll_delay(attempt))
 
-            # --- POST 폴백 ---
-            try:
-                s = requests.post(
-                    url_record,
-                    headers=self._headers(),
-                    json={"taskId": task_id, "task_id": task_id, "workId": task_id},
-                    timeout=(10, 45),
-                )
-                if s.status_code == 200:
-                    try:
-                        st = s.json()
-                    except ValueError:
-                        st = None
-                    if st:
-                        if self.verbose and (attempt % 3 == 1):
-                            print("[Suno][POST] 응답:", str(st)[:800])
-                        if st.get("code") and st["code"] != 200:
-                            raise RuntimeError(
-                                f"Suno record-info 에러 POST code={st.get('code')}, "
-                                f"msg={st.get('msg') or st.get('message') or st}"
-                            )
-                        status, items = parse_items(st)
-                        if status and status != last_status:
-                            last_status = status
-                            if self.verbose:
-                                print(f"[Suno] status={status} (attempt {attempt})")
-                        if status in {"SUCCESS", "DONE", "COMPLETED"}:
-                            if items:
-                                return {"task_id": task_id, "tracks": items, "status": status}
-                            continue
-                        if status in {"FAILED", "ERROR"}:
-                            raise RuntimeError(f"Suno 생성 실패 상태 수신(POST): {st}")
-                        continue
-            except requests.exceptions.RequestException:
-                continue
+                result, last_status = self._poll_once(task_id, attempt, last_status)
+                if result is not None:
+                    current_span().set(task_id=task_id, via="poll", polls=attempt)
+                    return result
+        finally:
+            if use_callback:
+                suno_tasks.discard(task_id)
 
         # 타임아웃 시 마지막 상태라도 알리기
         raise TimeoutError(
             f"Suno 생성 대기 시간 초과 (마지막 status={last_status}, task_id={task_id})"
         )
 
+    async def create_song_async(self, payload: Dict[str, Any]) -> str:
+        """
+        create_song의 비동기 버전 (블로킹 HTTP 호출은 I/O 스레드 풀에서 실행)
+        """
+        return await run_io_bound(self.create_song, payload)
+
+    @timed("suno_wait")
+    async def poll_result_async(self, task_id: str) -> Dict[str, Any]:
+        """
+        poll_result의 비동기 버전
+        대기는 asyncio.sleep으로 하므로 폴링 중에도 이벤트 루프와 스레드를 점유하지 않습니다.
+        """
+        start = time.time()
+        attempt = 0
+        last_status = None
+        use_callback = callbacks_enabled()
+
+        try:
+            while time.time() - start < self.timeout_seconds:
+                attempt += 1
+                if use_callback:
+                    remaining = self.timeout_seconds - (time.time() - start)
+                    result = await suno_tasks.wait_async(task_id, min(SUNO_SAFETY_POLL_SEC, remaining))
+                    if result is not None:
+                        return self._callback_result(result, attempt)
+                elif attempt > 1:
+                    await asyncio.sleep(self._poll_delay(attempt))
+
+                result, last_status = await run_io_bound(self._poll_once, task_id, attempt, last_status)
+                if result is not None:
+                    current_span().set(task_id=task_id, via="poll", polls=attempt)
+                    return result
+        finally:
+            if use_callback:
+                suno_tasks.discard(task_id)
+
+        raise TimeoutError(
+            f"Suno 생성 대기 시간 초과 (마지막 status={last_status}, task_id={task_id})"
+        )
+
+    def _callback_result(self, result: Dict[str, Any], attempt: int) -> Dict[str, Any]:
+        current_span().set(task_id=result["task_id"], via="callback", polls=attempt - 1)
+        if self.verbose:
+            print(f"[Suno] 완료 콜백 수신 (task_id={result['task_id']}, 안전망 폴링 {attempt - 1}회)")
+        return result
+
+    def _poll_delay(self, attempt: int) -> float:
+        """점진적 백오프(최대 8초)"""
+        return min(self.poll_interval * (1 + attempt * 0.25), 8.0)
+
+    @timed("suno_poll")
+    def _poll_once(
+        self,
+        task_id: str,
+        attempt: int,
+        last_status: Optional[str],
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        record-info를 한 번 조회합니다. (GET 시도 후 실패하면 POST 폴백, 성공한 방식을 기억)
+
+        Returns:
+            (완료 시 결과 dict 또는 None, 마지막으로 관측한 status)
+        """
+        try:
+            with upstream("suno_poll"):
+                return self._fetch_record_info(task_id, attempt, last_status)
+        except UpstreamBusyError as e:
+            # 폴링이 혼잡하면 이번 회차만 건너뛰고 다음 회차에 다시 조회
+            if self.verbose:
+                print(f"[Suno] 폴링 건너뜀 ({e.reason})")
+            return None, last_status
+
+    def _fetch_record_info(
+        self,
+        task_id: str,
+        attempt: int,
+        last_status: Optional[str],
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """record-info 실제 HTTP 조회 (_poll_once 참고)"""
+        url_record = f"{self.base_url}/generate/record-info"
+        params = {"taskId": task_id, "task_id": task_id, "workId": task_id}
+
+        for method in self._record_methods:
+            try:
+                if method == "GET":
+                    s = self.session.get(url_record, headers=self._headers(), params=params, timeout=http_timeout())
+                else:
+                    s = self.session.post(url_record, headers=self._headers(), json=params, timeout=http_timeout())
+            except requests.exceptions.RequestException:
+                continue
+            if s.status_code != 200:
+                continue
+            try:
+                st = s.json()
+            except ValueError:
+                st = None
+            if st:
+                if method != self._record_methods[0]:
+                    # 폴백이 성공했으면 다음 회차부터 이 방식을 먼저 사용 (매번 두 번 요청하지 않음)
+                    self._record_methods = (method,) + tuple(m for m in self._record_methods if m != method)
+                return self._handle_record_info(st, method, task_id, attempt, last_status)
+
+        return None, last_status
+
+    def _handle_record_info(
+        self,
+        st: dict,
+        method: str,
+        task_id: str,
+        attempt: int,
+        last_status: Optional[str],
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """record-info 응답을 해석하여 완료 결과 또는 현재 상태를 반환합니다."""
+        if self.verbose and (attempt % 3 == 1):
+            print(f"[Suno][{method}] 응답:", str(st)[:800])
+        if st.get("code") and st["code"] != 200:
+            raise RuntimeError(
+                f"Suno record-info 에러 {method} code={st.get('code')}, "
+                f"msg={st.get('msg') or st.get('message') or st}"
+            )
+        status, items = parse_items(st)
+        current_span().set(method=method, suno_status=status)
+        if status and status != last_status:
+            last_status = status
+            if self.verbose:
+                print(f"[Suno] status={status} (attempt {attempt})")
+        if status in {"SUCCESS", "DONE", "COMPLETED"}:
+            if items:
+                return {"task_id": task_id, "tracks": items, "status": status}, last_status
+            return None, last_status
+        if status in {"FAILED", "ERROR"}:
+            raise RuntimeError(f"Suno 생성 실패 상태 수신({method}): {st}")
+        return None, last_status
+
     def generate_and_wait(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
         음악 생성 요청을 제출하고 완료될 때까지 대기합니다.
@@ -226,3 +325,15 @@ class SunoClient:
         task_id = self.create_song(payload)
         return self.poll_result(task_id)
 
+    async def generate_and_wait_async(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        generate_and_wait의 비동기 버전
+        """
+        task_id = await self.create_song_async(payload)
+        return await self.poll_result_async(task_id)
+
+
+@functools.lru_cache(maxsize=8)
+def get_suno_client(api_key: str, **client_kwargs: Any) -> SunoClient:
+    """Suno 클라이언트 (API 키/설정별 싱글턴, 공용 세션 사용)"""
+    return SunoClient(api_key=api_key, **client_kwargs)
@@ -0,0 +1,31 @@
+"""
+운영자 전용 기능(요청 프로파일링, 메모리 진단 등)의 관리자 토큰 검증
+ADMIN_TOKEN을 설정하지 않으면 관리자 기능은 모두 거부된다.
+"""
+import hmac
+import os
+from typing import Optional
+
+# 관리자 토큰을 보내는 요청 헤더
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+def admin_token() -> Optional[str]:
+    """설정된 관리자 토큰 (없으면 None)"""
+    return os.getenv("ADMIN_TOKEN") or None
+
+
+def verify_admin_token(token: Optional[str]) -> bool:
+    """
+    관리자 토큰 검증 (타이밍 공격 방지를 위해 상수 시간 비교)
+
+    Args:
+        token: 요청에 담긴 토큰
+
+    Returns:
+        ADMIN_TOKEN이 설정되어 있고 일치하면 True
+    """
+    expected = admin_token()
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8"))
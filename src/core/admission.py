@@ -0,0 +1,284 @@
+"""
+업스트림(OpenAI / Suno) 동시 호출 제한 (admission control)
+업스트림마다 동시 호출 수를 제한하고, 대기열도 제한한다.
+대기열이 가득 차거나 대기 시간이 초과되면 바로 UpstreamBusyError를 던져
+서버가 503 + Retry-After로 빠르게 응답할 수 있게 한다. (429/타임아웃 연쇄 방지)
+
+동기 코드(스레드)와 비동기 코드(이벤트 루프)가 같은 제한을 공유한다.
+    with upstream("chat"): ...
+    async with upstream_async("chat"): ...
+"""
+import asyncio
+import collections
+import math
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional
+
+from src.core.metrics import REGISTRY, UPSTREAM_DURATION, UPSTREAM_WAIT
+
+# 업스트림별 기본값: (동시 호출 수, 대기열 길이, 최대 대기 시간(초))
+# 환경 변수 UPSTREAM_<NAME>_LIMIT / UPSTREAM_<NAME>_QUEUE / UPSTREAM_<NAME>_WAIT_SEC 로 조정
+UPSTREAM_DEFAULTS = {
+    "chat": (16, 64, 10.0),
+    "embeddings": (16, 64, 5.0),
+    "vision": (4, 16, 20.0),
+    "suno_create": (2, 8, 30.0),
+    "suno_poll": (4, 32, 10.0),
+}
+
+
+class UpstreamBusyError(Exception):
+    """업스트림 대기열이 가득 찼거나 대기 시간이 초과됨 (503으로 응답)"""
+
+    def __init__(self, upstream: str, retry_after: int, reason: str):
+        self.upstream = upstream
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(f"{upstream} 업스트림이 혼잡합니다 ({reason}). {retry_after}초 후 다시 시도해 주세요.")
+
+
+class _Waiter:
+    """대기열 항목 (스레드 대기는 Event, 코루틴 대기는 Future로 깨움)"""
+
+    __slots__ = ("granted", "event", "loop", "future")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.granted = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class UpstreamLimiter:
+    """업스트림 하나에 대한 공정(FIFO) 동시 호출 제한기"""
+
+    def __init__(self, name: str, limit: int, max_queue: int, max_wait: float):
+        """
+        Args:
+            name: 업스트림 이름 (예: "chat")
+            limit: 동시 호출 수
+            max_queue: 대기열 최대 길이 (넘으면 바로 거절)
+            max_wait: 대기열에서 기다릴 최대 시간(초)
+        """
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._waiters: Deque[_Waiter] = collections.deque()
+
+        # 통계
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_total_sec = 0.0
+        self.wait_max_sec = 0.0
+        self.hold_avg_sec = 0.0
+
+    def _enter_or_enqueue(self, waiter: _Waiter) -> bool:
+        """슬롯이 비어 있으면 바로 차지(True), 아니면 대기열에 등록(False). lock 안에서 호출"""
+        if self._in_use < self.limit and not self._waiters:
+            self._in_use += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise self._busy("대기열 가득 참")
+        self._waiters.append(waiter)
+        return False
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """
+        대기를 포기합니다. 그 사이 슬롯을 이미 넘겨받았다면 True. lock 안에서 호출
+        """
+        if waiter.granted:
+            return True
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        return False
+
+    def _record_admit(self, waited: float) -> None:
+        with self._lock:
+            self.admitted += 1
+            self.wait_total_sec += waited
+            self.wait_max_sec = max(self.wait_max_sec, waited)
+
+    def _busy(self, reason: str) -> UpstreamBusyError:
+        # 평균 점유 시간과 대기열 길이로 재시도 시점 추정 (1~30초)
+        backlog = (len(self._waiters) + 1) / self.limit
+        retry_after = int(min(30, max(1, math.ceil(self.hold_avg_sec * backlog))))
+        return UpstreamBusyError(self.name, retry_after, reason)
+
+    def acquire(self) -> None:
+        """슬롯 획득 (스레드에서 블로킹 대기)"""
+        start = time.monotonic()
+        waiter = _Waiter()
+        with self._lock:
+            if self._enter_or_enqueue(waiter):
+                self.admitted += 1
+                return
+
+        waiter.event.wait(self.max_wait)
+        with self._lock:
+            if not self._abandon(waiter):
+                self.timed_out += 1
+                raise self._busy("대기 시간 초과")
+        self._record_admit(time.monotonic() - start)
+
+    async def acquire_async(self) -> None:
+        """슬롯 획득 (이벤트 루프를 막지 않고 대기)"""
+        start = time.monotonic()
+        waiter = _Waiter(asyncio.get_running_loop())
+        with self._lock:
+            if self._enter_or_enqueue(waiter):
+                self.admitted += 1
+                return
+
+        try:
+            await asyncio.wait_for(waiter.future, self.max_wait)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if not self._abandon(waiter):
+                    self.timed_out += 1
+                    raise self._busy("대기 시간 초과")
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = self._abandon(waiter)
+            if granted:
+                # 취소 직전에 넘겨받은 슬롯은 다음 대기자에게 반환
+                self.release()
+            raise
+        self._record_admit(time.monotonic() - start)
+
+    def release(self, held_sec: Optional[float] = None) -> None:
+        """슬롯 반환 (대기자가 있으면 순서대로 넘겨줌)"""
+        with self._lock:
+            if held_sec is not None:
+                self.hold_avg_sec = held_sec if self.hold_avg_sec == 0 else 0.8 * self.hold_avg_sec + 0.2 * held_sec
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if waiter.future is not None and waiter.future.done():
+                    continue
+                waiter.granted = True
+                waiter.wake()
+                return
+            self._in_use -= 1
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """동기 호출용 컨텍스트 매니저"""
+        wait_start = time.monotonic()
+        self.acquire()
+        start = time.monotonic()
+        UPSTREAM_WAIT.observe(start - wait_start, upstream=self.name)
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            held = time.monotonic() - start
+            self.release(held)
+            UPSTREAM_DURATION.observe(held, upstream=self.name, outcome=outcome)
+
+    @asynccontextmanager
+    async def slot_async(self) -> AsyncIterator[None]:
+        """비동기 호출용 컨텍스트 매니저"""
+        wait_start = time.monotonic()
+        await self.acquire_async()
+        start = time.monotonic()
+        UPSTREAM_WAIT.observe(start - wait_start, upstream=self.name)
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            held = time.monotonic() - start
+            self.release(held)
+            UPSTREAM_DURATION.observe(held, upstream=self.name, outcome=outcome)
+
+    def stats(self) -> Dict[str, Any]:
+        """대기열 깊이/대기 시간 통계"""
+        with self._lock:
+            waited = self.admitted or 1
+            return {
+                "limit": self.limit,
+                "in_use": self._in_use,
+                "queued": len(self._waiters),
+                "max_queue": self.max_queue,
+                "max_wait_sec": self.max_wait,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "wait_avg_ms": round(self.wait_total_sec / waited * 1000, 2),
+                "wait_max_ms": round(self.wait_max_sec * 1000, 2),
+                "hold_avg_ms": round(self.hold_avg_sec * 1000, 2),
+            }
+
+
+def _build_limiter(name: str) -> UpstreamLimiter:
+    limit, max_queue, max_wait = UPSTREAM_DEFAULTS[name]
+    prefix = f"UPSTREAM_{name.upper()}"
+    return UpstreamLimiter(
+        name,
+        limit=int(os.getenv(f"{prefix}_LIMIT", str(limit))),
+        max_queue=int(os.getenv(f"{prefix}_QUEUE", str(max_queue))),
+        max_wait=float(os.getenv(f"{prefix}_WAIT_SEC", str(max_wait))),
+    )
+
+
+# 프로세스 전역 제한기 (워커마다 하나씩)
+_limiters: Dict[str, UpstreamLimiter] = {name: _build_limiter(name) for name in UPSTREAM_DEFAULTS}
+
+
+def get_limiter(name: str) -> UpstreamLimiter:
+    """업스트림 이름으로 제한기 조회"""
+    return _limiters[name]
+
+
+def upstream(name: str):
+    """동기 업스트림 호출을 감싸는 컨텍스트 매니저"""
+    return _limiters[name].slot()
+
+
+def upstream_async(name: str):
+    """비동기 업스트림 호출을 감싸는 컨텍스트 매니저"""
+    return _limiters[name].slot_async()
+
+
+def upstream_stats() -> Dict[str, Dict[str, Any]]:
+    """모든 업스트림 제한기 통계"""
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
+
+
+def _collect_metrics():
+    """/metrics 수집 시점에 제한기 상태를 읽어 게이지/카운터로 노출"""
+    stats = upstream_stats()
+    for key, kind, help_text in (
+        ("in_use", "gauge", "업스트림별 사용 중인 슬롯 수"),
+        ("queued", "gauge", "업스트림별 대기열 깊이"),
+        ("rejected", "counter", "대기열이 가득 차 거절된 호출 수"),
+        ("timed_out", "counter", "대기 시간 초과로 거절된 호출 수"),
+    ):
+        name = f"upstream_{key}"
+        sample_name = name + "_total" if kind == "counter" else name
+        yield name, kind, help_text, [(sample_name, {"upstream": n}, st[key]) for n, st in stats.items()]
+
+
+REGISTRY.register_collector(_collect_metrics)
@@ -0,0 +1,306 @@
+"""
+요청 지연 시간 예산 (deadline)
+호출한 쪽이 준 예산(budget_sec)의 남은 시간으로 단계별 타임아웃을 정하고,
+선택 단계(LLM 질의 해석, Reasoner 분석, Self-RAG 개선, 자료 요약 등)는
+남은 시간이 예상 소요 시간보다 적으면 건너뛰거나 대체값을 쓴다. (필수 단계 시간은 남겨 둠)
+
+현재 deadline은 contextvar로 전달되어, 그 안의 OpenAI 호출(src.clients.openai_client)에도
+남은 시간만큼의 타임아웃이 자동으로 적용된다. (재시도 없음)
+
+    with deadline_scope(Deadline(8.0)) as deadline:
+        reasoned = await run_optional_async("reasoner", lambda: agent.reason_async(...),
+                                            fallback=default, reserve=estimate("generator"))
+        lyrics = await run_required_async("generator", lambda: agent.generate_lyrics_async(...))
+        deadline.report()   # 단계별 ran / skipped / timed_out / failed
+"""
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# 예산을 주지 않은 요청의 기본 예산(초), 0이면 제한 없음
+DEADLINE_DEFAULT_BUDGET_SEC = float(os.getenv("DEADLINE_DEFAULT_BUDGET_SEC", "0"))
+# OpenAI 호출에 줄 최소 타임아웃(초) (남은 시간이 이보다 적으면 호출하지 않고 DeadlineExceeded)
+DEADLINE_MIN_CALL_SEC = float(os.getenv("DEADLINE_MIN_CALL_SEC", "0.2"))
+
+# 단계별 예상 소요 시간(초) 초기값 (실행될 때마다 관측값으로 갱신)
+STAGE_ESTIMATES_SEC = {
+    "query_agent": 1.5,
+    "retriever": 0.8,
+    "reasoner": 3.0,
+    "generator": 6.0,
+    "self_rag": 6.0,
+    "summary": 4.0,
+}
+# 관측값 반영 비율 (지수 이동 평균)
+_EWMA_ALPHA = 0.2
+# 예상 시간 여유 배수 (평균보다 느린 호출 대비)
+_ESTIMATE_MARGIN = 1.3
+
+_estimates: Dict[str, float] = dict(STAGE_ESTIMATES_SEC)
+_estimates_lock = threading.Lock()
+
+_current: contextvars.ContextVar[Optional["Deadline"]] = contextvars.ContextVar("deadline", default=None)
+# 실행 중인 선택 단계가 뒤 단계를 위해 남겨 둘 시간(초)
+_reserve: contextvars.ContextVar[float] = contextvars.ContextVar("deadline_reserve", default=0.0)
+
+
+class DeadlineExceeded(Exception):
+    """필수 단계를 실행할 시간이 남지 않음 (504로 응답)"""
+
+    def __init__(self, stage: str, budget_sec: Optional[float]):
+        self.stage = stage
+        self.budget_sec = budget_sec
+        super().__init__(f"시간 예산({budget_sec}초) 안에 '{stage}' 단계를 마치지 못했습니다.")
+
+
+def estimate(stage: str) -> float:
+    """단계 예상 소요 시간(초) (관측 평균 × 여유 배수)"""
+    with _estimates_lock:
+        return _estimates.get(stage, 1.0) * _ESTIMATE_MARGIN
+
+
+def _observe(stage: str, duration_sec: float) -> None:
+    with _estimates_lock:
+        previous = _estimates.get(stage)
+        _estimates[stage] = duration_sec if previous is None else previous + _EWMA_ALPHA * (duration_sec - previous)
+
+
+class Deadline:
+    """요청 하나의 시간 예산과 단계별 실행 기록"""
+
+    def __init__(self, budget_sec: Optional[float] = None):
+        """
+        Args:
+            budget_sec: 예산(초), None 또는 0 이하면 제한 없음 (단계 기록만)
+        """
+        self.budget_sec = budget_sec if budget_sec and budget_sec > 0 else None
+        self.started = time.monotonic()
+        self.stages: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.budget_sec is None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        """남은 시간(초) (제한 없으면 inf)"""
+        if self.budget_sec is None:
+            return float("inf")
+        return self.budget_sec - self.elapsed()
+
+    def timeout(self, reserve: float = 0.0) -> Optional[float]:
+        """뒤 단계 몫(reserve)을 빼고 지금 단계에 쓸 수 있는 시간(초) (제한 없으면 None)"""
+        if self.budget_sec is None:
+            return None
+        return max(0.0, self.remaining() - reserve)
+
+    def can_afford(self, stage: str, reserve: float = 0.0) -> bool:
+        """뒤 단계 몫을 남기고도 이 단계의 예상 소요 시간이 남아 있는지"""
+        return self.budget_sec is None or self.remaining() - reserve >= estimate(stage)
+
+    def check(self, stage: str) -> None:
+        """
+        필수 단계를 시작할 시간이 남아 있는지 확인합니다.
+
+        Raises:
+            DeadlineExceeded: 남은 시간이 DEADLINE_MIN_CALL_SEC보다 적을 때 (skipped로 기록)
+        """
+        if self.budget_sec is not None and self.remaining() < DEADLINE_MIN_CALL_SEC:
+            self.record(stage, "skipped", reason="budget")
+            raise DeadlineExceeded(stage, self.budget_sec)
+
+    def record(self, stage: str, status: str, duration_sec: Optional[float] = None, reason: Optional[str] = None) -> None:
+        """
+        단계 실행 결과를 기록합니다.
+
+        Args:
+            stage: 단계 이름
+            status: ran / skipped / timed_out / failed
+            duration_sec: 소요 시간 (ran이면 예상 시간 갱신에도 사용)
+            reason: 건너뛰거나 실패한 이유
+        """
+        entry: Dict[str, Any] = {"stage": stage, "status": status}
+        if duration_sec is not None:
+            entry["duration_ms"] = round(duration_sec * 1000, 1)
+        if reason:
+            entry["reason"] = reason
+        with self._lock:
+            self.stages.append(entry)
+        if status == "ran" and duration_sec is not None:
+            _observe(stage, duration_sec)
+
+    @property
+    def degraded(self) -> bool:
+        """건너뛰거나 대체된 단계가 있는지"""
+        return any(entry["status"] != "ran" for entry in self.stages)
+
+    def report(self) -> Dict[str, Any]:
+        """응답에 담을 실행 기록"""
+        with self._lock:
+            stages = list(self.stages)
+        return {
+            "budget_sec": self.budget_sec,
+            "elapsed_ms": round(self.elapsed() * 1000, 1),
+            "degraded": self.degraded,
+            "stages": stages,
+        }
+
+
+def current_deadline() -> Optional[Deadline]:
+    """현재 컨텍스트의 deadline (없으면 None)"""
+    return _current.get()
+
+
+def call_timeout(stage: str = "llm") -> Optional[float]:
+    """
+    OpenAI 호출 하나에 줄 타임아웃(초). deadline이 없거나 제한이 없으면 None
+
+    Raises:
+        DeadlineExceeded: 남은 시간이 DEADLINE_MIN_CALL_SEC보다 적을 때
+    """
+    deadline = _current.get()
+    if deadline is None or deadline.unlimited:
+        return None
+    timeout = deadline.timeout(_reserve.get())
+    if timeout < DEADLINE_MIN_CALL_SEC:
+        raise DeadlineExceeded(stage, deadline.budget_sec)
+    return timeout
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline) -> Iterator[Deadline]:
+    """이 블록 안의 단계/OpenAI 호출에 deadline을 적용"""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # 비동기 제너레이터가 다른 컨텍스트에서 닫히는 경우 (GC 등)
+            pass
+
+
+def _is_timeout(error: BaseException) -> bool:
+    """타임아웃 계열 예외인지 (asyncio / concurrent.futures / OpenAI SDK)"""
+    if isinstance(error, TimeoutError):
+        return True
+    try:
+        from openai import APITimeoutError
+    except ImportError:
+        return False
+    return isinstance(error, APITimeoutError)
+
+
+def _finish(deadline: Deadline, stage: str, started: float, error: BaseException) -> str:
+    """선택 단계 실패를 기록하고 상태 반환"""
+    status = "timed_out" if _is_timeout(error) or isinstance(error, DeadlineExceeded) else "failed"
+    deadline.record(stage, status, time.monotonic() - started, reason=str(error) or type(error).__name__)
+    return status
+
+
+def run_optional(stage: str, func: Callable[[], T], fallback: T, reserve: float = 0.0) -> T:
+    """
+    선택 단계 실행: 시간이 부족하면 건너뛰고, 타임아웃이면 fallback을 반환합니다.
+    예산이 있으면 다른 오류도 fallback으로 대체하고, 예산이 없으면 기존처럼 예외를 그대로 전달합니다.
+    (동기 호출은 중간에 끊을 수 없으므로 OpenAI 호출 타임아웃으로 제한)
+
+    Args:
+        stage: 단계 이름 (예상 소요 시간 키)
+        func: 단계 함수
+        fallback: 건너뛰거나 실패했을 때 쓸 값
+        reserve: 뒤 단계를 위해 남겨 둘 시간(초)
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return func()
+    if not deadline.can_afford(stage, reserve):
+        deadline.record(stage, "skipped", reason="budget")
+        return fallback
+    started = time.monotonic()
+    token = _reserve.set(reserve)
+    try:
+        result = func()
+    except Exception as e:
+        if _finish(deadline, stage, started, e) == "failed" and deadline.unlimited:
+            raise
+        return fallback
+    finally:
+        _reserve.reset(token)
+    deadline.record(stage, "ran", time.monotonic() - started)
+    return result
+
+
+async def run_optional_async(
+    stage: str,
+    factory: Callable[[], Awaitable[T]],
+    fallback: T,
+    reserve: float = 0.0
+) -> T:
+    """run_optional의 비동기 버전 (남은 시간이 지나면 단계를 취소하고 fallback)"""
+    deadline = _current.get()
+    if deadline is None:
+        return await factory()
+    if not deadline.can_afford(stage, reserve):
+        deadline.record(stage, "skipped", reason="budget")
+        return fallback
+    started = time.monotonic()
+    token = _reserve.set(reserve)
+    try:
+        result = await asyncio.wait_for(factory(), timeout=deadline.timeout(reserve))
+    except Exception as e:
+        if _finish(deadline, stage, started, e) == "failed" and deadline.unlimited:
+            raise
+        return fallback
+    finally:
+        _reserve.reset(token)
+    deadline.record(stage, "ran", time.monotonic() - started)
+    return result
+
+
+def run_required(stage: str, func: Callable[[], T]) -> T:
+    """
+    필수 단계 실행 (남은 시간 전부 사용)
+
+    Raises:
+        DeadlineExceeded: 시작 전에 시간이 없거나 타임아웃된 경우
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return func()
+    deadline.check(stage)
+    started = time.monotonic()
+    try:
+        result = func()
+    except Exception as e:
+        if _finish(deadline, stage, started, e) == "timed_out":
+            raise DeadlineExceeded(stage, deadline.budget_sec) from e
+        raise
+    deadline.record(stage, "ran", time.monotonic() - started)
+    return result
+
+
+async def run_required_async(stage: str, factory: Callable[[], Awaitable[T]]) -> T:
+    """run_required의 비동기 버전 (남은 시간이 지나면 취소하고 DeadlineExceeded)"""
+    deadline = _current.get()
+    if deadline is None:
+        return await factory()
+    deadline.check(stage)
+    started = time.monotonic()
+    try:
+        result = await asyncio.wait_for(factory(), timeout=deadline.timeout())
+    except Exception as e:
+        if _finish(deadline, stage, started, e) == "timed_out":
+            raise DeadlineExceeded(stage, deadline.budget_sec) from e
+        raise
+    deadline.record(stage, "ran", time.monotonic() - started)
+    return result
@@ -0,0 +1,56 @@
+"""
+이벤트 루프를 막는 작업을 루프 밖에서 실행하기 위한 공용 스레드 풀
+- CPU 바운드 작업(PDF 파싱, FAISS 검색 등): 워커 수를 제한한 전용 풀
+- 블로킹 I/O(requests 기반 Suno 호출 등): 별도 풀
+호출한 쪽의 contextvars(현재 트레이스 span 등)를 복사해 스레드에서 실행한다.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# CPU 바운드 작업 동시 실행 수 (GIL을 놓는 FAISS/numpy 작업 위주라 코어 수 정도가 적당)
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 블로킹 I/O 동시 실행 수
+IO_EXECUTOR_WORKERS = int(os.getenv("IO_EXECUTOR_WORKERS", "32"))
+
+_cpu_executor: Optional[ThreadPoolExecutor] = None
+_io_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_cpu_executor() -> ThreadPoolExecutor:
+    global _cpu_executor
+    if _cpu_executor is None:
+        _cpu_executor = ThreadPoolExecutor(max_workers=CPU_EXECUTOR_WORKERS, thread_name_prefix="cpu")
+    return _cpu_executor
+
+
+def _get_io_executor() -> ThreadPoolExecutor:
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(max_workers=IO_EXECUTOR_WORKERS, thread_name_prefix="io")
+    return _io_executor
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """CPU 바운드 함수를 제한된 스레드 풀에서 실행하고 결과를 기다립니다."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_get_cpu_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+async def run_io_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """블로킹 I/O 함수를 I/O 전용 스레드 풀에서 실행하고 결과를 기다립니다."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_get_io_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+def submit_io_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+    """동기 코드에서 블로킹 I/O 함수를 I/O 풀에 넘기고 Future를 돌려받습니다. (다른 작업과 겹쳐 실행할 때)"""
+    context = contextvars.copy_context()
+    return _get_io_executor().submit(context.run, func, *args, **kwargs)
@@ -0,0 +1,161 @@
+"""
+프로세스 내 비동기 작업(Job) 관리자
+오래 걸리는 작업(Suno 노래 렌더링 등)을 백그라운드에서 실행하고,
+클라이언트는 job id로 진행 단계와 결과를 조회한다.
+완료된 작업 결과는 TTL 동안만 보관한다.
+"""
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from src.core.tracing import current_trace_id, start_trace
+
+# 완료된 작업 결과 보관 시간(초)
+JOB_RESULT_TTL_SEC = float(os.getenv("JOB_RESULT_TTL_SEC", "3600"))
+# 동시에 보관할 최대 작업 수 (넘으면 오래된 완료 작업부터 제거)
+JOB_MAX_ENTRIES = int(os.getenv("JOB_MAX_ENTRIES", "1000"))
+
+
+class Job:
+    """단일 백그라운드 작업의 상태"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = self.QUEUED
+        self.stage = self.QUEUED
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # 작업별 부가 정보 (예: Suno task_id)
+        self.info: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in {self.COMPLETED, self.FAILED}
+
+    def set_stage(self, stage: str) -> None:
+        """진행 단계 갱신"""
+        self.stage = stage
+        self.updated_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "finished_at": self.finished_at,
+            "info": dict(self.info),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """asyncio 태스크 기반 작업 관리자 (워커 프로세스 단위)"""
+
+    def __init__(self, ttl_seconds: float = JOB_RESULT_TTL_SEC, max_entries: int = JOB_MAX_ENTRIES):
+        """
+        Args:
+            ttl_seconds: 완료된 작업 보관 시간(초)
+            max_entries: 보관할 최대 작업 수
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._jobs: Dict[str, Job] = {}
+
+    def submit(self, kind: str, runner: Callable[[Job], Awaitable[Dict[str, Any]]]) -> Job:
+        """
+        작업을 등록하고 백그라운드에서 실행합니다. (즉시 반환)
+
+        Args:
+            kind: 작업 종류 (예: "song")
+            runner: Job을 받아 결과 dict를 반환하는 코루틴 함수
+
+        Returns:
+            등록된 Job
+        """
+        self.evict_expired()
+        job = Job(kind)
+        self._jobs[job.id] = job
+        job._task = asyncio.create_task(self._run(job, runner))
+        return job
+
+    async def _run(self, job: Job, runner: Callable[[Job], Awaitable[Dict[str, Any]]]) -> None:
+        # 작업은 제출한 요청보다 오래 걸리므로 별도 트레이스로 기록 (제출 요청의 trace id를 속성으로 연결)
+        with start_trace(f"job {job.kind}", job_id=job.id, request_trace_id=current_trace_id()) as trace:
+            if trace is not None:
+                job.info["trace_id"] = trace.trace_id
+            await self._execute(job, runner)
+            if trace is not None:
+                trace.root.set(status=job.status, error=job.error)
+
+    async def _execute(self, job: Job, runner: Callable[[Job], Awaitable[Dict[str, Any]]]) -> None:
+        job.status = Job.RUNNING
+        job.set_stage(Job.RUNNING)
+        try:
+            job.result = await runner(job)
+            job.status = Job.COMPLETED
+            job.set_stage(Job.COMPLETED)
+        except asyncio.CancelledError:
+            job.status = Job.FAILED
+            job.error = "작업이 취소되었습니다."
+            job.set_stage(Job.FAILED)
+            raise
+        except Exception as e:
+            job.status = Job.FAILED
+            job.error = str(e)
+            job.set_stage(Job.FAILED)
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """작업 조회 (만료된 작업은 None)"""
+        self.evict_expired()
+        return self._jobs.get(job_id)
+
+    def evict_expired(self) -> None:
+        """TTL이 지난 완료 작업 제거, 최대 개수를 넘으면 오래된 완료 작업부터 제거"""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.done and job.finished_at is not None and now - job.finished_at > self.ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+        if len(self._jobs) > self.max_entries:
+            finished = sorted(
+                (job for job in self._jobs.values() if job.done),
+                key=lambda job: job.finished_at or 0.0,
+            )
+            for job in finished[:len(self._jobs) - self.max_entries]:
+                del self._jobs[job.id]
+
+    def status_counts(self) -> Dict[str, int]:
+        """상태별 작업 수 (메트릭용)"""
+        counts = {status: 0 for status in (Job.QUEUED, Job.RUNNING, Job.COMPLETED, Job.FAILED)}
+        for job in list(self._jobs.values()):
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    async def shutdown(self) -> None:
+        """실행 중인 작업을 모두 취소 (서버 종료 시)"""
+        tasks = [job._task for job in self._jobs.values() if job._task is not None and not job._task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
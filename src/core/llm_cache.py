@@ -0,0 +1,295 @@
+"""
+LLM 응답 캐시 (내용 주소 기반)
+모델 / 메시지 / 샘플링 파라미터 전체를 정규화한 JSON의 sha256을 키로 응답을 저장한다.
+같은 입력으로 다시 호출하면(재실행, '다시 생성' 재시도 등) OpenAI를 거치지 않고 수 ms 안에 돌려준다.
+
+백엔드 (LLM_CACHE_BACKEND):
+    sqlite  디스크 파일 하나 (기본, 여러 워커가 공유, WAL 모드)
+    memory  워커 프로세스 메모리 (LRU)
+    off     캐시 사용 안 함
+
+크기 상한(LLM_CACHE_MAX_MB)을 넘으면 가장 오래 사용하지 않은 항목부터 지우고, TTL이 지난 항목은 무효.
+호출 단위로 cache=False(제외) / cache=True(LLM_CACHE_MODE=opt_in일 때 포함)를 지정할 수 있다.
+캐시 오류는 호출을 실패시키지 않고 미스로 처리한다.
+"""
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.core.metrics import REGISTRY, Counter
+
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "sqlite")
+# all: 모든 호출 캐시 (cache=False로 제외) / opt_in: cache=True인 호출만 / off: 끔
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "all")
+LLM_CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH", str(Path(__file__).parent.parent.parent / "data" / "llm_cache.sqlite3")))
+LLM_CACHE_TTL_SEC = float(os.getenv("LLM_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+
+# 키 형식 버전 (직렬화 방식이 바뀌면 올려서 이전 항목을 무시)
+_KEY_VERSION = "v1"
+# 요청 결과에 영향을 주지 않는 인자 (키에서 제외)
+_IGNORED_PARAMS = {"timeout", "extra_headers", "user"}
+
+LLM_CACHE_REQUESTS = REGISTRY.register(Counter(
+    "llm_cache_requests", "LLM 응답 캐시 조회 결과 (hit / miss)", ["endpoint", "result"]
+))
+
+
+class ResponseCache:
+    """응답 캐시 백엔드 인터페이스 (값은 직렬화된 bytes)"""
+
+    name = "base"
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl_seconds: float = LLM_CACHE_TTL_SEC) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class MemoryResponseCache(ResponseCache):
+    """프로세스 메모리 LRU 캐시 (크기 상한 바이트 기준)"""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "collections.OrderedDict[str, tuple]" = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                self._bytes -= len(value)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl_seconds: float = LLM_CACHE_TTL_SEC) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = (value, time.time() + ttl_seconds)
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": self.name, "entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    sqlite 파일 캐시 (WAL 모드, 스레드별 연결)
+    같은 파일을 여러 워커가 공유하므로 한 워커가 받은 응답을 다른 워커도 재사용한다.
+    """
+
+    name = "sqlite"
+    # 이 횟수만큼 저장할 때마다 크기 상한 / 만료 정리
+    EVICT_EVERY = 50
+    # 정리 시 상한의 이 비율까지 줄임 (매번 정리하지 않도록 여유)
+    EVICT_TARGET = 0.9
+    # 접근 시각 갱신 최소 간격(초) (조회마다 쓰기가 생기지 않도록)
+    TOUCH_INTERVAL_SEC = 60.0
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._sets = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        conn = self._connect()
+        row = conn.execute("SELECT value, expires_at, accessed_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at < now:
+            with conn:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            return None
+        if now - accessed_at > self.TOUCH_INTERVAL_SEC:
+            with conn:
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return bytes(value)
+
+    def set(self, key: str, value: bytes, ttl_seconds: float = LLM_CACHE_TTL_SEC) -> None:
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), len(value), now + ttl_seconds, now),
+            )
+        with self._lock:
+            self._sets += 1
+            evict = self._sets % self.EVICT_EVERY == 1
+        if evict:
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """만료 항목 삭제 후, 크기 상한을 넘으면 오래 사용하지 않은 항목부터 삭제"""
+        with conn:
+            conn.execute("DELETE FROM entries WHERE expires_at < ?", (time.time(),))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            excess = total - int(self.max_bytes * self.EVICT_TARGET)
+            removed = 0
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall():
+                if removed >= excess:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                removed += size
+
+    def clear(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, Any]:
+        entries, total = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"backend": self.name, "path": str(self.path), "entries": entries, "bytes": total, "max_bytes": self.max_bytes}
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """설정된 캐시 백엔드 (off이거나 열 수 없으면 None)"""
+    global _cache
+    if LLM_CACHE_BACKEND == "off" or LLM_CACHE_MODE == "off":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                max_bytes = int(LLM_CACHE_MAX_MB * 1024 * 1024)
+                if LLM_CACHE_BACKEND == "memory":
+                    _cache = MemoryResponseCache(max_bytes)
+                else:
+                    try:
+                        _cache = SQLiteResponseCache(LLM_CACHE_PATH, max_bytes)
+                    except (OSError, sqlite3.Error) as e:
+                        print(f"[LLMCache] sqlite 캐시를 열 수 없어 메모리 캐시를 사용합니다: {e}")
+                        _cache = MemoryResponseCache(max_bytes)
+    return _cache
+
+
+def cache_key(endpoint: str, request: Dict[str, Any], cache: Optional[bool] = None) -> Optional[str]:
+    """
+    요청 인자로 캐시 키를 만듭니다. 이 호출을 캐시하지 않으면 None.
+
+    Args:
+        endpoint: 호출 종류 ("chat", "chat.stream" 등, 같은 인자라도 응답 형식이 다르면 구분)
+        request: create()에 넘기는 인자 전체 (model, messages, temperature ...)
+        cache: 호출 단위 지정 (False: 제외, True: 포함, None: LLM_CACHE_MODE 기본값)
+
+    Returns:
+        sha256 키 또는 None
+    """
+    if cache is False or get_response_cache() is None:
+        return None
+    if cache is None and LLM_CACHE_MODE != "all":
+        return None
+    params = {k: v for k, v in request.items() if k not in _IGNORED_PARAMS}
+    canonical = json.dumps(params, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{_KEY_VERSION}:{endpoint}:{canonical}".encode("utf-8")).hexdigest()
+
+
+def lookup(key: str, endpoint: str) -> Optional[bytes]:
+    """캐시 조회 (오류는 미스로 처리, 결과를 메트릭에 기록)"""
+    cache = get_response_cache()
+    value = None
+    if cache is not None:
+        try:
+            value = cache.get(key)
+        except sqlite3.Error as e:
+            print(f"[LLMCache] 조회 실패: {e}")
+    LLM_CACHE_REQUESTS.inc(endpoint=endpoint, result="hit" if value is not None else "miss")
+    return value
+
+
+def store(key: str, value: bytes) -> None:
+    """캐시 저장 (오류는 무시)"""
+    cache = get_response_cache()
+    if cache is None:
+        return
+    try:
+        cache.set(key, value)
+    except sqlite3.Error as e:
+        print(f"[LLMCache] 저장 실패: {e}")
+
+
+def cache_stats() -> Dict[str, Any]:
+    """캐시 상태 (백엔드, 항목 수, 크기)"""
+    cache = get_response_cache()
+    if cache is None:
+        return {"backend": "off"}
+    try:
+        return dict(cache.stats(), mode=LLM_CACHE_MODE, ttl_seconds=LLM_CACHE_TTL_SEC)
+    except sqlite3.Error as e:
+        return {"backend": cache.name, "error": str(e)}
+
+
+def _collect_metrics():
+    """/metrics 수집 시점에 캐시 크기를 게이지로 노출"""
+    if _cache is None:
+        return
+    stats = cache_stats()
+    if "entries" not in stats:
+        return
+    yield "llm_cache_entries", "gauge", "LLM 응답 캐시 항목 수", [("llm_cache_entries", {}, stats["entries"])]
+    yield "llm_cache_bytes", "gauge", "LLM 응답 캐시 크기(바이트)", [("llm_cache_bytes", {}, stats["bytes"])]
+
+
+REGISTRY.register_collector(_collect_metrics)
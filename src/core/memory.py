@@ -0,0 +1,133 @@
+"""
+메모리 사용량 진단 (GET /debug/memory)
+- 프로세스 RSS / 최대 RSS
+- tracemalloc 상위 할당 위치와 직전 스냅샷 대비 증가분 (요청마다 늘어나는 메모리 추적)
+- gc가 추적하는 객체의 타입별 개수
+- 재귀 크기 추정(deep_sizeof): Vector DB 메타데이터, 키워드 인덱스 등 큰 구조체 측정용
+
+tracemalloc은 할당마다 비용이 들어 기본으로 꺼져 있다.
+PYTHONTRACEMALLOC=1 로 시작하거나 /debug/memory?start_tracemalloc=true 로 켠다.
+"""
+import collections
+import gc
+import resource
+import sys
+import threading
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+# tracemalloc이 할당마다 저장할 스택 깊이 (켤 때)
+TRACEMALLOC_FRAMES = 1
+
+_last_snapshot: Optional[tracemalloc.Snapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """
+    컨테이너를 따라가며 객체 전체 크기(바이트)를 추정합니다.
+    numpy 배열 / mmap 문자열 열처럼 nbytes가 있는 객체는 nbytes를 사용합니다.
+    (mmap된 데이터는 힙이 아니라 페이지 캐시에 있으므로 호출 쪽에서 구분해서 보고)
+
+    Args:
+        obj: 측정할 객체
+        seen: 이미 센 객체 id 집합 (공유 객체 중복 계산 방지)
+
+    Returns:
+        추정 크기(바이트)
+    """
+    if seen is None:
+        seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        nbytes = getattr(current, "nbytes", None)
+        if isinstance(nbytes, int) and not isinstance(current, type):
+            total += nbytes
+            continue
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+    return total
+
+
+def rss_info() -> Dict[str, Optional[int]]:
+    """현재 RSS와 최대 RSS(바이트). /proc이 없으면 최대 RSS만"""
+    info: Dict[str, Optional[int]] = {"rss_bytes": None, "peak_rss_bytes": None}
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    info["rss_bytes"] = int(line.split()[1]) * 1024
+                elif line.startswith("VmHWM:"):
+                    info["peak_rss_bytes"] = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if info["peak_rss_bytes"] is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS는 바이트, Linux는 KB
+        info["peak_rss_bytes"] = peak if sys.platform == "darwin" else peak * 1024
+    return info
+
+
+def object_counts(limit: int = 30) -> List[Dict[str, Any]]:
+    """gc가 추적하는 객체의 타입별 개수 (많은 순)"""
+    counts: collections.Counter = collections.Counter(type(o).__qualname__ for o in gc.get_objects())
+    return [{"type": name, "count": count} for name, count in counts.most_common(limit)]
+
+
+def _stat_dict(stat: Any) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    data = {"location": f"{frame.filename}:{frame.lineno}", "size_bytes": stat.size, "count": stat.count}
+    if hasattr(stat, "size_diff"):
+        data["size_diff_bytes"] = stat.size_diff
+        data["count_diff"] = stat.count_diff
+    return data
+
+
+def tracemalloc_report(limit: int = 20, start: bool = False) -> Dict[str, Any]:
+    """
+    tracemalloc 상위 할당 위치와 직전 호출 이후 증가분
+
+    Args:
+        limit: 반환할 위치 수
+        start: 꺼져 있으면 지금 켤지 여부 (켠 시점부터의 할당만 보임)
+
+    Returns:
+        {"tracing", "current_bytes", "peak_bytes", "top", "diff"} (diff는 직전 스냅샷이 있을 때만)
+    """
+    global _last_snapshot
+    if not tracemalloc.is_tracing():
+        if not start:
+            return {
+                "tracing": False,
+                "hint": "PYTHONTRACEMALLOC=1 로 시작하거나 start_tracemalloc=true 로 켜세요.",
+            }
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+    current, peak = tracemalloc.get_traced_memory()
+    report: Dict[str, Any] = {
+        "tracing": True,
+        "current_bytes": current,
+        "peak_bytes": peak,
+        "top": [_stat_dict(s) for s in snapshot.statistics("lineno")[:limit]],
+    }
+    with _snapshot_lock:
+        previous, _last_snapshot = _last_snapshot, snapshot
+    if previous is not None:
+        diff = [s for s in snapshot.compare_to(previous, "lineno") if s.size_diff != 0]
+        diff.sort(key=lambda s: abs(s.size_diff), reverse=True)
+        report["diff"] = [_stat_dict(s) for s in diff[:limit]]
+    return report
@@ -0,0 +1,354 @@
+"""
+Prometheus 텍스트 형식 메트릭 (외부 패키지 없이 구현)
+단계별 / 엔드포인트별 / 업스트림별 지연 시간 히스토그램, 진행 중 게이지, 토큰/오류 카운터를 모아
+GET /metrics 에서 노출한다.
+
+    @timed("reasoner")                  # 함수 / 코루틴 / 비동기 제너레이터 모두 가능
+    def reason(...): ...
+
+    with stage("faiss_search"): ...     # 코드 블록 단위
+
+각 단계는 요청 트레이스(src.core.tracing)의 span으로도 기록된다.
+메트릭은 워커 프로세스별로 집계된다. (여러 워커면 Prometheus가 워커마다 따로 수집)
+"""
+import functools
+import inspect
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.core.tracing import span
+
+PREFIX = "melody_"
+
+# 지연 시간 버킷(초): 수 ms(로컬 검색) ~ 수 분(Suno 렌더링)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# (메트릭 이름, 라벨 dict, 값)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """라벨 조합별 값을 보관하는 메트릭 공통 부분"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = PREFIX + name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 라벨이 맞지 않습니다: {sorted(labels)} (필요: {self.labelnames})")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """증가만 하는 카운터"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name + "_total", dict(zip(self.labelnames, key)), value) for key, value in items]
+
+
+class Gauge(_Metric):
+    """증감하는 게이지 (예: 진행 중 요청 수)"""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in items]
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [버킷별 개수..., 합계, 전체 개수]
+                state = [0] * len(self.buckets) + [0.0, 0]
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        result: List[Sample] = []
+        for key, state in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                result.append((self.name + "_bucket", dict(labels, le=_format_value(bound)), cumulative))
+            result.append((self.name + "_bucket", dict(labels, le="+Inf"), state[-1]))
+            result.append((self.name + "_sum", labels, state[-2]))
+            result.append((self.name + "_count", labels, state[-1]))
+        return result
+
+
+class Registry:
+    """메트릭과 수집 시점 콜백(collector)을 모아 텍스트 형식으로 출력"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        # 수집 시점에 값을 읽어오는 콜백: () -> [(이름, 종류, 설명, [Sample...])]
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]) -> None:
+        """
+        수집 시점 콜백 등록 (업스트림 제한기 통계처럼 이미 다른 곳에서 세고 있는 값용)
+
+        Args:
+            collector: (이름, 종류, 설명, 샘플 목록) 튜플들을 반환하는 함수. 이름에는 PREFIX가 붙음
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식(0.0.4)으로 출력"""
+        families = [(m.name, m.kind, m.help, m.samples()) for m in self._metrics]
+        for collector in self._collectors:
+            try:
+                families.extend((PREFIX + name, kind, help_text, samples) for name, kind, help_text, samples in collector())
+            except Exception as e:
+                print(f"[Metrics] 수집 실패: {e}")
+
+        lines: List[str] = []
+        for name, kind, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                if not sample_name.startswith(PREFIX):
+                    sample_name = PREFIX + sample_name
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ---- 공용 메트릭 ----
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "stage_duration_seconds", "파이프라인 단계별 소요 시간(초)", ["stage"]
+))
+STAGE_INFLIGHT = REGISTRY.register(Gauge(
+    "stage_inflight", "현재 실행 중인 단계 수", ["stage"]
+))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "stage_errors", "단계별 예외 수", ["stage", "error"]
+))
+HTTP_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "엔드포인트별 응답 완료까지 걸린 시간(초)", ["method", "route", "status"]
+))
+HTTP_INFLIGHT = REGISTRY.register(Gauge(
+    "http_requests_inflight", "처리 중인 HTTP 요청 수"
+))
+UPSTREAM_DURATION = REGISTRY.register(Histogram(
+    "upstream_call_duration_seconds", "업스트림 호출 시간(초, 대기열 대기 제외)", ["upstream", "outcome"]
+))
+UPSTREAM_WAIT = REGISTRY.register(Histogram(
+    "upstream_queue_wait_seconds", "업스트림 슬롯을 얻기까지 기다린 시간(초)", ["upstream"]
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "llm_tokens", "OpenAI 토큰 사용량", ["model", "kind"]
+))
+LLM_REQUESTS = REGISTRY.register(Counter(
+    "llm_requests", "OpenAI 호출 수", ["model", "endpoint"]
+))
+
+
+class stage:
+    """
+    코드 블록의 소요 시간을 단계 히스토그램에 기록하는 컨텍스트 매니저
+    (async 함수 안에서도 `with stage(...)`로 그대로 사용)
+    같은 이름의 트레이스 span을 열며, set()으로 span 속성을 덧붙일 수 있습니다.
+    """
+
+    __slots__ = ("name", "_start", "_span")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._start = 0.0
+        self._span = None
+
+    def __enter__(self) -> "stage":
+        STAGE_INFLIGHT.inc(stage=self.name)
+        self._span = span(self.name).__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def set(self, **attributes: Any) -> "stage":
+        """트레이스 span 속성 추가 (예: docs=5)"""
+        self._span.set(**attributes)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        STAGE_DURATION.observe(time.perf_counter() - self._start, stage=self.name)
+        self._span.__exit__(exc_type, exc, tb)
+        STAGE_INFLIGHT.dec(stage=self.name)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            STAGE_ERRORS.inc(stage=self.name, error=exc_type.__name__)
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """
+    함수 전체를 stage(name)으로 감싸는 데코레이터
+    동기 함수, 코루틴 함수, 비동기 제너레이터(스트리밍이 끝날 때까지) 모두 지원합니다.
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def agen_wrapper(*args: Any, **kwargs: Any):
+                with stage(name):
+                    async for item in func(*args, **kwargs):
+                        yield item
+            return agen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any):
+                with stage(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def record_llm_usage(model: Optional[str], endpoint: str, response: Any) -> None:
+    """
+    OpenAI 응답의 usage를 토큰 카운터에 기록합니다.
+
+    Args:
+        model: 요청한 모델 이름
+        endpoint: "chat" 또는 "embeddings"
+        response: OpenAI 응답 객체 (usage 속성이 없으면 호출 수만 기록)
+    """
+    model = model or "unknown"
+    LLM_REQUESTS.inc(model=model, endpoint=endpoint)
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+
+
+class MetricsMiddleware:
+    """
+    엔드포인트별 지연 시간/진행 중 요청 수를 기록하는 ASGI 미들웨어
+    스트리밍 응답(SSE)도 마지막 바이트를 보낼 때까지를 측정합니다.
+    라벨은 경로 템플릿(예: /jobs/{job_id})을 사용해 라벨 수가 늘어나지 않게 합니다.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500}
+        HTTP_INFLIGHT.inc()
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_INFLIGHT.dec()
+            route = getattr(scope.get("route"), "path", None) or "other"
+            HTTP_DURATION.observe(
+                time.perf_counter() - start,
+                method=scope.get("method", ""),
+                route=route,
+                status=str(status["code"]),
+            )
+
+
+def render_metrics() -> str:
+    """/metrics 응답 본문"""
+    return REGISTRY.render()
@@ -0,0 +1,234 @@
+"""
+요청 단위 온디맨드 샘플링 프로파일러 (외부 패키지 없이 구현)
+PROFILING_ENABLED=1 이고 관리자 토큰(X-Admin-Token)과 함께 `X-Profile: 1` 헤더를 보내면
+그 요청이 끝날 때까지 모든 스레드의 스택을 PROFILE_INTERVAL_MS 간격으로 샘플링한다.
+결과는 flamegraph.pl / speedscope / inferno에서 바로 읽을 수 있는 collapsed stack 형식
+("스레드;바깥 함수;...;안쪽 함수 샘플 수")으로 PROFILE_DIR에 저장하고,
+응답 헤더 X-Profile-Id로 돌려준 id로 GET /debug/profiles/{profile_id} 에서 조회한다.
+
+이벤트 루프 스레드와 CPU/I/O 스레드 풀을 모두 샘플링하므로 요청이 스레드 풀로 넘긴 작업
+(PDF 파싱, FAISS/키워드 검색 등)도 잡힌다. 대신 같은 시간에 처리 중인 다른 요청도 함께 섞이므로
+한가한 워커에서 측정하는 것이 좋다. 동시에 하나의 프로파일만 실행한다.
+"""
+import collections
+import os
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Counter, Dict, List, Optional
+
+from src.core.admin import verify_admin_token
+
+# 프로파일링 허용 여부 (기본 꺼짐)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+# 샘플링 간격(ms)
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+# 프로파일 저장 디렉터리
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(Path(__file__).parent.parent.parent / "data" / "profiles")))
+# 디렉터리에 남길 최대 파일 수
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+# 한 번에 샘플링할 최대 시간(초) (스트리밍 응답이 끝나지 않아도 멈춤)
+PROFILE_MAX_SEC = float(os.getenv("PROFILE_MAX_SEC", "120"))
+
+_PROJECT_ROOT = str(Path(__file__).parent.parent.parent) + os.sep
+
+# 스레드가 쉬고 있을 때의 가장 안쪽 프레임 (CPU를 쓰지 않으므로 샘플에서 제외)
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(frame: Any) -> str:
+    """프레임 표시 이름: 프로젝트 파일은 상대 경로, 외부 라이브러리는 파일 이름 + 함수 이름"""
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_PROJECT_ROOT):
+        filename = filename[len(_PROJECT_ROOT):]
+    else:
+        filename = os.path.basename(filename)
+    name = getattr(code, "co_qualname", code.co_name)
+    # collapsed 형식에서 ';'와 공백은 구분자이므로 치환
+    return f"{filename}:{name}".replace(";", ",").replace(" ", "_")
+
+
+def _is_idle(frame: Any) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES
+
+
+class SamplingProfiler:
+    """별도 스레드에서 sys._current_frames()로 모든 스레드의 스택을 주기적으로 수집"""
+
+    def __init__(self, interval_sec: float = PROFILE_INTERVAL_MS / 1000, max_sec: float = PROFILE_MAX_SEC):
+        """
+        Args:
+            interval_sec: 샘플링 간격(초)
+            max_sec: 최대 샘플링 시간(초)
+        """
+        self.interval_sec = interval_sec
+        self.max_sec = max_sec
+        self.stacks: Counter[str] = collections.Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.duration_sec = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration_sec = time.perf_counter() - self.started_at
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        deadline = self.started_at + self.max_sec
+        while not self._stop.wait(self.interval_sec) and time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or _is_idle(frame):
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """collapsed stack 형식 텍스트 (flamegraph.pl 입력)"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def top_functions(collapsed: str, limit: int = 30, project_only: bool = False) -> List[Dict[str, Any]]:
+    """
+    collapsed stack에서 함수별 self / total 샘플 수를 집계합니다.
+
+    Args:
+        collapsed: collapsed stack 텍스트
+        limit: 반환할 최대 함수 수
+        project_only: True면 프로젝트 코드(src/) 함수만
+
+    Returns:
+        self 샘플 수 내림차순 [{"function", "self", "total"}, ...]
+    """
+    self_counts: Counter[str] = collections.Counter()
+    total_counts: Counter[str] = collections.Counter()
+    for line in collapsed.splitlines():
+        stack, _, count_text = line.rpartition(" ")
+        if not stack:
+            continue
+        count = int(count_text)
+        # 첫 항목은 스레드 이름
+        frames = stack.split(";")[1:]
+        if project_only:
+            frames = [f for f in frames if f.startswith("src" + os.sep)]
+        if not frames:
+            continue
+        self_counts[frames[-1]] += count
+        for name in set(frames):
+            total_counts[name] += count
+    ranked = sorted(total_counts, key=lambda name: (self_counts[name], total_counts[name]), reverse=True)
+    return [
+        {"function": name, "self": self_counts[name], "total": total_counts[name]}
+        for name in ranked[:limit]
+    ]
+
+
+def _save(profile_id: str, profiler: SamplingProfiler, label: str) -> None:
+    """프로파일을 collapsed 파일로 저장 (오래된 파일 정리)"""
+    try:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = PROFILE_DIR / f"{stamp}_{profile_id}.collapsed"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(profiler.collapsed())
+        files = sorted(PROFILE_DIR.glob("*.collapsed"))
+        for old in files[:max(0, len(files) - PROFILE_MAX_FILES)]:
+            old.unlink(missing_ok=True)
+        print(
+            f"[Profile] {label} {profiler.duration_sec * 1000:.0f}ms, "
+            f"샘플 {profiler.samples}회 → {path.name}"
+        )
+    except OSError as e:
+        print(f"[Profile] 프로파일 저장 실패: {e}")
+
+
+def load_profile(profile_id: str) -> Optional[str]:
+    """저장된 프로파일(collapsed 텍스트) 조회"""
+    if not PROFILE_DIR.is_dir() or not profile_id.isalnum():
+        return None
+    for path in PROFILE_DIR.glob(f"*_{profile_id}.collapsed"):
+        return path.read_text(encoding="utf-8")
+    return None
+
+
+# 동시에 하나의 프로파일만 실행
+_active = threading.Lock()
+
+
+class ProfilingMiddleware:
+    """
+    `X-Profile: 1` + 관리자 토큰이 있는 요청을 샘플링 프로파일러로 감싸는 ASGI 미들웨어
+    응답 헤더 X-Profile-Id(저장된 프로파일 id) 또는 X-Profile: busy(다른 프로파일 진행 중)를 붙입니다.
+    PROFILING_ENABLED=0이면 헤더를 무시합니다.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        if headers.get(b"x-profile") not in (b"1", b"true"):
+            await self.app(scope, receive, send)
+            return
+        if not verify_admin_token(headers.get(b"x-admin-token", b"").decode("latin-1")):
+            await self._send_forbidden(send)
+            return
+        if not _active.acquire(blocking=False):
+            await self.app(scope, receive, self._with_headers(send, [(b"x-profile", b"busy")]))
+            return
+
+        profile_id = uuid.uuid4().hex
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            await self.app(scope, receive, self._with_headers(send, [(b"x-profile-id", profile_id.encode("ascii"))]))
+        finally:
+            profiler.stop()
+            _active.release()
+            _save(profile_id, profiler, f"{scope.get('method', '')} {scope.get('path', '')}")
+
+    @staticmethod
+    def _with_headers(send: Callable, extra: List[tuple]) -> Callable:
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=list(message.get("headers", [])) + extra)
+            await send(message)
+        return send_wrapper
+
+    @staticmethod
+    async def _send_forbidden(send: Callable) -> None:
+        body = '{"detail":"프로파일링에는 올바른 X-Admin-Token이 필요합니다."}'.encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 403,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,88 @@
+"""
+Single-flight 요청 병합
+같은 입력으로 동시에 들어온 요청은 진행 중인 계산 하나를 공유하고 같은 결과를 받는다.
+(예: 한 반 학생들이 같은 학습지 텍스트로 동시에 가사 생성을 요청하는 경우)
+계산이 끝나면 키는 바로 제거되므로 결과를 캐시하지는 않는다.
+"""
+import asyncio
+import hashlib
+import re
+from typing import Any, Awaitable, Callable, Dict
+
+
+def normalize_text(text: str) -> str:
+    """병합 키용 텍스트 정규화 (앞뒤 공백 제거, 연속 공백을 하나로)"""
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def make_key(*parts: Any) -> str:
+    """
+    여러 값을 하나의 병합 키로 만듭니다.
+
+    Args:
+        parts: 키를 구성할 값들 (str/bytes/숫자 등, 파일 내용은 bytes 그대로)
+
+    Returns:
+        sha256 hex 문자열
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        # 길이를 앞에 붙여 ("ab", "c")와 ("a", "bc")가 같은 키가 되지 않도록 함
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    """키별로 진행 중인 계산을 하나만 유지하는 병합기 (이벤트 루프 단위)"""
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: 로그/통계용 이름
+        """
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        같은 키로 진행 중인 계산이 있으면 그 결과를 기다리고, 없으면 새로 시작합니다.
+        계산에서 발생한 예외는 기다리던 모든 요청에 그대로 전달됩니다.
+
+        Args:
+            key: 병합 키 (make_key 등으로 생성)
+            factory: 실제 계산을 수행하는 코루틴 함수
+
+        Returns:
+            계산 결과 (모든 요청이 같은 객체를 공유하므로 수정하지 말 것)
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._forget(k, _t))
+        else:
+            self.coalesced += 1
+            print(f"[SingleFlight:{self.name}] 진행 중인 동일 요청에 합류")
+
+        # 한 요청이 끊겨도(취소) 공유 계산은 나머지 요청을 위해 계속 진행
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 아무도 기다리지 않는 계산의 예외가 "never retrieved" 경고로 남지 않도록 소비
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """병합 통계"""
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
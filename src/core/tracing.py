@@ -0,0 +1,310 @@
+"""
+요청 단위 경량 트레이싱 (프로세스 내)
+요청마다 trace id를 만들고, 에이전트 호출 / LLM 왕복 / 임베딩 / FAISS 검색 / PDF 페이지 / Suno 폴링을
+중첩된 span 트리로 기록한다. 현재 span은 contextvars로 전달되므로
+asyncio 태스크와 run_cpu_bound / run_io_bound 스레드 안에서도 부모 span이 이어진다.
+
+    with span("retriever", query_chars=len(q)) as s:
+        ...
+        s.set(docs=len(results))
+
+TRACE_SLOW_MS보다 오래 걸린 요청은 TRACE_DIR에 JSON으로 저장하고 최근 것들은 메모리에도 보관한다.
+(GET /debug/traces 로 조회) 트레이스가 없는 곳(스크립트 등)에서 span()은 아무것도 하지 않는다.
+"""
+import collections
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from src.core.executor import submit_io_bound
+
+# 트레이싱 사용 여부
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "1") != "0"
+# 이 시간(ms)보다 오래 걸린 요청의 트레이스를 저장
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "5000"))
+# 느린 트레이스 저장 디렉터리
+TRACE_DIR = Path(os.getenv("TRACE_DIR", str(Path(__file__).parent.parent.parent / "data" / "traces")))
+# 디렉터리에 남길 최대 파일 수 (넘으면 오래된 것부터 삭제)
+TRACE_MAX_FILES = int(os.getenv("TRACE_MAX_FILES", "200"))
+# 메모리에 보관할 최근 느린 트레이스 수
+TRACE_RECENT = 50
+# 한 트레이스에 기록할 최대 span 수 (폴링이 매우 길어져도 메모리 제한)
+TRACE_MAX_SPANS = 2000
+
+# trace id 형식 (uuid4 hex), 파일 경로에 쓰기 전에 확인
+_TRACE_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """트레이스 안의 작업 구간 하나"""
+
+    __slots__ = ("trace", "name", "parent", "attributes", "children", "start", "end", "error", "_token")
+
+    def __init__(self, trace: "Trace", name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.parent = parent
+        self.attributes = attributes
+        self.children: List["Span"] = []
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+        self._token = None
+
+    def set(self, **attributes: Any) -> "Span":
+        """속성 추가 (예: tokens, docs, status)"""
+        self.attributes.update(attributes)
+        return self
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end = time.perf_counter()
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.error = f"{exc_type.__name__}: {exc}"[:500]
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # 비동기 제너레이터가 다른 컨텍스트에서 닫히는 경우 (GC 등)
+            pass
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round(self.duration_ms, 2),
+        }
+        if self.end is None:
+            data["unfinished"] = True
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.error:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [child.to_dict(origin) for child in list(self.children)]
+        return data
+
+
+class _NoopSpan:
+    """트레이스 밖에서 사용하는 빈 span"""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> "_NoopSpan":
+        return self
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+class Trace:
+    """요청 하나의 span 트리"""
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.span_count = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self.root = Span(self, name, None, dict(attributes or {}))
+
+    def _add(self, parent: Span, name: str, attributes: Dict[str, Any]) -> Optional[Span]:
+        with self._lock:
+            if self.span_count >= TRACE_MAX_SPANS:
+                self.dropped += 1
+                return None
+            self.span_count += 1
+            child = Span(self, name, parent, attributes)
+            parent.children.append(child)
+            return child
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at,
+            "duration_ms": round(self.root.duration_ms, 2),
+            "span_count": self.span_count,
+            "root": self.root.to_dict(self.root.start),
+        }
+        if self.dropped:
+            data["dropped_spans"] = self.dropped
+        return data
+
+
+class start_trace:
+    """
+    새 트레이스(루트 span)를 시작하는 컨텍스트 매니저
+    요청 미들웨어와 백그라운드 작업(Job)이 사용하며, 끝나면 느린 트레이스를 저장합니다.
+    TRACE_ENABLED=0이면 None을 돌려주고 아무것도 기록하지 않습니다.
+    """
+
+    def __init__(self, name: str, **attributes: Any):
+        self.trace = Trace(name, attributes) if TRACE_ENABLED else None
+
+    def __enter__(self) -> Optional[Trace]:
+        if self.trace is not None:
+            self.trace.root.__enter__()
+        return self.trace
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.trace is not None:
+            self.trace.root.__exit__(exc_type, exc, tb)
+            finish_trace(self.trace)
+
+
+def span(name: str, **attributes: Any):
+    """
+    현재 span 아래에 자식 span을 만듭니다. (트레이스 밖이면 아무것도 하지 않음)
+
+    Args:
+        name: span 이름 (예: "llm.chat", "faiss_search")
+        attributes: 속성 (예: prompt_chars=1200)
+
+    Returns:
+        with 문에서 사용할 span
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP
+    child = parent.trace._add(parent, name, attributes)
+    return child if child is not None else _NOOP
+
+
+def current_span():
+    """현재 span (트레이스 밖이면 빈 span). 속성을 덧붙일 때 사용"""
+    return _current_span.get() or _NOOP
+
+
+def record_span(name: str, duration_sec: float, **attributes: Any) -> None:
+    """
+    이미 끝난 작업을 span으로 기록합니다. (HTTP 응답 훅처럼 끝난 뒤에야 알 수 있는 경우)
+
+    Args:
+        name: span 이름
+        duration_sec: 소요 시간(초)
+        attributes: 속성
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return
+    child = parent.trace._add(parent, name, attributes)
+    if child is not None:
+        child.end = time.perf_counter()
+        child.start = child.end - duration_sec
+
+
+def current_trace_id() -> Optional[str]:
+    """현재 요청의 trace id"""
+    current = _current_span.get()
+    return current.trace.trace_id if current is not None else None
+
+
+# ---- 느린 트레이스 보관 ----
+
+_recent: Deque[Dict[str, Any]] = collections.deque(maxlen=TRACE_RECENT)
+_recent_lock = threading.Lock()
+
+
+def _dump(trace_dict: Dict[str, Any]) -> None:
+    """느린 트레이스를 JSON 파일로 저장 (오래된 파일 정리)"""
+    try:
+        TRACE_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(trace_dict["started_at"]))
+        path = TRACE_DIR / f"{stamp}_{trace_dict['trace_id']}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace_dict, f, ensure_ascii=False, indent=2, default=str)
+        files = sorted(TRACE_DIR.glob("*.json"))
+        for old in files[:max(0, len(files) - TRACE_MAX_FILES)]:
+            old.unlink(missing_ok=True)
+    except OSError as e:
+        print(f"[Trace] 느린 트레이스 저장 실패: {e}")
+
+
+def finish_trace(trace: Trace) -> None:
+    """트레이스 종료: TRACE_SLOW_MS를 넘었으면 저장 (파일 쓰기/정리는 I/O 풀에서, 이벤트 루프를 막지 않음)"""
+    if trace.root.duration_ms < TRACE_SLOW_MS:
+        return
+    trace_dict = trace.to_dict()
+    with _recent_lock:
+        _recent.append(trace_dict)
+    print(f"[Trace] 느린 요청 {trace.root.name} {trace_dict['duration_ms']:.0f}ms (trace_id={trace.trace_id})")
+    submit_io_bound(_dump, trace_dict)
+
+
+def recent_slow_traces() -> List[Dict[str, Any]]:
+    """메모리에 보관 중인 최근 느린 트레이스 요약 (최신순)"""
+    with _recent_lock:
+        traces = list(_recent)
+    return [
+        {"trace_id": t["trace_id"], "name": t["root"]["name"], "started_at": t["started_at"], "duration_ms": t["duration_ms"]}
+        for t in reversed(traces)
+    ]
+
+
+def get_slow_trace(trace_id: str) -> Optional[Dict[str, Any]]:
+    """trace id로 느린 트레이스 조회 (메모리 → 파일 순, 형식이 다른 id는 None)"""
+    if not _TRACE_ID_RE.fullmatch(trace_id):
+        return None
+    with _recent_lock:
+        for t in _recent:
+            if t["trace_id"] == trace_id:
+                return t
+    if TRACE_DIR.is_dir():
+        for path in TRACE_DIR.glob(f"*_{trace_id}.json"):
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+    return None
+
+
+class TracingMiddleware:
+    """
+    요청마다 트레이스를 시작하는 ASGI 미들웨어
+    응답 헤더 X-Trace-Id로 trace id를 돌려주고, 스트리밍 응답은 마지막 바이트까지 측정합니다.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not TRACE_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "")
+        with start_trace(f"{method} {scope.get('path', '')}", path=scope.get("path", "")) as trace:
+            trace_id_header = (b"x-trace-id", trace.trace_id.encode("ascii"))
+
+            async def send_wrapper(message: Dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    trace.root.set(status=message["status"])
+                    message = dict(message, headers=list(message.get("headers", [])) + [trace_id_header])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # 라우팅 후에는 경로 템플릿(예: /jobs/{job_id})으로 이름을 바꿈
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    trace.root.name = f"{method} {route}"
@@ -0,0 +1,254 @@
+"""
+스트리밍 multipart 업로드 파서
+요청 본문을 한 번에 메모리에 올리지 않고 청크 단위로 읽어 파일마다 SpooledTemporaryFile에 기록한다.
+(작은 파일은 메모리, 큰 파일은 디스크)
+- 파일별 / 요청 전체 바이트 제한: 넘는 순간 나머지 본문을 읽지 않고 413으로 거절
+- Content-Length가 이미 제한을 넘으면 본문을 읽기 전에 거절
+- 파일 하나가 다 도착할 때마다 바로 yield하므로 호출 측은 나머지 파일을 받는 동안 처리를 시작할 수 있음
+"""
+import hashlib
+import os
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, List, Optional
+
+from starlette.requests import Request
+
+try:
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:
+    # python-multipart 0.0.13 미만은 모듈 이름이 multipart
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from src.core.executor import run_io_bound
+
+_MB = 1024 * 1024
+
+# 파일 하나의 최대 크기
+UPLOAD_MAX_FILE_BYTES = int(float(os.getenv("UPLOAD_MAX_FILE_MB", "10")) * _MB)
+# 요청 전체(모든 파일 합계)의 최대 크기
+UPLOAD_MAX_TOTAL_BYTES = int(float(os.getenv("UPLOAD_MAX_TOTAL_MB", "30")) * _MB)
+# 이 크기까지는 메모리에 두고, 넘으면 임시 파일(디스크)로 옮김
+UPLOAD_SPOOL_BYTES = int(float(os.getenv("UPLOAD_SPOOL_KB", "1024")) * 1024)
+
+# 경계 문자열, 파트 헤더 등 파일 내용 외 multipart 오버헤드 허용치
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+# 파일이 아닌 일반 필드의 최대 크기 (무시하지만 메모리는 제한)
+_MAX_FIELD_BYTES = 64 * 1024
+
+
+class UploadError(Exception):
+    """업로드 거절 (status_code: 400 잘못된 요청, 413 크기 초과)"""
+
+    def __init__(self, status_code: int, detail: str):
+        self.status_code = status_code
+        self.detail = detail
+        super().__init__(detail)
+
+
+class UploadedFile:
+    """스트리밍으로 받은 업로드 파일 하나 (내용은 SpooledTemporaryFile에 있음)"""
+
+    def __init__(self, field_name: str, filename: str, content_type: str, spool_bytes: int):
+        self.field_name = field_name
+        self.filename = filename
+        self.content_type = content_type
+        self.size = 0
+        self.file = SpooledTemporaryFile(max_size=spool_bytes)
+        self._spool_bytes = spool_bytes
+        self._written = 0
+        self._digest = hashlib.sha256()
+        self.sha256: Optional[str] = None
+
+    def _will_be_on_disk(self, extra: int) -> bool:
+        """extra 바이트를 더 쓰면 메모리 한도를 넘어 디스크에 기록되는지 여부"""
+        return self._written + extra > self._spool_bytes
+
+    def _finish(self) -> None:
+        self.sha256 = self._digest.hexdigest()
+        self.file.seek(0)
+
+    def read(self) -> bytes:
+        """전체 내용을 bytes로 읽기 (디스크에 있으면 블로킹 I/O이므로 run_io_bound로 호출)"""
+        self.file.seek(0)
+        data = self.file.read()
+        self.file.seek(0)
+        return data
+
+    def close(self) -> None:
+        self.file.close()
+
+
+async def stream_multipart_files(
+    request: Request,
+    max_file_bytes: int = UPLOAD_MAX_FILE_BYTES,
+    max_total_bytes: int = UPLOAD_MAX_TOTAL_BYTES,
+    max_files: int = 10,
+    spool_bytes: int = UPLOAD_SPOOL_BYTES,
+) -> AsyncIterator[UploadedFile]:
+    """
+    multipart/form-data 요청 본문을 스트리밍으로 파싱해 파일이 완성될 때마다 yield합니다.
+    yield된 파일은 호출 측이 close()해야 하며, 아직 yield되지 않은 파일은 오류 시 여기서 정리합니다.
+
+    Args:
+        request: Starlette 요청
+        max_file_bytes: 파일 하나의 최대 바이트
+        max_total_bytes: 요청 전체 파일 합계 최대 바이트
+        max_files: 최대 파일 수
+        spool_bytes: 파일별로 메모리에 둘 최대 바이트
+
+    Yields:
+        완성된 UploadedFile
+
+    Raises:
+        UploadError: 형식 오류(400) 또는 크기 초과(413)
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadError(400, "multipart/form-data 형식으로 업로드해주세요.")
+
+    body_limit = max_total_bytes + _MULTIPART_OVERHEAD_BYTES
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > body_limit:
+        # 본문을 읽기 전에 바로 거절
+        raise UploadError(413, f"업로드 용량이 너무 큽니다. (최대 {max_total_bytes // _MB}MB)")
+
+    state = {"part": None, "field_size": 0, "files": 0, "file_bytes": 0}
+    header_name = bytearray()
+    header_value = bytearray()
+    part_headers = {}
+    pending_writes: List[tuple] = []
+    completed: List[UploadedFile] = []
+    open_files: List[UploadedFile] = []
+
+    def on_part_begin() -> None:
+        part_headers.clear()
+        state["part"] = None
+        state["field_size"] = 0
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header_name.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header_value.extend(data[start:end])
+
+    def on_header_end() -> None:
+        part_headers[bytes(header_name).lower()] = bytes(header_value)
+        header_name.clear()
+        header_value.clear()
+
+    def on_headers_finished() -> None:
+        _, options = parse_options_header(part_headers.get(b"content-disposition", b""))
+        if b"filename" not in options:
+            return
+        state["files"] += 1
+        if state["files"] > max_files:
+            raise UploadError(400, f"파일은 최대 {max_files}개까지 업로드할 수 있습니다.")
+        upload = UploadedFile(
+            field_name=options.get(b"name", b"").decode("utf-8", "replace"),
+            filename=options[b"filename"].decode("utf-8", "replace"),
+            content_type=part_headers.get(b"content-type", b"").decode("latin-1"),
+            spool_bytes=spool_bytes,
+        )
+        open_files.append(upload)
+        state["part"] = upload
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        size = end - start
+        upload = state["part"]
+        if upload is None:
+            state["field_size"] += size
+            if state["field_size"] > _MAX_FIELD_BYTES:
+                raise UploadError(413, "폼 필드가 너무 큽니다.")
+            return
+        if upload.size + size > max_file_bytes:
+            raise UploadError(
+                413, f"파일이 너무 큽니다: {upload.filename} (파일당 최대 {max_file_bytes // _MB}MB)"
+            )
+        upload.size += size
+        state["file_bytes"] += size
+        if state["file_bytes"] > max_total_bytes:
+            raise UploadError(413, f"업로드 용량이 너무 큽니다. (최대 {max_total_bytes // _MB}MB)")
+        pending_writes.append((upload, data[start:end]))
+
+    def on_part_end() -> None:
+        if state["part"] is not None:
+            completed.append(state["part"])
+        state["part"] = None
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+    })
+
+    yielded = set()
+    try:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > body_limit:
+                raise UploadError(413, f"업로드 용량이 너무 큽니다. (최대 {max_total_bytes // _MB}MB)")
+            parser.write(chunk)
+
+            # 파일 기록 (메모리 한도를 넘어 디스크에 쓰는 경우만 스레드 풀에서)
+            for upload, data in pending_writes:
+                upload._digest.update(data)
+                if upload._will_be_on_disk(len(data)):
+                    await run_io_bound(upload.file.write, data)
+                else:
+                    upload.file.write(data)
+                upload._written += len(data)
+            pending_writes.clear()
+
+            # 다 받은 파일은 바로 넘겨서 처리를 시작하게 함
+            for upload in completed:
+                upload._finish()
+                yielded.add(id(upload))
+                yield upload
+            completed.clear()
+        parser.finalize()
+        for upload in completed:
+            upload._finish()
+            yielded.add(id(upload))
+            yield upload
+    except FormParserError:
+        raise UploadError(400, "잘못된 multipart 요청입니다.")
+    finally:
+        for upload in open_files:
+            if id(upload) not in yielded:
+                upload.close()
+
+
+async def read_limited_body(request: Request, max_bytes: int = UPLOAD_MAX_FILE_BYTES) -> bytearray:
+    """
+    바이너리 요청 본문(예: 이미지 그대로)을 크기 제한을 두고 읽습니다.
+    청크를 하나의 bytearray에 이어 붙이므로 중간 복사본이 쌓이지 않습니다.
+
+    Args:
+        request: Starlette 요청
+        max_bytes: 최대 바이트 (넘는 순간 나머지 본문을 읽지 않고 413)
+
+    Returns:
+        본문 바이트
+
+    Raises:
+        UploadError: 크기 초과(413) 또는 빈 본문(400)
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise UploadError(413, f"파일이 너무 큽니다. (최대 {max_bytes // _MB}MB)")
+
+    body = bytearray()
+    async for chunk in request.stream():
+        if len(body) + len(chunk) > max_bytes:
+            raise UploadError(413, f"파일이 너무 큽니다. (최대 {max_bytes // _MB}MB)")
+        body += chunk
+    if not body:
+        raise UploadError(400, "업로드된 데이터가 없습니다.")
+    return body
@@ -1,30 +1,45 @@
 from __future__ import annotations
 
-import base64
 import sys
 from pathlib import Path
-from typing import Any, Dict, Optional
-
-from openai import OpenAI
+from typing import Any, Dict, Optional, Union
 
 # 프로젝트 루트를 Python 경로에 추가
 project_root = Path(__file__).parent.parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from src.rag.agents.generator_agent import GeneratorAgent
 from src.lyrics.compose_prompt import build_suno_payload
-from src.clients.suno_client import SunoClient
-from src.processors.vision_to_query import image_bytes_to_study_text
+from src.clients.suno_client import get_suno_client
+from src.processors.vision_to_query import (
+    image_base64_to_study_text,
+    image_base64_to_study_text_async,
+    image_bytes_to_study_text,
+    image_bytes_to_study_text_async,
+)
+from src.core.executor import run_io_bound
 from src.lyrics.lyrics_extractor import extract_final_lyrics
 
+# 원본 이미지 바이트 (memoryview도 복사 없이 그대로 인코딩)
+ImageBytes = Union[bytes, bytearray, memoryview]
+
 
 def extract_study_text(
-    image_bytes: bytes,
+    image_bytes: ImageBytes,
     api_key: str,
     model: str = "gpt-4o-mini",
+    mime: Optional[str] = None,
 ) -> str:
-    return image_bytes_to_study_text(image_bytes, api_key, model=model)
+    return image_bytes_to_study_text(image_bytes, api_key, model=model, mime=mime)
+
+
+async def extract_study_text_async(
+    image_bytes: ImageBytes,
+    api_key: str,
+    model: str = "gpt-4o-mini",
+    mime: Optional[str] = None,
+) -> str:
+    return await image_bytes_to_study_text_async(image_bytes, api_key, model=model, mime=mime)
 
 
 def extract_study_text_from_base64(
@@ -32,13 +47,16 @@ def extract_study_text_from_base64(
     api_key: str,
     model: str = "gpt-4o-mini",
 ) -> str:
-    header, _, data = image_b64.partition(",")
-    if data:
-        encoded = data
-    else:
-        encoded = header
-    image_bytes = base64.b64decode(encoded)
-    return extract_study_text(image_bytes, api_key, model=model)
+    # base64는 디코딩하지 않고 그대로 data URL로 전달
+    return image_base64_to_study_text(image_b64, api_key, model=model)
+
+
+async def extract_study_text_from_base64_async(
+    image_b64: str,
+    api_key: str,
+    model: str = "gpt-4o-mini",
+) -> str:
+    return await image_base64_to_study_text_async(image_b64, api_key, model=model)
 
 
 def create_mnemonic_plan(
@@ -47,10 +65,26 @@ def create_mnemonic_plan(
     final_lyrics: str = None,
     model: str = "gpt-4o-mini",
 ) -> str:
+    # 에이전트 패키지(faiss/numpy 포함)는 처음 사용할 때 import
+    from src.rag.agents.generator_agent import GeneratorAgent
+
     generator_agent = GeneratorAgent(api_key=api_key, model=model)
     return generator_agent.generate_mnemonic_plan(study_text, final_lyrics=final_lyrics)
 
 
+async def create_mnemonic_plan_async(
+    study_text: str,
+    api_key: str,
+    final_lyrics: str = None,
+    model: str = "gpt-4o-mini",
+) -> str:
+    # 에이전트 패키지(faiss/numpy 포함)는 처음 사용할 때 import
+    from src.rag.agents.generator_agent import GeneratorAgent
+
+    generator_agent = GeneratorAgent(api_key=api_key, model=model)
+    return await generator_agent.generate_mnemonic_plan_async(study_text, final_lyrics=final_lyrics)
+
+
 def build_suno_request(study_text: str, mnemonic_plan: str, final_lyrics: str = None, api_key: Optional[str] = None, emotion_tags: Optional[list] = None, retrieved_docs: Optional[list] = None, reasoner_result: Optional[dict] = None) -> Dict[str, Any]:
     # 최종 가사가 제공되면 그걸 사용, 없으면 멜로디 가이드에서 추출
     if not final_lyrics:
@@ -67,15 +101,33 @@ def request_suno_song(
     wait: bool = True,
     **client_kwargs: Any,
 ) -> Dict[str, Any]:
-    client = SunoClient(api_key=api_key, **client_kwargs)
+    client = get_suno_client(api_key, **client_kwargs)
     if wait:
         return client.generate_and_wait(payload)
     task_id = client.create_song(payload)
     return {"id": task_id}
 
 
+async def build_suno_request_async(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+    # 가사 요약(동기 OpenAI 호출)이 포함될 수 있으므로 I/O 스레드 풀에서 실행
+    return await run_io_bound(build_suno_request, *args, **kwargs)
+
+
+async def request_suno_song_async(
+    payload: Dict[str, Any],
+    api_key: str,
+    wait: bool = True,
+    **client_kwargs: Any,
+) -> Dict[str, Any]:
+    client = get_suno_client(api_key, **client_kwargs)
+    if wait:
+        return await client.generate_and_wait_async(payload)
+    task_id = await client.create_song_async(payload)
+    return {"id": task_id}
+
+
 def run_full_pipeline(
-    image_bytes: bytes,
+    image_bytes: ImageBytes,
     openai_key: str,
     suno_key: Optional[str] = None,
     *,
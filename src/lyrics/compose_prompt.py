@@ -1,6 +1,7 @@
 # src/compose_prompt.py
 import os
-from openai import OpenAI
+from src.clients.openai_client import chat_completion, get_openai_client
+from src.clients.suno_callbacks import build_callback_url
 from src.lyrics.lyrics_extractor import get_lyrics_from_mnemonic_plan
 
 # Suno API 가사 길이 제한 (커스텀 모드)
@@ -44,7 +45,7 @@ def summarize_for_lyrics(text: str, api_key: str, max_length: int = MAX_LYRICS_L
     if len(text) <= max_length:
         return text
     
-    client = OpenAI(api_key=api_key)
+    client = get_openai_client(api_key)
     
     prompt = f"""다음 학습 자료를 노래 가사로 만들 수 있도록 핵심 내용만 간결하게 요약해주세요.
 요약된 내용은 {max_length}자 이하여야 하며, 노래로 부를 수 있는 자연스러운 문장으로 작성해주세요.
@@ -56,7 +57,8 @@ def summarize_for_lyrics(text: str, api_key: str, max_length: int = MAX_LYRICS_L
 [요약된 가사]"""
 
     try:
-        resp = client.chat.completions.create(
+        resp = chat_completion(
+            client,
             model="gpt-4o-mini",
             messages=[
                 {
@@ -188,8 +190,8 @@ def build_suno_payload(mnemonic_plan, study_text, final_lyrics: str = None, api_
         # 스타일을 더 줄이기
         style = f"{base_style}, female vocal | {base_style}, male vocal"
     
-    # callBackUrl 설정 (환경 변수에서 가져오거나 기본값 사용)
-    callback_url = os.getenv("SUNO_CALLBACK_URL", "https://httpbin.org/post")
+    # callBackUrl 설정 (SUNO_CALLBACK_URL, 콜백 모드면 검증 토큰 포함)
+    callback_url = build_callback_url()
     
     # 가사 정리 (불필요한 공백, 줄바꿈 정리)
     # 가사는 그대로 유지 (줄바꿈은 유지하여 구조 보존)
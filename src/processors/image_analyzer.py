@@ -2,23 +2,71 @@
 이미지 타입별 분석 모듈
 텍스트 이미지, 수식 이미지, 지도 이미지 등을 분석하여 학습용 내용을 생성
 """
-import base64
-from typing import Dict, List, Optional
-from openai import OpenAI
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
+from src.clients.openai_client import (
+    chat_completion,
+    chat_completion_async,
+    get_async_openai_client,
+    get_openai_client,
+)
+from src.core.admission import UpstreamBusyError
+from src.core.deadline import run_optional_async
+from src.processors.image_data import ImageInput, to_image_data_url
+from src.core.metrics import timed
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+
+@timed("image_analysis")
 def analyze_image_for_education(
-    image_b64: str,
-    client: OpenAI,
-    model: str = "gpt-4o-mini"
+    image: ImageInput,
+    client: "OpenAI",
+    model: str = "gpt-4o-mini",
+    mime: Optional[str] = None
 ) -> str:
     """
     이미지를 교육용 관점에서 분석하여 학습용 텍스트를 생성합니다.
     - 텍스트가 포함된 이미지: 텍스트 추출
     - 수식 이미지: 수식을 설명하고 음으로 표현할 수 있는 방식으로 변환
     - 지도 이미지: 관련 역사/지리 정보를 요약하여 가사로 만들 수 있는 내용 생성
+
+    image는 원본 바이트(bytes/memoryview) 또는 base64 문자열 모두 가능하며,
+    원본 바이트는 여기서 한 번만 base64로 인코딩합니다.
     """
-    
+    try:
+        resp = chat_completion(client, "vision", **_build_analysis_request(to_image_data_url(image, mime), model))
+        return resp.choices[0].message.content.strip()
+    except UpstreamBusyError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"이미지 분석 실패: {str(e)}")
+
+
+@timed("image_analysis")
+async def analyze_image_for_education_async(
+    image: ImageInput,
+    client: "AsyncOpenAI",
+    model: str = "gpt-4o-mini",
+    mime: Optional[str] = None
+) -> str:
+    """
+    analyze_image_for_education의 비동기 버전 (이벤트 루프를 막지 않음)
+    """
+    try:
+        image_url = to_image_data_url(image, mime)
+        resp = await chat_completion_async(client, "vision", **_build_analysis_request(image_url, model))
+        return resp.choices[0].message.content.strip()
+    except UpstreamBusyError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"이미지 분석 실패: {str(e)}")
+
+
+def _build_analysis_request(image_url: str, model: str) -> Dict[str, Any]:
+    """이미지 분석용 chat.completions.create 호출 인자 구성"""
     prompt = """이 이미지를 교육용 학습 자료로 분석해주세요.
 
 이미지 타입에 따라 다음과 같이 처리해주세요:
@@ -40,78 +88,136 @@ def analyze_image_for_education(
 
 추출된 내용 외에는 아무 말도 하지 마세요."""
 
-    try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "너는 교육용 학습 자료 분석 전문가입니다. 이미지를 분석하여 학습자가 노래로 외울 수 있는 형태로 내용을 정리해줍니다."
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_b64}"}},
-                    ],
-                },
-            ],
-            temperature=0.3,
-        )
-        return resp.choices[0].message.content.strip()
-    except Exception as e:
-        raise RuntimeError(f"이미지 분석 실패: {str(e)}")
+    return {
+        "model": model,
+        "messages": [
+            {
+                "role": "system",
+                "content": "너는 교육용 학습 자료 분석 전문가입니다. 이미지를 분석하여 학습자가 노래로 외울 수 있는 형태로 내용을 정리해줍니다."
+            },
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {"type": "image_url", "image_url": {"url": image_url}},
+                ],
+            },
+        ],
+        "temperature": 0.3,
+    }
 
 
+@timed("image_summary")
 def analyze_multiple_images(
-    image_b64_list: List[str],
+    images: List[ImageInput],
     api_key: str,
     model: str = "gpt-4o-mini"
 ) -> str:
     """
     여러 이미지를 분석하고 종합하여 학습용 텍스트를 생성합니다.
     """
-    client = OpenAI(api_key=api_key)
+    client = get_openai_client(api_key)
     
     # 각 이미지 분석
     analyzed_texts = []
-    for i, image_b64 in enumerate(image_b64_list, 1):
+    for i, image in enumerate(images, 1):
         try:
-            text = analyze_image_for_education(image_b64, client, model)
+            text = analyze_image_for_education(image, client, model)
             analyzed_texts.append(f"[이미지 {i}]\n{text}")
+        except UpstreamBusyError:
+            raise
         except Exception as e:
             analyzed_texts.append(f"[이미지 {i}] 분석 실패: {str(e)}")
     
     # 여러 이미지 내용을 종합하여 요약
     if len(analyzed_texts) > 1:
         combined_text = "\n\n".join(analyzed_texts)
-        
-        summary_prompt = f"""다음은 여러 학습 자료에서 추출한 내용입니다. 
-이 내용들을 종합하여 하나의 일관된 학습 자료로 정리해주세요.
-중복되는 내용은 제거하고, 핵심 내용만 간결하게 정리해주세요.
-노래 가사로 만들 수 있도록 자연스러운 문장으로 작성해주세요.
+        try:
+            resp = chat_completion(client, **_build_summary_request(combined_text, model))
+            return resp.choices[0].message.content.strip()
+        except Exception:
+            # 요약 실패 시 원본 텍스트 반환
+            return combined_text
+    
+    return analyzed_texts[0] if analyzed_texts else ""
 
-[추출된 내용]
-{combined_text}
 
-[요약된 학습 자료]"""
+async def analyze_multiple_images_async(
+    images: List[ImageInput],
+    api_key: str,
+    model: str = "gpt-4o-mini"
+) -> str:
+    """
+    analyze_multiple_images의 비동기 버전
+    각 이미지 분석을 동시에 실행한 뒤 종합합니다.
+    """
+    client = get_async_openai_client(api_key)
+    
+    # 각 이미지 분석 (동시 실행)
+    results = await asyncio.gather(
+        *(analyze_image_for_education_async(image, client, model) for image in images),
+        return_exceptions=True,
+    )
+    return await summarize_image_analyses_async(results, api_key, model)
+
 
+@timed("image_summary")
+async def summarize_image_analyses_async(
+    results: List[Union[str, Exception]],
+    api_key: str,
+    model: str = "gpt-4o-mini"
+) -> str:
+    """
+    이미지별 분석 결과(또는 실패 예외)를 종합하여 학습용 텍스트를 생성합니다.
+    (이미지가 도착하는 대로 분석을 시작한 경우 마지막에 호출)
+    """
+    analyzed_texts = []
+    for i, result in enumerate(results, 1):
+        if isinstance(result, UpstreamBusyError):
+            # 혼잡으로 거절된 경우 일부만 분석하지 않고 요청 전체를 503으로 돌려보냄
+            raise result
+        if isinstance(result, Exception):
+            analyzed_texts.append(f"[이미지 {i}] 분석 실패: {str(result)}")
+        else:
+            analyzed_texts.append(f"[이미지 {i}]\n{result}")
+    
+    # 여러 이미지 내용을 종합하여 요약
+    if len(analyzed_texts) > 1:
+        combined_text = "\n\n".join(analyzed_texts)
         try:
-            resp = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "너는 교육 자료 요약 전문가입니다. 여러 자료를 종합하여 학습자가 쉽게 외울 수 있는 형태로 정리해줍니다."
-                    },
-                    {"role": "user", "content": summary_prompt},
-                ],
-                temperature=0.5,
+            client = get_async_openai_client(api_key)
+            # 선택 단계: 시간 예산(src.core.deadline)이 부족하면 요약하지 않고 원본 텍스트 사용
+            resp = await run_optional_async(
+                "summary", lambda: chat_completion_async(client, **_build_summary_request(combined_text, model)), None
             )
-            return resp.choices[0].message.content.strip()
+            return resp.choices[0].message.content.strip() if resp is not None else combined_text
         except Exception:
             # 요약 실패 시 원본 텍스트 반환
             return combined_text
     
     return analyzed_texts[0] if analyzed_texts else ""
 
+
+def _build_summary_request(combined_text: str, model: str) -> Dict[str, Any]:
+    """여러 이미지 분석 결과 종합용 chat.completions.create 호출 인자 구성"""
+    summary_prompt = f"""다음은 여러 학습 자료에서 추출한 내용입니다. 
+이 내용들을 종합하여 하나의 일관된 학습 자료로 정리해주세요.
+중복되는 내용은 제거하고, 핵심 내용만 간결하게 정리해주세요.
+노래 가사로 만들 수 있도록 자연스러운 문장으로 작성해주세요.
+
+[추출된 내용]
+{combined_text}
+
+[요약된 학습 자료]"""
+
+    return {
+        "model": model,
+        "messages": [
+            {
+                "role": "system",
+                "content": "너는 교육 자료 요약 전문가입니다. 여러 자료를 종합하여 학습자가 쉽게 외울 수 있는 형태로 정리해줍니다."
+            },
+            {"role": "user", "content": summary_prompt},
+        ],
+        "temperature": 0.5,
+    }
@@ -0,0 +1,108 @@
+"""
+이미지 입력 → OpenAI Vision용 data URL 변환
+원본 바이트(bytes/bytearray/memoryview)는 base64로 한 번만 인코딩하고,
+이미 base64 문자열로 받은 입력은 디코딩/재인코딩 없이 그대로 사용한다.
+MIME 타입은 파일 시그니처로 판별한다. (기존에는 항상 image/png로 보냄)
+"""
+import base64
+import binascii
+import re
+from typing import Optional, Union
+
+# 원본 바이트 또는 base64 문자열 (data URL 포함)
+ImageInput = Union[bytes, bytearray, memoryview, str]
+
+DEFAULT_IMAGE_MIME = "image/png"
+
+# (시그니처, 시작 위치, MIME)
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", 0, "image/png"),
+    (b"\xff\xd8\xff", 0, "image/jpeg"),
+    (b"GIF87a", 0, "image/gif"),
+    (b"GIF89a", 0, "image/gif"),
+    (b"WEBP", 8, "image/webp"),
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def detect_image_mime(data: Union[bytes, bytearray, memoryview], declared: Optional[str] = None) -> str:
+    """
+    이미지 앞부분 바이트로 MIME 타입을 판별합니다.
+
+    Args:
+        data: 이미지 바이트 (앞 16바이트만 사용)
+        declared: 클라이언트가 알려준 Content-Type (판별 실패 시 사용)
+
+    Returns:
+        MIME 타입 (예: "image/jpeg")
+    """
+    head = bytes(data[:16])
+    for signature, offset, mime in _SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return mime
+    if declared and declared.startswith("image/"):
+        return declared.split(";")[0].strip()
+    return DEFAULT_IMAGE_MIME
+
+
+def image_bytes_to_data_url(data: Union[bytes, bytearray, memoryview], mime: Optional[str] = None) -> str:
+    """
+    원본 이미지 바이트를 data URL로 변환합니다. (base64 인코딩은 여기서 한 번만)
+
+    Args:
+        data: 이미지 바이트 (memoryview도 복사 없이 인코딩)
+        mime: Content-Type 힌트
+
+    Returns:
+        "data:<mime>;base64,..." 문자열
+    """
+    if not len(data):
+        raise ValueError("이미지 데이터가 비어있습니다.")
+    encoded = base64.b64encode(data).decode("ascii")
+    return f"data:{detect_image_mime(data, mime)};base64,{encoded}"
+
+
+def base64_to_data_url(image_b64: str, mime: Optional[str] = None) -> str:
+    """
+    base64 문자열(또는 data URL)을 전체 디코딩 없이 data URL로 변환합니다.
+    MIME 판별에는 앞부분 몇 바이트만 디코딩합니다.
+
+    Args:
+        image_b64: base64 문자열 또는 "data:image/...;base64,..." 형태
+        mime: Content-Type 힌트
+
+    Returns:
+        "data:<mime>;base64,..." 문자열
+    """
+    header, sep, data = image_b64.partition(",")
+    if sep and header.startswith("data:") and header.endswith(";base64"):
+        header_mime = header[len("data:"):-len(";base64")]
+        encoded = _WHITESPACE.sub("", data)
+        mime = header_mime or mime
+    else:
+        encoded = _WHITESPACE.sub("", data if sep else header)
+    if not encoded:
+        raise ValueError("이미지 데이터가 비어있습니다.")
+
+    try:
+        head = base64.b64decode(encoded[:24])
+    except (binascii.Error, ValueError):
+        raise ValueError("올바른 base64 이미지가 아닙니다.")
+    return f"data:{detect_image_mime(head, mime)};base64,{encoded}"
+
+
+def to_image_data_url(image: ImageInput, mime: Optional[str] = None) -> str:
+    """
+    이미지 입력(원본 바이트 또는 base64 문자열)을 data URL로 변환합니다.
+
+    Args:
+        image: bytes/bytearray/memoryview 또는 base64 문자열
+        mime: Content-Type 힌트
+
+    Returns:
+        "data:<mime>;base64,..." 문자열
+    """
+    if isinstance(image, str):
+        return base64_to_data_url(image, mime)
+    return image_bytes_to_data_url(image, mime)
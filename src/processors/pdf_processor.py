@@ -3,36 +3,70 @@ PDF 파일 처리 모듈
 """
 import io
 import sys
-from typing import List, Optional
+from typing import BinaryIO, List, Optional, Union
 
-# 라이브러리 import 시도 (에러 메시지 개선)
-PDFPLUMBER_AVAILABLE = False
-PYPDF2_AVAILABLE = False
-_import_errors = []
+from src.core.metrics import timed
+from src.core.tracing import span
 
-try:
-    import pdfplumber
-    PDFPLUMBER_AVAILABLE = True
-except ImportError as e:
-    _import_errors.append(f"pdfplumber: {str(e)}")
+# pdfplumber / PyPDF2는 import 비용이 커서 처음 PDF를 처리할 때 import
+# (pdfplumber 모듈 또는 None, PyPDF2 모듈 또는 None, import 오류 목록)
+_pdf_libraries = None
 
-try:
-    import PyPDF2
-    PYPDF2_AVAILABLE = True
-except ImportError as e:
-    _import_errors.append(f"PyPDF2: {str(e)}")
 
+def load_pdf_libraries():
+    """
+    PDF 처리 라이브러리를 한 번만 import합니다. (설치되지 않은 라이브러리는 None)
 
-def extract_text_from_pdf(pdf_bytes: bytes) -> str:
+    Returns:
+        (pdfplumber, PyPDF2, import 오류 목록)
+    """
+    global _pdf_libraries
+    if _pdf_libraries is None:
+        import_errors = []
+        try:
+            import pdfplumber
+        except ImportError as e:
+            pdfplumber = None
+            import_errors.append(f"pdfplumber: {str(e)}")
+
+        try:
+            import PyPDF2
+        except ImportError as e:
+            PyPDF2 = None
+            import_errors.append(f"PyPDF2: {str(e)}")
+
+        _pdf_libraries = (pdfplumber, PyPDF2, import_errors)
+    return _pdf_libraries
+
+
+def _as_seekable_stream(pdf_source: Union[bytes, BinaryIO]) -> BinaryIO:
+    """bytes 또는 파일 객체를 seek 가능한 스트림으로 (비어 있으면 ValueError)"""
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        if len(pdf_source) == 0:
+            raise ValueError("PDF 파일이 비어있습니다.")
+        return io.BytesIO(pdf_source)
+
+    pdf_source.seek(0, io.SEEK_END)
+    if pdf_source.tell() == 0:
+        raise ValueError("PDF 파일이 비어있습니다.")
+    pdf_source.seek(0)
+    return pdf_source
+
+
+@timed("pdf_extract")
+def extract_text_from_pdf(pdf_bytes: Union[bytes, BinaryIO]) -> str:
     """
     PDF 파일에서 텍스트를 추출합니다.
     pdfplumber를 우선 사용하고, 실패 시 PyPDF2를 사용합니다.
+    업로드 임시 파일처럼 seek 가능한 파일 객체를 넘기면 전체를 bytes로 복사하지 않고 읽습니다.
     """
-    if not pdf_bytes or len(pdf_bytes) == 0:
+    if pdf_bytes is None:
         raise ValueError("PDF 파일이 비어있습니다.")
+    pdf_stream = _as_seekable_stream(pdf_bytes)
     
     # 라이브러리 확인
-    if not PDFPLUMBER_AVAILABLE and not PYPDF2_AVAILABLE:
+    pdfplumber, PyPDF2, _import_errors = load_pdf_libraries()
+    if pdfplumber is None and PyPDF2 is None:
         error_msg = (
             "PDF 처리 라이브러리가 설치되지 않았습니다.\n"
             f"현재 Python 경로: {sys.executable}\n"
@@ -48,34 +82,42 @@ def extract_text_from_pdf(pdf_bytes: bytes) -> str:
     last_error = None
     
     # pdfplumber 시도 (더 정확함)
-    if PDFPLUMBER_AVAILABLE:
+    if pdfplumber is not None:
         try:
-            with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            pdf_stream.seek(0)
+            with pdfplumber.open(pdf_stream) as pdf:
                 for page_num, page in enumerate(pdf.pages, 1):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text and page_text.strip():
-                            text_parts.append(page_text.strip())
-                    except Exception as e:
-                        # 특정 페이지 추출 실패는 무시하고 계속 진행
-                        continue
+                    with span("pdf.page", page=page_num, parser="pdfplumber") as page_span:
+                        try:
+                            page_text = page.extract_text()
+                            page_span.set(chars=len(page_text or ""))
+                            if page_text and page_text.strip():
+                                text_parts.append(page_text.strip())
+                        except Exception as e:
+                            # 특정 페이지 추출 실패는 무시하고 계속 진행
+                            page_span.set(error=f"{type(e).__name__}: {e}"[:200])
+                            continue
             if text_parts:
                 return "\n\n".join(text_parts)
         except Exception as e:
             last_error = f"pdfplumber 오류: {str(e)}"
     
     # PyPDF2 폴백
-    if PYPDF2_AVAILABLE:
+    if PyPDF2 is not None:
         try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+            pdf_stream.seek(0)
+            pdf_reader = PyPDF2.PdfReader(pdf_stream)
             for page_num, page in enumerate(pdf_reader.pages, 1):
-                try:
-                    page_text = page.extract_text()
-                    if page_text and page_text.strip():
-                        text_parts.append(page_text.strip())
-                except Exception as e:
-                    # 특정 페이지 추출 실패는 무시하고 계속 진행
-                    continue
+                with span("pdf.page", page=page_num, parser="PyPDF2") as page_span:
+                    try:
+                        page_text = page.extract_text()
+                        page_span.set(chars=len(page_text or ""))
+                        if page_text and page_text.strip():
+                            text_parts.append(page_text.strip())
+                    except Exception as e:
+                        # 특정 페이지 추출 실패는 무시하고 계속 진행
+                        page_span.set(error=f"{type(e).__name__}: {e}"[:200])
+                        continue
             if text_parts:
                 return "\n\n".join(text_parts)
         except Exception as e:
@@ -1,6 +1,18 @@
 # src/vision_to_query.py
 import base64
-from openai import OpenAI
+from typing import TYPE_CHECKING
+
+from src.clients.openai_client import (
+    chat_completion,
+    chat_completion_async,
+    get_async_openai_client,
+    get_openai_client,
+)
+from src.processors.image_data import base64_to_data_url, image_bytes_to_data_url
+from src.core.metrics import timed
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 
 def encode_image(path):
@@ -8,13 +20,46 @@ def encode_image(path):
         return base64.b64encode(f.read()).decode("utf-8")
 
 
-def image_bytes_to_study_text(image_bytes, api_key, model="gpt-4o-mini"):
+@timed("ocr")
+def image_bytes_to_study_text(image_bytes, api_key, model="gpt-4o-mini", mime=None):
     """
-    OCR-like helper that extracts readable text from raw image bytes.
+    OCR-like helper that extracts readable text from raw image bytes
+    (bytes / bytearray / memoryview). The bytes are base64-encoded exactly once.
     """
-    client = OpenAI(api_key=api_key)
-    b64 = base64.b64encode(image_bytes).decode("utf-8")
-    return _image_b64_to_study_text(b64, client, model=model)
+    client = get_openai_client(api_key)
+    return _image_url_to_study_text(image_bytes_to_data_url(image_bytes, mime), client, model=model)
+
+
+@timed("ocr")
+async def image_bytes_to_study_text_async(image_bytes, api_key, model="gpt-4o-mini", mime=None):
+    """
+    Async variant of image_bytes_to_study_text (does not block the event loop).
+    """
+    client = get_async_openai_client(api_key)
+    image_url = image_bytes_to_data_url(image_bytes, mime)
+    resp = await chat_completion_async(client, "vision", **_build_ocr_request(image_url, model))
+    return resp.choices[0].message.content.strip()
+
+
+@timed("ocr")
+def image_base64_to_study_text(image_b64, api_key, model="gpt-4o-mini"):
+    """
+    Same as image_bytes_to_study_text for input that is already base64 (or a data URL).
+    The string is forwarded as-is instead of being decoded and re-encoded.
+    """
+    client = get_openai_client(api_key)
+    return _image_url_to_study_text(base64_to_data_url(image_b64), client, model=model)
+
+
+@timed("ocr")
+async def image_base64_to_study_text_async(image_b64, api_key, model="gpt-4o-mini"):
+    """
+    Async variant of image_base64_to_study_text.
+    """
+    client = get_async_openai_client(api_key)
+    image_url = base64_to_data_url(image_b64)
+    resp = await chat_completion_async(client, "vision", **_build_ocr_request(image_url, model))
+    return resp.choices[0].message.content.strip()
 
 
 def image_to_study_text(image_path, api_key, model="gpt-4o-mini"):
@@ -22,29 +67,33 @@ def image_to_study_text(image_path, api_key, model="gpt-4o-mini"):
     Convenience wrapper that loads the image from disk before delegating to the
     byte-processing helper.
     """
-    b64 = encode_image(image_path)
-    client = OpenAI(api_key=api_key)
-    return _image_b64_to_study_text(b64, client, model=model)
+    with open(image_path, "rb") as f:
+        image_bytes = f.read()
+    return image_bytes_to_study_text(image_bytes, api_key, model=model)
+
 
+def _image_url_to_study_text(image_url, client: "OpenAI", model="gpt-4o-mini"):
+    resp = chat_completion(client, "vision", **_build_ocr_request(image_url, model))
+    return resp.choices[0].message.content.strip()
 
-def _image_b64_to_study_text(image_b64, client: OpenAI, model="gpt-4o-mini"):
+
+def _build_ocr_request(image_url, model="gpt-4o-mini"):
     prompt = (
         "이미지 안에서 읽을 수 있는 문자만 정확히 추출해줘. "
         "가능하면 줄바꿈을 유지하고, 장식 표현은 빼고 글자 그대로 돌려줘. "
         "추출된 텍스트 외에는 아무 말도 하지 마."
     )
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
+    return {
+        "model": model,
+        "messages": [
             {"role": "system", "content": "너는 고정밀 OCR 보조자. 한국어와 숫자 기호를 그대로 전달해."},
             {
                 "role": "user",
                 "content": [
                     {"type": "text", "text": prompt},
-                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_b64}"}},
+                    {"type": "image_url", "image_url": {"url": image_url}},
                 ],
             },
         ],
-        temperature=0.0,
-    )
-    return resp.choices[0].message.content.strip()
\ No newline at end of file
+        "temperature": 0.0,
+    }
@@ -2,12 +2,14 @@
 RAG Multi-Agent System 에이전트들
 """
 from src.rag.agents.query_agent import QueryUnderstandingAgent
+from src.rag.agents.local_query_agent import LocalQueryAgent
 from src.rag.agents.retriever_agent import RetrieverAgent
 from src.rag.agents.reasoner_agent import ReasonerAgent
 from src.rag.agents.generator_agent import GeneratorAgent
 
 __all__ = [
     "QueryUnderstandingAgent",
+    "LocalQueryAgent",
     "RetrieverAgent",
     "ReasonerAgent",
     "GeneratorAgent",
@@ -2,10 +2,17 @@
 Generator Agent
 실제 가사/멜로디 생성 및 멜로디 가이드 생성
 """
-from typing import Dict, Any, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from collections import Counter
 import re
-from openai import OpenAI
+from src.clients.openai_client import (
+    chat_completion,
+    chat_completion_async,
+    chat_completion_stream_async,
+    get_async_openai_client,
+    get_openai_client,
+)
+from src.core.metrics import timed
 
 
 class GeneratorAgent:
@@ -23,9 +30,11 @@ class GeneratorAgent:
             api_key: OpenAI API 키
             model: 사용할 모델
         """
-        self.client = OpenAI(api_key=api_key)
+        self.client = get_openai_client(api_key)
+        self.async_client = get_async_openai_client(api_key)
         self.model = model
     
+    @timed("generator")
     def generate_lyrics(
         self,
         study_text: str,
@@ -43,6 +52,66 @@ class GeneratorAgent:
         Returns:
             생성된 가사
         """
+        response = chat_completion(
+            self.client,
+            **self._build_lyrics_request(study_text, reasoner_result, retrieved_docs)
+        )
+        lyrics = response.choices[0].message.content.strip()
+        
+        # 불필요한 설명 제거 (가사만 추출)
+        return self._clean_lyrics(lyrics)
+    
+    @timed("generator")
+    async def generate_lyrics_async(
+        self,
+        study_text: str,
+        reasoner_result: Dict[str, Any] = None,
+        retrieved_docs: List[Dict[str, Any]] = None
+    ) -> str:
+        """generate_lyrics의 비동기 버전 (이벤트 루프를 막지 않음)"""
+        response = await chat_completion_async(
+            self.async_client,
+            **self._build_lyrics_request(study_text, reasoner_result, retrieved_docs)
+        )
+        lyrics = response.choices[0].message.content.strip()
+        
+        # 불필요한 설명 제거 (가사만 추출)
+        return self._clean_lyrics(lyrics)
+    
+    @timed("generator")
+    async def stream_lyrics_async(
+        self,
+        study_text: str,
+        reasoner_result: Dict[str, Any] = None,
+        retrieved_docs: List[Dict[str, Any]] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        가사를 토큰 단위로 스트리밍 생성
+        
+        Yields:
+            ("token", {"text": 토큰}) 들, 마지막으로 ("draft", {"lyrics": 정리된 전체 가사})
+        """
+        request = self._build_lyrics_request(study_text, reasoner_result, retrieved_docs)
+        
+        parts = []
+        async for chunk in chat_completion_stream_async(self.async_client, **request):
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                parts.append(text)
+                yield "token", {"text": text}
+        
+        # 불필요한 설명 제거 (가사만 추출) - 비스트리밍 경로와 동일한 후처리
+        yield "draft", {"lyrics": self._clean_lyrics("".join(parts).strip())}
+    
+    def _build_lyrics_request(
+        self,
+        study_text: str,
+        reasoner_result: Dict[str, Any] = None,
+        retrieved_docs: List[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """가사 생성용 chat.completions.create 호출 인자 구성"""
         # 기본값 설정
         if reasoner_result is None:
             reasoner_result = {"style_guide": "", "recommendations": ""}
@@ -280,23 +349,18 @@ pencil은 연필, pencil은 연필
                 "원본 텍스트의 핵심 키워드와 주요 정보를 반드시 포함해야 합니다."
             )
         
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
+        return {
+            "model": self.model,
+            "messages": [
                 {
                     "role": "system",
                     "content": system_message
                 },
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3 if is_vocabulary else 0.5,  # 단어장은 더 낮은 temperature로 정확도 향상
-            max_tokens=1000,
-        )
-        
-        lyrics = response.choices[0].message.content.strip()
-        
-        # 불필요한 설명 제거 (가사만 추출)
-        return self._clean_lyrics(lyrics)
+            "temperature": 0.3 if is_vocabulary else 0.5,  # 단어장은 더 낮은 temperature로 정확도 향상
+            "max_tokens": 1000,
+        }
     
     def _detect_vocabulary_format(self, text: str) -> bool:
         """
@@ -379,6 +443,7 @@ pencil은 연필, pencil은 연필
         
         return lyrics
     
+    @timed("mnemonic_plan")
     def generate_mnemonic_plan(
         self,
         study_text: str,
@@ -394,6 +459,31 @@ pencil은 연필, pencil은 연필
         Returns:
             생성된 멜로디 가이드
         """
+        response = chat_completion(
+            self.client,
+            **self._build_mnemonic_plan_request(study_text, final_lyrics)
+        )
+        return response.choices[0].message.content.strip()
+    
+    @timed("mnemonic_plan")
+    async def generate_mnemonic_plan_async(
+        self,
+        study_text: str,
+        final_lyrics: Optional[str] = None
+    ) -> str:
+        """generate_mnemonic_plan의 비동기 버전 (이벤트 루프를 막지 않음)"""
+        response = await chat_completion_async(
+            self.async_client,
+            **self._build_mnemonic_plan_request(study_text, final_lyrics)
+        )
+        return response.choices[0].message.content.strip()
+    
+    def _build_mnemonic_plan_request(
+        self,
+        study_text: str,
+        final_lyrics: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """멜로디 가이드 생성용 chat.completions.create 호출 인자 구성"""
         if final_lyrics:
             # 가사가 이미 생성된 경우, 그 가사를 포함하여 멜로디 가이드 생성
             prompt = f"""
@@ -438,12 +528,11 @@ pencil은 연필, pencil은 연필
 - 가사는 별도로 표시되므로 멜로디 가이드에는 포함하지 않습니다.
 """.strip()
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
+        return {
+            "model": self.model,
+            "messages": [
                 {"role": "system", "content": self.SYSTEM_CORE},
                 {"role": "user", "content": prompt},
             ],
-            temperature=0.5,
-        )
-        return response.choices[0].message.content.strip()
\ No newline at end of file
+            "temperature": 0.5,
+        }
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+Local Query Agent
+LLM 호출 없이 동요 코퍼스 어휘 사전(src/rag/lexicon.py)과 키워드 추출로
+QueryUnderstandingAgent와 같은 형식의 검색 쿼리 / 카테고리를 만든다. (1ms 미만)
+"""
+from typing import Any, Dict, List
+
+from src.core.metrics import timed
+from src.rag.lexicon import build_lexicon, default_lexicon_path, load_lexicon, save_lexicon, stale_reason
+from src.rag.tokenizer import extract_keywords
+from src.rag.vector_db import DongyoVectorDB
+
+CATEGORY_NAMES = ("주제", "감정", "계절", "동물", "행동")
+
+
+class LocalQueryAgent:
+    """질문 해석 에이전트 (로컬, LLM 없음)"""
+
+    def __init__(self, db: DongyoVectorDB, max_keywords: int = 8):
+        """
+        Args:
+            db: 동요 Vector DB (사전은 인덱스 옆 파일에서 읽고, 없거나 다른 코퍼스로 만든 사전이면 동요 텍스트로 생성)
+            max_keywords: search_query에 넣을 최대 키워드 수
+        """
+        self.max_keywords = max_keywords
+        lexicon_path = default_lexicon_path(db.index_path)
+        lexicon = None
+        if lexicon_path.exists():
+            try:
+                lexicon = load_lexicon(lexicon_path)
+                reason = stale_reason(lexicon, db.song_texts)
+            except ValueError as e:
+                reason = str(e)
+            if reason is not None:
+                print(f"[LocalQueryAgent] 어휘 사전을 다시 만듭니다: {reason}")
+                lexicon = None
+        if lexicon is None:
+            lexicon = build_lexicon(db.song_texts)
+            try:
+                save_lexicon(lexicon, lexicon_path)
+                print(f"[LocalQueryAgent] 어휘 사전 생성: {lexicon_path}")
+            except OSError as e:
+                print(f"[LocalQueryAgent] 어휘 사전을 저장하지 못했습니다 (메모리에서만 사용): {e}")
+        self.idf: Dict[str, float] = lexicon["idf"]
+        # 카테고리별 단어: 긴 단어 → 코퍼스에 많이 나온 단어 순으로 먼저 매칭
+        self.category_terms: Dict[str, List[str]] = {
+            category: sorted(terms, key=lambda t: (-len(t), -terms[t]))
+            for category, terms in lexicon["categories"].items()
+        }
+
+    @timed("query_agent_local")
+    def process(self, user_query: str) -> Dict[str, Any]:
+        """
+        사용자 질문을 분석하고 검색 쿼리로 변환 (QueryUnderstandingAgent.process와 같은 형식)
+
+        Args:
+            user_query: 사용자 질문 또는 학습 텍스트
+
+        Returns:
+            {
+                "search_query": 키워드를 이어 붙인 검색 쿼리,
+                "categories": 사전에서 찾은 카테고리 (주제, 감정, 계절, 동물, 행동),
+                "intent": "가사 생성",
+                "original_query": 입력 그대로,
+                "source": "local",
+                "keywords": 추출한 키워드 (점수 순),
+                "known_keywords": 그중 동요 코퍼스에 나오는 키워드
+            }
+        """
+        text = (user_query or "").lower()
+        keywords = extract_keywords(text, limit=self.max_keywords, idf=self.idf)
+        known = [k for k in keywords if k in self.idf]
+
+        categories = {name: "" for name in CATEGORY_NAMES}
+        for category, terms in self.category_terms.items():
+            for term in terms:
+                if term in text:
+                    categories[category] = term
+                    break
+        # 주제: 다른 카테고리에 쓰이지 않은 코퍼스 키워드 중 가장 점수가 높은 것
+        matched = [v for v in categories.values() if v]
+        categories["주제"] = next((k for k in known if not any(m in k for m in matched)), "")
+        # 키워드에서 빠진 카테고리 단어("곰", "봄" 같은 한 글자 단어)는 검색 쿼리 앞에 붙임
+        extra = [m for m in matched if not any(m in k for k in keywords)]
+
+        return {
+            "search_query": " ".join(extra + keywords) or (user_query or "").strip()[:200],
+            "categories": categories,
+            "intent": "가사 생성",
+            "original_query": user_query,
+            "source": "local",
+            "keywords": keywords,
+            "known_keywords": known,
+        }
+
+    async def process_async(self, user_query: str) -> Dict[str, Any]:
+        """process와 동일 (CPU 작업이 1ms 미만이라 이벤트 루프에서 바로 실행)"""
+        return self.process(user_query)
@@ -2,8 +2,15 @@
 Query Understanding Agent
 사용자의 질문을 분석하고 검색 쿼리 형태로 변환
 """
+import json
 from typing import Dict, Any
-from openai import OpenAI
+from src.clients.openai_client import (
+    chat_completion,
+    chat_completion_async,
+    get_async_openai_client,
+    get_openai_client,
+)
+from src.core.metrics import timed
 
 
 class QueryUnderstandingAgent:
@@ -15,9 +22,11 @@ class QueryUnderstandingAgent:
             api_key: OpenAI API 키
             model: 사용할 모델
         """
-        self.client = OpenAI(api_key=api_key)
+        self.client = get_openai_client(api_key)
+        self.async_client = get_async_openai_client(api_key)
         self.model = model
     
+    @timed("query_agent")
     def process(self, user_query: str) -> Dict[str, Any]:
         """
         사용자 질문을 분석하고 검색 쿼리로 변환
@@ -32,6 +41,17 @@ class QueryUnderstandingAgent:
                 "intent": 사용자 의도
             }
         """
+        response = chat_completion(self.client, **self._build_request(user_query))
+        return self._parse_result(response.choices[0].message.content, user_query)
+    
+    @timed("query_agent")
+    async def process_async(self, user_query: str) -> Dict[str, Any]:
+        """process의 비동기 버전 (이벤트 루프를 막지 않음)"""
+        response = await chat_completion_async(self.async_client, **self._build_request(user_query))
+        return self._parse_result(response.choices[0].message.content, user_query)
+    
+    def _build_request(self, user_query: str) -> Dict[str, Any]:
+        """chat.completions.create 호출 인자 구성"""
         prompt = f"""다음 사용자 질문 또는 학습 텍스트를 분석하여 검색 쿼리와 카테고리를 추출해주세요.
 
 [사용자 입력]
@@ -57,21 +77,22 @@ class QueryUnderstandingAgent:
 - intent는 간결하게 한 문장으로 작성
 - JSON 형식만 출력하고 다른 설명은 하지 마세요"""
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
+        return {
+            "model": self.model,
+            "messages": [
                 {
                     "role": "system",
                     "content": "너는 사용자 질문을 분석하여 검색 쿼리와 카테고리를 추출하는 전문가입니다. JSON 형식으로만 답변합니다."
                 },
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3,
-            response_format={"type": "json_object"}
-        )
-        
-        import json
-        result = json.loads(response.choices[0].message.content.strip())
+            "temperature": 0.3,
+            "response_format": {"type": "json_object"},
+        }
+    
+    def _parse_result(self, content: str, user_query: str) -> Dict[str, Any]:
+        """LLM 응답(JSON)을 결과 딕셔너리로 변환"""
+        result = json.loads(content.strip())
         
         return {
             "search_query": result.get("search_query", user_query),
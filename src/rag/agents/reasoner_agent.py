@@ -2,8 +2,15 @@
 Reasoner Agent
 Query Agent 결과와 Retriever Agent 결과를 통합하여 최종 답변 생성
 """
+import json
 from typing import Dict, Any, List
-from openai import OpenAI
+from src.clients.openai_client import (
+    chat_completion,
+    chat_completion_async,
+    get_async_openai_client,
+    get_openai_client,
+)
+from src.core.metrics import timed
 
 
 class ReasonerAgent:
@@ -15,9 +22,11 @@ class ReasonerAgent:
             api_key: OpenAI API 키
             model: 사용할 모델
         """
-        self.client = OpenAI(api_key=api_key)
+        self.client = get_openai_client(api_key)
+        self.async_client = get_async_openai_client(api_key)
         self.model = model
     
+    @timed("reasoner")
     def reason(
         self,
         query_result: Dict[str, Any],
@@ -40,6 +49,26 @@ class ReasonerAgent:
                 "context_summary": 컨텍스트 요약
             }
         """
+        response = chat_completion(self.client, **self._build_request(query_result, retrieved_docs))
+        return self._parse_result(response.choices[0].message.content, query_result)
+    
+    @timed("reasoner")
+    async def reason_async(
+        self,
+        query_result: Dict[str, Any],
+        retrieved_docs: List[Dict[str, Any]],
+        task_type: str = "lyrics_generation"
+    ) -> Dict[str, Any]:
+        """reason의 비동기 버전 (이벤트 루프를 막지 않음)"""
+        response = await chat_completion_async(self.async_client, **self._build_request(query_result, retrieved_docs))
+        return self._parse_result(response.choices[0].message.content, query_result)
+    
+    def _build_request(
+        self,
+        query_result: Dict[str, Any],
+        retrieved_docs: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """chat.completions.create 호출 인자 구성"""
         # 검색된 문서를 컨텍스트로 포맷팅 (가사 포함)
         context = ""
         if retrieved_docs:
@@ -105,9 +134,9 @@ class ReasonerAgent:
 - rhyme_scheme은 4단계에서 분석한 운율 패턴을 구체적으로 제시해야 합니다 (예: "AABB 형식, 마지막 음절이 같은 운율").
 - JSON 형식만 출력하고 다른 설명은 하지 마세요."""
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
+        return {
+            "model": self.model,
+            "messages": [
                 {
                     "role": "system",
                     "content": (
@@ -121,12 +150,17 @@ class ReasonerAgent:
                 },
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3,  # 더 낮은 temperature로 일관성 향상
-            response_format={"type": "json_object"}
-        )
-        
-        import json
-        result = json.loads(response.choices[0].message.content.strip())
+            "temperature": 0.3,  # 더 낮은 temperature로 일관성 향상
+            "response_format": {"type": "json_object"},
+        }
+    
+    def empty_result(self, query_result: Dict[str, Any]) -> Dict[str, Any]:
+        """분석을 건너뛸 때 쓰는 빈 결과 (reason과 같은 형식, 스타일 가이드 없음)"""
+        return self._parse_result("{}", query_result)
+    
+    def _parse_result(self, content: str, query_result: Dict[str, Any]) -> Dict[str, Any]:
+        """LLM 응답(JSON)을 결과 딕셔너리로 변환"""
+        result = json.loads(content.strip())
         
         return {
             "reasoning": result.get("reasoning", ""),
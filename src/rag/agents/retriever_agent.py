@@ -2,11 +2,21 @@
 Retriever Agent
 벡터 DB에서 관련된 가사 또는 특징 요약을 검색
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 import numpy as np
 import re
-from openai import OpenAI
-from src.rag.vector_db import DongyoVectorDB
+from src.clients.openai_client import (
+    create_embeddings,
+    create_embeddings_async,
+    get_async_openai_client,
+    get_openai_client,
+)
+from src.core.executor import run_cpu_bound
+from src.rag.embedding_cache import get_embedding_cache
+from src.rag.fusion import HybridScores
+from src.rag.vector_db import get_shared_db
+from src.core.metrics import stage, timed
+from src.core.tracing import current_span
 
 
 class RetrieverAgent:
@@ -26,10 +36,14 @@ class RetrieverAgent:
             index_path: FAISS index 파일 경로
             embedding_model: 임베딩 모델
         """
-        self.client = OpenAI(api_key=api_key)
+        self.client = get_openai_client(api_key)
+        self.async_client = get_async_openai_client(api_key)
         self.embedding_model = embedding_model
-        self.db = DongyoVectorDB(embeddings_path=embeddings_path, index_path=index_path)
+        # 반복되는 검색 쿼리의 임베딩 캐시 (EMBEDDING_CACHE=0이면 None)
+        self.embedding_cache = get_embedding_cache(embedding_model)
+        self.db = get_shared_db(embeddings_path=embeddings_path, index_path=index_path)
     
+    @timed("retriever")
     def retrieve(
         self, 
         search_query: str, 
@@ -50,42 +64,252 @@ class RetrieverAgent:
             검색된 동요 정보 리스트
         """
         # 1. 벡터 검색 (의미적 유사성)
-        response = self.client.embeddings.create(
-            model=self.embedding_model,
-            input=search_query
-        )
-        query_embedding = np.array(response.data[0].embedding, dtype=np.float32)
+        with stage("embedding"):
+            if self.embedding_cache is not None:
+                query_embedding = self.embedding_cache.embed(self.client, [search_query])[0]
+            else:
+                response = create_embeddings(
+                    self.client,
+                    model=self.embedding_model,
+                    input=search_query
+                )
+                query_embedding = np.array(response.data[0].embedding, dtype=np.float32)
+        
+        return self._search(query_embedding, search_query, top_k, categories, use_hybrid)
+    
+    @timed("retriever")
+    async def retrieve_async(
+        self, 
+        search_query: str, 
+        top_k: int = 5,
+        categories: Optional[Dict[str, str]] = None,
+        use_hybrid: bool = True
+    ) -> List[Dict[str, Any]]:
+        """retrieve의 비동기 버전 (임베딩은 비동기 호출, FAISS/키워드 검색은 CPU 풀에서 실행)"""
+        with stage("embedding"):
+            if self.embedding_cache is not None:
+                query_embedding = (await self.embedding_cache.embed_async(self.async_client, [search_query]))[0]
+            else:
+                response = await create_embeddings_async(
+                    self.async_client,
+                    model=self.embedding_model,
+                    input=search_query
+                )
+                query_embedding = np.array(response.data[0].embedding, dtype=np.float32)
+        
+        return await run_cpu_bound(self._search, query_embedding, search_query, top_k, categories, use_hybrid)
+    
+    @timed("retriever")
+    def retrieve_candidates(
+        self,
+        queries: Sequence[str],
+        top_k: int = 5,
+        use_hybrid: bool = True
+    ) -> HybridScores:
+        """
+        여러 검색 쿼리를 배치 임베딩 호출 한 번으로 검색해 후보를 합침 (카테고리 필터 전)
+        질의 해석이 끝나기 전에 학습 텍스트 등으로 미리 검색해 둘 때 사용하고, reconcile로 마무리
+        
+        Args:
+            queries: 검색 쿼리들 (예: [로컬 검색 쿼리, 학습 텍스트])
+            top_k: 최종 반환할 상위 k개 (쿼리별로 이보다 넉넉하게 검색)
+            use_hybrid: 하이브리드 검색 사용 여부
+            
+        Returns:
+            동요별 후보 점수 (같은 동요는 가장 가까운 거리 / 가장 높은 키워드 점수)
+        """
+        if not queries:
+            return HybridScores(len(self.db.songs))
+        with stage("embedding"):
+            embeddings = self._embed_many(queries)
+        return self._merge_candidates(embeddings, queries, top_k, use_hybrid)
+    
+    @timed("retriever")
+    async def retrieve_candidates_async(
+        self,
+        queries: Sequence[str],
+        top_k: int = 5,
+        use_hybrid: bool = True
+    ) -> HybridScores:
+        """retrieve_candidates의 비동기 버전"""
+        if not queries:
+            return HybridScores(len(self.db.songs))
+        with stage("embedding"):
+            embeddings = await self._embed_many_async(queries)
+        return await run_cpu_bound(self._merge_candidates, embeddings, queries, top_k, use_hybrid)
+    
+    @timed("retriever_reconcile")
+    def reconcile(
+        self,
+        candidates: Optional[HybridScores],
+        search_query: str,
+        top_k: int = 5,
+        categories: Optional[Dict[str, str]] = None,
+        use_hybrid: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        미리 검색한 후보에 질의 해석 결과를 반영해 최종 결과 선택 (API 호출 없음)
+        검색 쿼리의 키워드 점수를 후보에 더하고, 카테고리로 필터링한 뒤 상위 k개를 고름
+        
+        Args:
+            candidates: retrieve_candidates 결과 (이 후보에 바로 더함, None이면 키워드 검색만)
+            search_query: 질의 해석 결과의 검색 쿼리
+            top_k: 반환할 상위 k개 결과
+            categories: 필터링할 카테고리
+            use_hybrid: 키워드 검색 결과를 더할지 여부
+            
+        Returns:
+            검색된 동요 정보 리스트
+        """
+        if candidates is None:
+            candidates = HybridScores(len(self.db.songs))
+        keywords = self._extract_keywords(search_query) if use_hybrid else []
+        if keywords:
+            candidates.add_keyword(self.db.keyword_scores(keywords))
+        return self._finalize(candidates, search_query, top_k, self.db.category_bitmap(categories))
+    
+    def _embed_many(self, texts: Sequence[str]) -> List[np.ndarray]:
+        """여러 텍스트를 embeddings.create 한 번으로 임베딩 (캐시에 있는 것은 제외)"""
+        if self.embedding_cache is not None:
+            return self.embedding_cache.embed(self.client, texts)
+        response = create_embeddings(self.client, model=self.embedding_model, input=list(texts))
+        return [np.array(d.embedding, dtype=np.float32) for d in sorted(response.data, key=lambda d: d.index)]
+    
+    async def _embed_many_async(self, texts: Sequence[str]) -> List[np.ndarray]:
+        """_embed_many의 비동기 버전"""
+        if self.embedding_cache is not None:
+            return await self.embedding_cache.embed_async(self.async_client, texts)
+        response = await create_embeddings_async(self.async_client, model=self.embedding_model, input=list(texts))
+        return [np.array(d.embedding, dtype=np.float32) for d in sorted(response.data, key=lambda d: d.index)]
+    
+    def _merge_candidates(
+        self,
+        embeddings: Sequence[np.ndarray],
+        queries: Sequence[str],
+        top_k: int,
+        use_hybrid: bool
+    ) -> HybridScores:
+        """쿼리별 후보 검색 결과를 합침 (CPU 바운드)"""
+        candidates = HybridScores(len(self.db.songs))
+        for embedding, query in zip(embeddings, queries):
+            self._candidates(embedding, query, top_k, use_hybrid, candidates)
+        current_span().set(queries=len(queries), candidates=len(candidates))
+        return candidates
+    
+    def _search(
+        self,
+        query_embedding: np.ndarray,
+        search_query: str,
+        top_k: int,
+        categories: Optional[Dict[str, str]],
+        use_hybrid: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        임베딩이 준비된 뒤의 로컬 검색 단계 (API 호출 없음, CPU 바운드)
+        
+        Args:
+            query_embedding: 쿼리 임베딩 벡터
+            search_query: 검색 쿼리 (키워드 추출용)
+            top_k: 반환할 상위 k개 결과
+            categories: 필터링할 카테고리
+            use_hybrid: 하이브리드 검색 사용 여부
+            
+        Returns:
+            검색된 동요 정보 리스트
+        """
+        # 카테고리가 이미 정해져 있으므로 처음부터 비트맵으로 필터링해 검색
+        bitmap = self.db.category_bitmap(categories)
+        scores = HybridScores(len(self.db.songs), bitmap)
+        candidates = self._candidates(query_embedding, search_query, top_k, use_hybrid, scores)
+        return self._finalize(candidates, search_query, top_k, bitmap)
+    
+    def _candidates(
+        self,
+        query_embedding: np.ndarray,
+        search_query: str,
+        top_k: int,
+        use_hybrid: bool,
+        scores: Optional[HybridScores] = None
+    ) -> HybridScores:
+        """
+        벡터 검색 (+ 하이브리드면 BM25 키워드 점수) 후보 점수 (카테고리 필터 전, 결과 dict 없음)
         
-        # 벡터 검색 (더 많이 검색하여 후처리)
-        vector_results = self.db.search_similar(query_embedding, top_k=top_k * 3 if use_hybrid else top_k)
+        Args:
+            query_embedding: 쿼리 임베딩 벡터
+            search_query: 검색 쿼리 (키워드 추출용)
+            top_k: 최종 반환할 상위 k개 (벡터 검색은 하이브리드면 3배로 넉넉하게)
+            use_hybrid: 하이브리드 검색 사용 여부
+            scores: 점수를 더할 후보 (없으면 새로 만듦, 비트맵이 있으면 그 동요 안에서만 검색)
+        """
+        if scores is None:
+            scores = HybridScores(len(self.db.songs))
+        # 1. 벡터 검색 (더 많이 검색하여 키워드 점수와 결합)
+        k = top_k * 3 if use_hybrid else top_k
+        ids, distances = self.db.search_vectors(query_embedding, top_k=k, bitmap=scores.bitmap)
+        scores.add_vector(ids, distances)
+        scores.queries.append((query_embedding, k))
         
-        # 2. 하이브리드 검색: 키워드 검색 추가 (비용 없음)
+        # 2. 하이브리드 검색: 키워드(BM25) 점수 추가 (비용 없음)
         if use_hybrid:
-            # 검색 쿼리에서 키워드 추출
             keywords = self._extract_keywords(search_query)
             if keywords:
-                keyword_results = self.db.search_by_keywords(keywords, top_k=top_k * 2)
-                
-                # 벡터 검색과 키워드 검색 결과 결합
-                # 벡터 검색 결과에 가중치 부여 (70%)
-                # 키워드 검색 결과에 가중치 부여 (30%)
-                combined_results = self._combine_results(vector_results, keyword_results, top_k=top_k * 2)
-            else:
-                combined_results = vector_results
-        else:
-            combined_results = vector_results
-        
-        # 3. 메타데이터 필터링 (카테고리 기반, 비용 없음)
-        if categories:
-            filtered_results = self.db.filter_by_categories(combined_results, categories)
-        else:
-            filtered_results = combined_results
+                scores.add_keyword(self.db.keyword_scores(keywords))
+        current_span().set(vector_hits=len(ids))
+        return scores
+    
+    def _finalize(
+        self,
+        candidates: HybridScores,
+        search_query: str,
+        top_k: int,
+        bitmap: Optional[np.ndarray]
+    ) -> List[Dict[str, Any]]:
+        """
+        카테고리로 제한된 후보의 결합 점수 상위 k개만 결과 dict로 만듦
+
+        Args:
+            candidates: 후보 점수
+            search_query: 검색 쿼리 (trace 기록용)
+            top_k: 반환할 상위 k개 결과
+            bitmap: 카테고리 비트맵 (category_bitmap 결과, 매칭되는 동요가 없으면 None = 필터 없음)
+        """
+        # 3. 메타데이터 필터링 (후보가 다른 비트맵으로 검색됐을 때만 다시 검색)
+        if not candidates.filtered_by(bitmap):
+            candidates = self._refilter(candidates, bitmap)
         
-        # 4. 최종 상위 k개 선택 (거리 기반)
-        final_results = sorted(filtered_results, key=lambda x: x.get('distance', float('inf')))[:top_k]
+        # 4. 최종 상위 k개 (결합 점수 순)
+        fused = candidates.fused()
+        final_results = [self._result(idx, candidates, fused) for idx in candidates.top(top_k, fused).tolist()]
+        current_span().set(
+            query_chars=len(search_query),
+            filtered=len(candidates),
+            docs=len(final_results),
+        )
         
         return final_results
     
+    def _refilter(self, candidates: HybridScores, bitmap: Optional[np.ndarray]) -> HybridScores:
+        """
+        카테고리가 정해지기 전에 검색한 후보를 비트맵으로 다시 제한 (API 호출 없음)
+        같은 임베딩으로 FAISS를 필터링해 다시 검색하므로, 필터 없이 가져온 후보 밖의 동요도 찾습니다.
+        """
+        refiltered = HybridScores(len(self.db.songs), bitmap)
+        for query_embedding, k in candidates.queries:
+            refiltered.add_vector(*self.db.search_vectors(query_embedding, top_k=k, bitmap=bitmap))
+        refiltered.queries = candidates.queries
+        refiltered.add_keyword(candidates.keyword)
+        return refiltered
+    
+    def _result(self, idx: int, candidates: HybridScores, fused: np.ndarray) -> Dict[str, Any]:
+        """선택된 동요의 결과 dict (벡터 결과가 없으면 키워드 점수로 거리 환산)"""
+        distance = float(candidates.distance[idx])
+        keyword_score = float(candidates.keyword[idx])
+        scores: Dict[str, Any] = {"distance": distance if np.isfinite(distance) else 1.0 / (keyword_score + 1)}
+        if keyword_score > 0:
+            scores["keyword_score"] = keyword_score
+        scores["combined_score"] = float(fused[idx])
+        return self.db.song(idx, **scores)
+    
     def _extract_keywords(self, text: str) -> List[str]:
         """
         텍스트에서 키워드 추출 (간단한 방법, 비용 없음)
@@ -102,52 +326,3 @@ class RetrieverAgent:
         stopwords = {'the', 'is', 'are', 'was', 'were', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', '이', '가', '을', '를', '에', '의', '와', '과', '도', '로', '으로'}
         keywords = [w for w in words if len(w) >= 2 and w not in stopwords]
         return keywords[:10]  # 최대 10개
-    
-    def _combine_results(
-        self,
-        vector_results: List[Dict[str, Any]],
-        keyword_results: List[Dict[str, Any]],
-        top_k: int = 10
-    ) -> List[Dict[str, Any]]:
-        """
-        벡터 검색과 키워드 검색 결과 결합 (비용 없음)
-        
-        Args:
-            vector_results: 벡터 검색 결과
-            keyword_results: 키워드 검색 결과
-            top_k: 반환할 상위 k개
-            
-        Returns:
-            결합된 결과 리스트
-        """
-        # 결과를 인덱스로 그룹화
-        combined = {}
-        
-        # 벡터 검색 결과 (가중치 0.7)
-        for result in vector_results:
-            idx = result.get('index')
-            if idx is not None:
-                if idx not in combined:
-                    combined[idx] = result.copy()
-                    combined[idx]['combined_score'] = 0.0
-                # 거리를 점수로 변환 (거리가 작을수록 점수 높음)
-                distance = result.get('distance', float('inf'))
-                score = 1.0 / (distance + 1) * 0.7
-                combined[idx]['combined_score'] = combined[idx].get('combined_score', 0.0) + score
-        
-        # 키워드 검색 결과 (가중치 0.3)
-        for result in keyword_results:
-            idx = result.get('index')
-            if idx is not None:
-                if idx not in combined:
-                    combined[idx] = result.copy()
-                    combined[idx]['combined_score'] = 0.0
-                # 키워드 점수를 정규화하여 추가
-                keyword_score = result.get('keyword_score', 0)
-                score = keyword_score / (keyword_score + 1) * 0.3
-                combined[idx]['combined_score'] = combined[idx].get('combined_score', 0.0) + score
-        
-        # 점수 기준으로 정렬
-        sorted_results = sorted(combined.values(), key=lambda x: x.get('combined_score', 0.0), reverse=True)
-        
-        return sorted_results[:top_k]
\ No newline at end of file
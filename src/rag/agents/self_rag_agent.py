@@ -3,7 +3,13 @@ Self-RAG Agent
 생성된 가사를 검증하고 개선하는 Self-RAG 과정
 """
 from typing import Dict, Any, List, Optional
-from openai import OpenAI
+from src.clients.openai_client import (
+    chat_completion,
+    chat_completion_async,
+    get_async_openai_client,
+    get_openai_client,
+)
+from src.core.metrics import timed
 
 
 class SelfRAGAgent:
@@ -15,9 +21,11 @@ class SelfRAGAgent:
             api_key: OpenAI API 키
             model: 사용할 모델
         """
-        self.client = OpenAI(api_key=api_key)
+        self.client = get_openai_client(api_key)
+        self.async_client = get_async_openai_client(api_key)
         self.model = model
     
+    @timed("self_rag")
     def verify_and_improve(
         self,
         generated_lyrics: str,
@@ -41,6 +49,42 @@ class SelfRAGAgent:
                 "improvements": 개선 사항 리스트
             }
         """
+        try:
+            response = chat_completion(
+                self.client,
+                **self._build_request(generated_lyrics, study_text, retrieved_docs)
+            )
+            return self._parse_result(response.choices[0].message.content.strip(), generated_lyrics)
+        except Exception as e:
+            # 검증 실패 시 원본 가사 반환
+            return self._fallback_result(generated_lyrics, e)
+    
+    @timed("self_rag")
+    async def verify_and_improve_async(
+        self,
+        generated_lyrics: str,
+        study_text: str,
+        retrieved_docs: List[Dict[str, Any]],
+        reasoner_result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """verify_and_improve의 비동기 버전 (이벤트 루프를 막지 않음)"""
+        try:
+            response = await chat_completion_async(
+                self.async_client,
+                **self._build_request(generated_lyrics, study_text, retrieved_docs)
+            )
+            return self._parse_result(response.choices[0].message.content.strip(), generated_lyrics)
+        except Exception as e:
+            # 검증 실패 시 원본 가사 반환
+            return self._fallback_result(generated_lyrics, e)
+    
+    def _build_request(
+        self,
+        generated_lyrics: str,
+        study_text: str,
+        retrieved_docs: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """chat.completions.create 호출 인자 구성"""
         # 검색된 동요 정보를 컨텍스트로 포맷팅
         context = ""
         if retrieved_docs:
@@ -89,41 +133,40 @@ class SelfRAGAgent:
 **중요: 가사만 작성하고, 설명이나 평가 문구는 절대 포함하지 마세요.**
 """
         
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "너는 가사 검증 및 개선 전문가입니다. 생성된 가사를 검증하고 필요시 개선하여 더 정확하고 품질 높은 가사를 만들어줍니다."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,  # 낮은 temperature로 일관성 유지
-                max_tokens=1500,
-            )
-            
-            result_text = response.choices[0].message.content.strip()
-            
-            # 결과 파싱
-            improved_lyrics = self._extract_improved_lyrics(result_text, generated_lyrics)
-            verification_result = self._extract_verification(result_text)
-            improvements = self._extract_improvements(result_text)
-            
-            return {
-                "improved_lyrics": improved_lyrics,
-                "verification_result": verification_result,
-                "improvements": improvements,
-                "raw_result": result_text
-            }
-        except Exception as e:
-            # 검증 실패 시 원본 가사 반환
-            return {
-                "improved_lyrics": generated_lyrics,
-                "verification_result": {"error": str(e)},
-                "improvements": [],
-                "raw_result": ""
-            }
+        return {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "너는 가사 검증 및 개선 전문가입니다. 생성된 가사를 검증하고 필요시 개선하여 더 정확하고 품질 높은 가사를 만들어줍니다."
+                },
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,  # 낮은 temperature로 일관성 유지
+            "max_tokens": 1500,
+        }
+    
+    def _parse_result(self, result_text: str, generated_lyrics: str) -> Dict[str, Any]:
+        """검증 응답 텍스트를 결과 딕셔너리로 변환"""
+        improved_lyrics = self._extract_improved_lyrics(result_text, generated_lyrics)
+        verification_result = self._extract_verification(result_text)
+        improvements = self._extract_improvements(result_text)
+        
+        return {
+            "improved_lyrics": improved_lyrics,
+            "verification_result": verification_result,
+            "improvements": improvements,
+            "raw_result": result_text
+        }
+    
+    def _fallback_result(self, generated_lyrics: str, error: Exception) -> Dict[str, Any]:
+        """검증 실패 시 원본 가사를 그대로 사용하는 결과"""
+        return {
+            "improved_lyrics": generated_lyrics,
+            "verification_result": {"error": str(error)},
+            "improvements": [],
+            "raw_result": ""
+        }
     
     def _extract_improved_lyrics(self, result_text: str, original_lyrics: str) -> str:
         """개선된 가사 추출"""
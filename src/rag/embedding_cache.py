@@ -0,0 +1,374 @@
+"""
+검색 쿼리 임베딩 캐시
+같은 교과 단원 / 단어 목록에서 나온 검색 쿼리는 자주 반복되므로,
+(모델, 정규화한 텍스트)별로 임베딩을 저장해 embeddings.create 왕복을 없앤다.
+
+    메모리 LRU (워커별, EMBEDDING_CACHE_MEMORY_ITEMS개)
+      → sqlite 디스크 캐시 (워커 간 공유, float32 바이트로 압축 저장,
+        EMBEDDING_CACHE_MAX_MB를 넘으면 오래 사용하지 않은 항목부터 삭제, EMBEDDING_CACHE_TTL_SEC가 지나면 무효)
+        → OpenAI embeddings.create (미스만 한 번에 배치 요청)
+
+자주 쓰는 텍스트는 미리 채워 둘 수 있다.
+    python -m src.rag.embedding_cache prewarm queries.txt   # 한 줄에 텍스트 하나
+"""
+import argparse
+import collections
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.clients.openai_client import create_embeddings, create_embeddings_async
+from src.core.executor import run_io_bound
+from src.core.metrics import REGISTRY, Counter
+from src.core.singleflight import normalize_text
+
+# 임베딩 캐시 사용 여부
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE", "1") != "0"
+# 메모리 LRU 항목 수 (1536차원 float32 기준 항목당 약 6KB)
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "4096"))
+# 디스크 캐시 파일 (빈 값이면 메모리 캐시만 사용)
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH", str(project_root / "data" / "embedding_cache.sqlite3")
+)
+# 디스크 캐시 크기 상한(MB) (넘으면 오래 사용하지 않은 항목부터 삭제)
+EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "256"))
+# 디스크 캐시 항목 유효 기간(초)
+EMBEDDING_CACHE_TTL_SEC = float(os.getenv("EMBEDDING_CACHE_TTL_SEC", str(30 * 24 * 3600)))
+# 한 번의 embeddings.create에 넣을 최대 텍스트 수
+EMBEDDING_BATCH_SIZE = 256
+
+EMBEDDING_CACHE_REQUESTS = REGISTRY.register(Counter(
+    "embedding_cache_requests", "쿼리 임베딩 캐시 조회 결과 (memory / disk / miss)", ["result"]
+))
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 정규화: 유니코드 NFKC + 연속 공백 하나로 + 앞뒤 공백 제거"""
+    return normalize_text(unicodedata.normalize("NFKC", text or ""))
+
+
+def _key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+
+class _DiskTier:
+    """
+    sqlite 디스크 계층 (벡터는 float32 바이트로 저장, 스레드별 연결)
+    요청마다 새 학습 텍스트 임베딩이 쌓이므로 src/core/llm_cache.py의 SQLiteResponseCache처럼
+    만료 항목과, 크기 상한을 넘는 오래 사용하지 않은 항목을 주기적으로 지운다.
+    """
+
+    # 이 횟수만큼 저장할 때마다 크기 상한 / 만료 정리
+    EVICT_EVERY = 50
+    # 정리 시 상한의 이 비율까지 줄임 (매번 정리하지 않도록 여유)
+    EVICT_TARGET = 0.9
+    # 접근 시각 갱신 최소 간격(초) (조회마다 쓰기가 생기지 않도록)
+    TOUCH_INTERVAL_SEC = 60.0
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = int(EMBEDDING_CACHE_MAX_MB * 1024 * 1024),
+        ttl_seconds: float = EMBEDDING_CACHE_TTL_SEC,
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._puts = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL DEFAULT 0)"
+            )
+            # 접근 시각 열이 없던 파일은 열을 추가하고 만든 시각으로 채움
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(embeddings)")}
+            if "accessed_at" not in columns:
+                conn.execute("ALTER TABLE embeddings ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+                conn.execute("UPDATE embeddings SET accessed_at = created_at")
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        stale: List[str] = []
+        now = time.time()
+        conn = self._connect()
+        # sqlite 변수 개수 제한을 넘지 않도록 나눠서 조회 (만료된 항목은 미스)
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for key, dim, blob, accessed_at in conn.execute(
+                f"SELECT key, dim, vector, accessed_at FROM embeddings"
+                f" WHERE key IN ({placeholders}) AND created_at >= ?",
+                [*chunk, now - self.ttl_seconds],
+            ):
+                vector = np.frombuffer(blob, dtype=np.float32)
+                if vector.shape[0] == dim:
+                    found[key] = vector
+                    if now - accessed_at > self.TOUCH_INTERVAL_SEC:
+                        stale.append(key)
+        if stale:
+            with conn:
+                conn.executemany("UPDATE embeddings SET accessed_at = ? WHERE key = ?", [(now, key) for key in stale])
+        return found
+
+    def put_many(self, model: str, items: Dict[str, np.ndarray]) -> None:
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, model, int(v.shape[0]), sqlite3.Binary(v.tobytes()), now, now) for key, v in items.items()],
+            )
+        with self._lock:
+            self._puts += 1
+            evict = self._puts % self.EVICT_EVERY == 1
+        if evict:
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """만료 항목 삭제 후, 크기 상한을 넘으면 오래 사용하지 않은 항목부터 삭제"""
+        with conn:
+            conn.execute("DELETE FROM embeddings WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            total = conn.execute("SELECT COALESCE(SUM(dim * 4), 0) FROM embeddings").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            excess = total - int(self.max_bytes * self.EVICT_TARGET)
+            removed = 0
+            for key, size in conn.execute("SELECT key, dim * 4 FROM embeddings ORDER BY accessed_at").fetchall():
+                if removed >= excess:
+                    break
+                conn.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+                removed += size
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class EmbeddingCache:
+    """모델별 쿼리 임베딩 캐시 (메모리 LRU → sqlite)"""
+
+    def __init__(
+        self,
+        model: str,
+        memory_items: int = EMBEDDING_CACHE_MEMORY_ITEMS,
+        path: Optional[str] = EMBEDDING_CACHE_PATH,
+    ):
+        """
+        Args:
+            model: 임베딩 모델 이름 (키에 포함)
+            memory_items: 메모리 LRU 항목 수
+            path: sqlite 파일 경로 (None 또는 빈 값이면 메모리만)
+        """
+        self.model = model
+        self.memory_items = memory_items
+        self._memory: "collections.OrderedDict[str, np.ndarray]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[_DiskTier] = None
+        if path:
+            try:
+                self._disk = _DiskTier(Path(path))
+            except (OSError, sqlite3.Error) as e:
+                print(f"[EmbeddingCache] 디스크 캐시를 열 수 없어 메모리만 사용합니다: {e}")
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def get_many(self, texts: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        캐시에 있는 임베딩 조회 (디스크 적중은 메모리로 올림)
+
+        Args:
+            texts: 정규화된 텍스트 목록
+
+        Returns:
+            {텍스트: float32 벡터} (캐시에 있는 것만)
+        """
+        found: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}
+        with self._lock:
+            for text in texts:
+                key = _key(self.model, text)
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[text] = vector
+                else:
+                    missing[key] = text
+        EMBEDDING_CACHE_REQUESTS.inc(len(found), result="memory")
+
+        if missing and self._disk is not None:
+            try:
+                disk_hits = self._disk.get_many(list(missing))
+            except sqlite3.Error as e:
+                print(f"[EmbeddingCache] 조회 실패: {e}")
+                disk_hits = {}
+            for key, vector in disk_hits.items():
+                self._remember(key, vector)
+                found[missing.pop(key)] = vector
+            EMBEDDING_CACHE_REQUESTS.inc(len(disk_hits), result="disk")
+        EMBEDDING_CACHE_REQUESTS.inc(len(missing), result="miss")
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]) -> None:
+        """임베딩 저장 (메모리 + 디스크)"""
+        keyed = {_key(self.model, text): np.asarray(v, dtype=np.float32) for text, v in vectors.items()}
+        for key, vector in keyed.items():
+            self._remember(key, vector)
+        if self._disk is not None and keyed:
+            try:
+                self._disk.put_many(self.model, keyed)
+            except sqlite3.Error as e:
+                print(f"[EmbeddingCache] 저장 실패: {e}")
+
+    def embed(self, client: Any, texts: Sequence[str]) -> List[np.ndarray]:
+        """
+        텍스트 목록의 임베딩 (캐시 미스만 배치로 API 호출)
+
+        Args:
+            client: 동기 OpenAI 클라이언트
+            texts: 텍스트 목록 (내부에서 정규화)
+
+        Returns:
+            texts 순서대로 float32 벡터
+        """
+        normalized = [normalize_query(t) for t in texts]
+        found = self.get_many(list(dict.fromkeys(normalized)))
+        found.update(self._fetch(client, [t for t in dict.fromkeys(normalized) if t not in found]))
+        return [found[t] for t in normalized]
+
+    def _fetch(self, client: Any, missing: Sequence[str]) -> Dict[str, np.ndarray]:
+        """캐시 미스 텍스트를 배치로 임베딩하고 저장"""
+        fetched: Dict[str, np.ndarray] = {}
+        for i in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+            batch = missing[i:i + EMBEDDING_BATCH_SIZE]
+            response = create_embeddings(client, model=self.model, input=list(batch))
+            vectors = self._vectors(batch, response)
+            self.put_many(vectors)
+            fetched.update(vectors)
+        return fetched
+
+    async def embed_async(self, client: Any, texts: Sequence[str]) -> List[np.ndarray]:
+        """embed의 비동기 버전 (메모리 적중은 바로, 디스크 조회/저장은 I/O 스레드 풀에서)"""
+        normalized = [normalize_query(t) for t in texts]
+        unique = list(dict.fromkeys(normalized))
+        found = await run_io_bound(self.get_many, unique) if self._disk is not None else self.get_many(unique)
+        missing = [t for t in unique if t not in found]
+        for i in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+            batch = missing[i:i + EMBEDDING_BATCH_SIZE]
+            response = await create_embeddings_async(client, model=self.model, input=batch)
+            fetched = self._vectors(batch, response)
+            await run_io_bound(self.put_many, fetched)
+            found.update(fetched)
+        return [found[t] for t in normalized]
+
+    @staticmethod
+    def _vectors(batch: Sequence[str], response: Any) -> Dict[str, np.ndarray]:
+        # 응답 순서는 index 필드 기준
+        data = sorted(response.data, key=lambda d: d.index)
+        return {text: np.asarray(d.embedding, dtype=np.float32) for text, d in zip(batch, data)}
+
+    def prewarm(self, client: Any, texts: Iterable[str]) -> int:
+        """
+        텍스트 목록을 미리 임베딩해 캐시에 채웁니다. (이미 있는 텍스트는 건너뜀)
+
+        Returns:
+            새로 임베딩한 텍스트 수
+        """
+        unique = list(dict.fromkeys(normalize_query(t) for t in texts if t and t.strip()))
+        found = self.get_many(unique)
+        return len(self._fetch(client, [t for t in unique if t not in found]))
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 상태"""
+        with self._lock:
+            memory = len(self._memory)
+        disk = None
+        if self._disk is not None:
+            try:
+                disk = self._disk.count()
+            except sqlite3.Error:
+                pass
+        return {"model": self.model, "memory_items": memory, "disk_items": disk}
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model: str) -> Optional[EmbeddingCache]:
+    """모델별 공유 캐시 (EMBEDDING_CACHE=0이면 None)"""
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    cache = _caches.get(model)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(model)
+            if cache is None:
+                cache = EmbeddingCache(model)
+                _caches[model] = cache
+    return cache
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="검색 쿼리 임베딩 캐시 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    prewarm = sub.add_parser("prewarm", help="텍스트 파일(한 줄에 하나)의 임베딩을 미리 채움")
+    prewarm.add_argument("path", help="텍스트 파일 경로 (- 이면 표준 입력)")
+    prewarm.add_argument("--model", default="text-embedding-3-small")
+    sub.add_parser("stats", help="캐시 항목 수 출력").add_argument("--model", default="text-embedding-3-small")
+    args = parser.parse_args()
+
+    cache = EmbeddingCache(args.model)
+    if args.command == "stats":
+        print(cache.stats())
+        return
+
+    from dotenv import load_dotenv
+    from src.clients.openai_client import get_openai_client
+
+    load_dotenv()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise SystemExit("OPENAI_API_KEY가 설정되지 않았습니다.")
+    if args.path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(args.path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    added = cache.prewarm(get_openai_client(api_key), lines)
+    print(f"✅ 임베딩 캐시 채움: {added}개 추가 (전체 {cache.stats()})")
+
+
+if __name__ == "__main__":
+    main()
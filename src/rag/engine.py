@@ -0,0 +1,145 @@
+"""
+RAG Engine
+프로세스(워커)당 한 번만 Vector DB / 키워드 인덱스 / 에이전트 클라이언트를 로드하고
+모든 요청이 공유하도록 관리
+faiss / numpy / openai 등 무거운 모듈은 load() 시점(백그라운드 워밍업)에 import해
+서버 시작 시간을 줄인다.
+"""
+import asyncio
+import gc
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    from src.rag.orchestrator import RAGOrchestrator
+    from src.rag.vector_db import DongyoVectorDB
+
+
+class RAGEngine:
+    """프로세스 전역 RAG 엔진 (한 번 로드 후 재사용)"""
+
+    def __init__(
+        self,
+        embeddings_path: str = None,
+        index_path: str = None,
+        model: str = "gpt-4o-mini"
+    ):
+        """
+        Args:
+            embeddings_path: embeddings 파일 경로
+            index_path: FAISS index 파일 경로
+            model: 사용할 모델
+        """
+        self.embeddings_path = embeddings_path
+        self.index_path = index_path
+        self.model = model
+
+        self._lock = threading.Lock()
+        self._orchestrator: Optional["RAGOrchestrator"] = None
+        self._ready = threading.Event()
+        self.error: Optional[str] = None
+        self.warmup_sec: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        """워밍업까지 끝나 트래픽을 받을 수 있는지 여부"""
+        return self._ready.is_set()
+
+    def load(self, api_key: str) -> "RAGOrchestrator":
+        """
+        오케스트레이터를 한 번만 생성하고 워밍업합니다. (스레드 안전)
+        이미 로드되어 있으면 그대로 반환합니다.
+
+        Args:
+            api_key: OpenAI API 키
+
+        Returns:
+            공유 RAGOrchestrator
+        """
+        if self._orchestrator is not None:
+            return self._orchestrator
+
+        with self._lock:
+            if self._orchestrator is not None:
+                return self._orchestrator
+
+            start = time.perf_counter()
+            try:
+                from src.rag.orchestrator import RAGOrchestrator
+
+                orchestrator = RAGOrchestrator(
+                    api_key=api_key,
+                    embeddings_path=self.embeddings_path,
+                    index_path=self.index_path,
+                    model=self.model,
+                )
+                self._warm_up(orchestrator)
+            except Exception as e:
+                self.error = str(e)
+                raise
+
+            self._orchestrator = orchestrator
+            self.error = None
+            self.warmup_sec = time.perf_counter() - start
+            self._ready.set()
+            print(f"✅ RAG 엔진 워밍업 완료 ({self.warmup_sec:.2f}초)")
+            return orchestrator
+
+    def _warm_up(self, orchestrator: "RAGOrchestrator") -> None:
+        """첫 요청이 느리지 않도록 인덱스를 한 번씩 조회해 둡니다. (API 호출 없음)"""
+        _warm_up_db(orchestrator.retriever_agent.db)
+
+    def get_orchestrator(self, api_key: str) -> "RAGOrchestrator":
+        """공유 오케스트레이터 반환 (아직 로드 전이면 여기서 로드)"""
+        return self.load(api_key)
+
+    async def get_orchestrator_async(self, api_key: str) -> "RAGOrchestrator":
+        """get_orchestrator의 비동기 버전 (로드가 필요하면 이벤트 루프 밖에서 실행)"""
+        if self._orchestrator is not None:
+            return self._orchestrator
+        return await asyncio.to_thread(self.load, api_key)
+
+    def status(self) -> Dict[str, Any]:
+        """readiness 프로브용 상태 정보"""
+        return {
+            "ready": self.ready,
+            "warmup_sec": round(self.warmup_sec, 3) if self.warmup_sec is not None else None,
+            "error": self.error,
+        }
+
+
+def _warm_up_db(db: "DongyoVectorDB") -> None:
+    """Vector DB 검색 경로를 한 번씩 실행 (API 호출 없음)"""
+    import numpy as np
+
+    # FAISS 검색 경로 워밍업 (더미 벡터)
+    dummy = np.zeros(db.index.d, dtype=np.float32)
+    db.search_similar(dummy, top_k=1)
+
+    # 키워드 검색 경로 워밍업
+    db.search_by_keywords(["동요"], top_k=1)
+
+
+# 프로세스 전역 엔진 (uvicorn 워커마다 하나)
+engine = RAGEngine()
+
+
+def preload_for_fork() -> "DongyoVectorDB":
+    """
+    워커를 fork하기 전에 마스터 프로세스에서 호출합니다. (gunicorn preload_app)
+    Vector DB(FAISS 인덱스, 메타데이터, 키워드 인덱스)를 미리 로드하고 gc.freeze()로
+    이후 GC가 이 객체들을 건드리지 않게 해 워커들이 copy-on-write 페이지를 그대로 공유하게 합니다.
+    OpenAI 클라이언트(커넥션 풀)는 fork 후 각 워커에서 만들어야 하므로 여기서 만들지 않습니다.
+
+    Returns:
+        미리 로드한 공유 DongyoVectorDB
+    """
+    from src.rag.vector_db import get_shared_db
+
+    db = get_shared_db(engine.embeddings_path, engine.index_path)
+    _warm_up_db(db)
+    gc.collect()
+    gc.freeze()
+    print(f"✅ fork 전 Vector DB 프리로드 완료 (gc.freeze: {gc.get_freeze_count()}개 객체)")
+    return db
@@ -0,0 +1,82 @@
+"""
+하이브리드 검색 점수 결합 (벡터 + BM25 키워드)
+동요 번호로 인덱싱한 밀집(dense) 배열에 점수를 모으고, 가중 합으로 결합한 뒤
+argpartition으로 상위 k개만 고른다. 결과 dict는 최종 선택된 동요에만 만든다.
+카테고리 비트맵이 있으면 벡터 검색(FAISS ID selector)과 키워드 점수 모두 그 동요로만 제한된다.
+
+    scores = HybridScores(len(db.songs), bitmap)
+    scores.add_vector(ids, distances)       # FAISS 결과 (같은 동요는 가장 가까운 거리)
+    scores.add_keyword(bm25_scores)         # 동요 수 길이의 BM25 점수 (같은 동요는 최고점)
+    top_ids = scores.top(10)                # 결합 점수 내림차순
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.rag.bm25 import top_k_ids
+from src.rag.term_bitmaps import to_mask
+
+# 결합 가중치 (벡터 유사도 70%, 키워드 30%)
+VECTOR_WEIGHT = 0.7
+KEYWORD_WEIGHT = 0.3
+
+
+class HybridScores:
+    """동요별 벡터 거리 / 키워드 점수 (검색 쿼리 여러 개의 후보를 합칠 수 있음)"""
+
+    def __init__(self, size: int, bitmap: Optional[np.ndarray] = None):
+        """
+        Args:
+            size: 동요 수 (배열 길이)
+            bitmap: 허용할 동요 비트맵 (카테고리 필터, None이면 전체)
+        """
+        self.distance = np.full(size, np.inf, dtype=np.float32)
+        self.keyword = np.zeros(size, dtype=np.float32)
+        self.bitmap = bitmap
+        self._mask = None if bitmap is None else to_mask(bitmap, size)
+        # 벡터 검색에 쓴 (임베딩, k): 카테고리가 나중에 정해지면 필터를 걸어 다시 검색
+        self.queries: List[Tuple[np.ndarray, int]] = []
+
+    def __len__(self) -> int:
+        """후보 동요 수 (벡터 또는 키워드로 걸린 동요)"""
+        return int(np.count_nonzero(np.isfinite(self.distance) | (self.keyword > 0)))
+
+    def filtered_by(self, bitmap: Optional[np.ndarray]) -> bool:
+        """이미 같은 카테고리 비트맵으로 제한된 후보인지"""
+        if bitmap is None or self.bitmap is None:
+            return bitmap is None and self.bitmap is None
+        return np.array_equal(bitmap, self.bitmap)
+
+    def add_vector(self, ids: np.ndarray, distances: np.ndarray) -> "HybridScores":
+        """FAISS 검색 결과 추가 (같은 비트맵으로 필터링한 결과, 같은 동요는 더 가까운 거리)"""
+        np.minimum.at(self.distance, ids, distances.astype(np.float32, copy=False))
+        return self
+
+    def add_keyword(self, scores: np.ndarray) -> "HybridScores":
+        """동요 수 길이의 키워드 점수 추가 (같은 동요는 더 높은 점수, 비트맵 밖의 동요는 제외)"""
+        if self._mask is not None:
+            scores = np.where(self._mask, scores, 0)
+        np.maximum(self.keyword, scores, out=self.keyword)
+        return self
+
+    def fused(self) -> np.ndarray:
+        """
+        결합 점수 (거리가 작을수록, 키워드 점수가 클수록 높음, 후보가 아니면 0)
+
+        Returns:
+            float32 배열 (동요 수)
+        """
+        # 1 / (inf + 1) = 0 이므로 벡터 결과가 없는 동요는 키워드 점수만 반영
+        return VECTOR_WEIGHT / (self.distance + 1) + KEYWORD_WEIGHT * self.keyword / (self.keyword + 1)
+
+    def top(self, k: int, fused: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        결합 점수 상위 k개 동요 번호 (내림차순, 같으면 동요 번호 순, 후보가 아닌 동요 제외)
+
+        Args:
+            k: 개수
+            fused: 미리 계산한 결합 점수 (없으면 계산)
+        """
+        if fused is None:
+            fused = self.fused()
+        return top_k_ids(fused, k)
@@ -0,0 +1,161 @@
+"""
+동요 코퍼스 어휘 사전 (로컬 질의 해석용)
+카테고리(감정/계절/동물/행동)별 씨앗 단어 중 실제 동요에 나오는 것만 남기고,
+코퍼스 토큰의 idf와 함께 FAISS 인덱스 옆 JSON 파일(<index>.lexicon.json)에 저장한다.
+
+    python -m src.rag.lexicon                       # 기본 data/ 경로의 동요로 생성
+    python -m src.rag.lexicon --index data/dongyo_faiss.index --embeddings data/dongyo_embeddings.pkl
+
+사전 파일이 없거나, 사전을 만든 코퍼스(동요 수 + 텍스트 sha256)가 지금 동요와 다르면
+LocalQueryAgent가 로드한 Vector DB의 동요 텍스트로 다시 만든다.
+"""
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Union
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.rag.string_column import StringColumn
+from src.rag.tokenizer import document_frequencies
+
+LEXICON_VERSION = 2
+
+# 카테고리별 씨앗 단어 (어간 위주: "뛰어요", "뛰는"처럼 활용된 형태도 부분 문자열로 매칭,
+# "소", "말"처럼 다른 단어 안에 흔히 들어가는 한 글자 단어는 제외)
+SEED_TERMS: Dict[str, Sequence[str]] = {
+    "감정": (
+        "기쁘", "기뻐", "행복", "즐거", "신나", "신난", "재미", "웃음", "웃어", "사랑", "고마", "감사",
+        "슬프", "슬퍼", "눈물", "울어", "무서", "화나", "외로", "그리워", "보고싶", "좋아", "반가", "씩씩",
+        "용감", "부끄", "궁금", "설레", "편안", "포근",
+    ),
+    "계절": (
+        "봄", "여름", "가을", "겨울", "눈사람", "눈송이", "꽃", "새싹", "단풍", "낙엽", "바다", "비가",
+        "장마", "햇볕", "햇님", "해님", "바람", "추워", "더워", "크리스마스", "설날", "추석", "방학",
+    ),
+    "동물": (
+        "토끼", "곰", "강아지", "고양이", "병아리", "닭", "오리", "돼지", "염소", "젖소", "꿀벌",
+        "호랑이", "사자", "코끼리", "기린", "원숭이", "여우", "늑대", "다람쥐", "거북", "개구리", "올챙이",
+        "나비", "개미", "잠자리", "매미", "참새", "까치", "비둘기", "부엉이", "펭귄", "물고기",
+        "고래", "상어", "악어", "뱀", "달팽이", "송아지", "망아지", "얼룩말", "하마", "캥거루", "공룡",
+    ),
+    "행동": (
+        "뛰어", "뛰는", "달려", "달리", "걸어", "걷는", "깡총", "깡충", "춤", "노래", "놀이", "놀자",
+        "먹어", "먹자", "마셔", "씻어", "씻자", "닦아", "양치", "잠자", "자장", "일어나", "인사", "만들",
+        "그려", "그리기", "세어", "세자", "숫자", "읽어", "배워", "정리", "청소", "도와", "나눠", "심어",
+        "날아", "헤엄", "수영", "박수", "흔들", "돌아", "올라", "내려", "기다", "숨어", "찾아",
+    ),
+}
+
+
+def default_lexicon_path(index_path: Union[str, Path]) -> Path:
+    """FAISS 인덱스 옆 사전 파일 경로 (예: data/dongyo_faiss.lexicon.json)"""
+    return Path(index_path).with_suffix(".lexicon.json")
+
+
+def build_lexicon(song_texts: Sequence[str]) -> Dict[str, Any]:
+    """
+    동요 텍스트로 어휘 사전을 만듭니다.
+
+    Args:
+        song_texts: 동요별 검색 텍스트 (제목 + 가사)
+
+    Returns:
+        {"version", "songs", "corpus": 코퍼스 지문, "idf": {토큰: idf}, "categories": {카테고리: {단어: 등장 동요 수}}}
+    """
+    texts = [t.lower() for t in song_texts]
+    n = len(texts)
+    df = document_frequencies(texts)
+    # BM25 방식 idf (코퍼스에 드문 토큰일수록 큼)
+    idf = {token: round(math.log(1 + (n - d + 0.5) / (d + 0.5)), 4) for token, d in df.items()}
+
+    categories: Dict[str, Dict[str, int]] = {}
+    for category, seeds in SEED_TERMS.items():
+        found = {}
+        for term in seeds:
+            count = sum(1 for text in texts if term in text)
+            if count:
+                found[term] = count
+        categories[category] = found
+    return {
+        "version": LEXICON_VERSION,
+        "songs": n,
+        "corpus": corpus_fingerprint(song_texts),
+        "idf": idf,
+        "categories": categories,
+    }
+
+
+def corpus_fingerprint(song_texts: Sequence[str]) -> Dict[str, Any]:
+    """
+    사전을 만든 동요 코퍼스의 지문 (동요 수 + 텍스트 sha256)
+
+    Args:
+        song_texts: 동요별 검색 텍스트 (StringColumn이면 디코딩 없이 바이트로 계산)
+    """
+    column = song_texts if isinstance(song_texts, StringColumn) else StringColumn.from_strings(list(song_texts))
+    return {"songs": len(column), "sha256": column.sha256()}
+
+
+def stale_reason(lexicon: Dict[str, Any], song_texts: Sequence[str]) -> Optional[str]:
+    """
+    사전을 다시 만들어야 하는 이유 (지금 동요 코퍼스로 만든 사전이면 None)
+
+    Args:
+        lexicon: load_lexicon 결과
+        song_texts: 지금 로드한 동요별 검색 텍스트
+    """
+    corpus = lexicon.get("corpus") or {}
+    current = corpus_fingerprint(song_texts)
+    if corpus.get("songs") != current["songs"]:
+        return f"동요 수가 다릅니다: {current['songs']} (사전: {corpus.get('songs')})"
+    if corpus.get("sha256") != current["sha256"]:
+        return "동요 텍스트(sha256)가 사전을 만든 코퍼스와 다릅니다."
+    return None
+
+
+def save_lexicon(lexicon: Dict[str, Any], path: Union[str, Path]) -> Path:
+    path = Path(path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(lexicon, f, ensure_ascii=False, separators=(",", ":"))
+    return path
+
+
+def load_lexicon(path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    사전 파일을 읽습니다.
+
+    Raises:
+        ValueError: 버전이 맞지 않을 때 (다시 생성 필요)
+    """
+    with open(path, encoding="utf-8") as f:
+        lexicon = json.load(f)
+    if lexicon.get("version") != LEXICON_VERSION:
+        raise ValueError(
+            f"지원하지 않는 어휘 사전 버전입니다: {lexicon.get('version')} (python -m src.rag.lexicon 으로 다시 생성)"
+        )
+    return lexicon
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="동요 코퍼스 어휘 사전 생성 (로컬 질의 해석용)")
+    parser.add_argument("--embeddings", default=None, help="embeddings pickle 또는 song_store 경로")
+    parser.add_argument("--index", default=None, help="FAISS index 경로 (사전은 이 파일 옆에 저장)")
+    args = parser.parse_args()
+
+    from src.rag.vector_db import DongyoVectorDB
+
+    db = DongyoVectorDB(embeddings_path=args.embeddings, index_path=args.index)
+    lexicon = build_lexicon(db.song_texts)
+    path = save_lexicon(lexicon, default_lexicon_path(db.index_path))
+    sizes = ", ".join(f"{k} {len(v)}개" for k, v in lexicon["categories"].items())
+    print(f"✅ 어휘 사전 저장: {path} (동요 {lexicon['songs']}개, 토큰 {len(lexicon['idf'])}개, {sizes})")
+
+
+if __name__ == "__main__":
+    main()
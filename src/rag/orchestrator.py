@@ -2,12 +2,57 @@
 RAG Orchestrator
 Multi-Agent System의 전체 흐름을 조율
 """
-from typing import Dict, Any
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import numpy as np
+from src.rag.agents.local_query_agent import LocalQueryAgent
 from src.rag.agents.query_agent import QueryUnderstandingAgent
 from src.rag.agents.retriever_agent import RetrieverAgent
 from src.rag.agents.reasoner_agent import ReasonerAgent
 from src.rag.agents.generator_agent import GeneratorAgent
 from src.rag.agents.self_rag_agent import SelfRAGAgent
+from src.core.deadline import (
+    DEADLINE_DEFAULT_BUDGET_SEC,
+    Deadline,
+    DeadlineExceeded,
+    current_deadline,
+    deadline_scope,
+    estimate,
+    run_optional_async,
+    run_required_async,
+)
+from src.core.executor import run_cpu_bound
+from src.core.metrics import timed
+from src.core.tracing import current_span
+
+# 질의 해석 방식 기본값: llm (LLM 호출) / local (어휘 사전, LLM 없음) / auto (어휘 사전이 입력을 충분히 덮으면 로컬)
+QUERY_AGENT_MODE = os.getenv("QUERY_AGENT_MODE", "llm")
+# auto 모드에서 로컬 결과를 쓰기 위한 최소 코퍼스 키워드 수 (동요 코퍼스에 나오는 키워드, known_keywords)
+QUERY_AGENT_AUTO_MIN_KNOWN = int(os.getenv("QUERY_AGENT_AUTO_MIN_KNOWN", "2"))
+# auto 모드에서 로컬 결과를 쓰기 위한 최소 카테고리 수 (감정/계절/동물/행동 중 사전에서 찾은 것)
+QUERY_AGENT_AUTO_MIN_CATEGORIES = int(os.getenv("QUERY_AGENT_AUTO_MIN_CATEGORIES", "1"))
+QUERY_MODES = ("llm", "local", "auto")
+# 질의 해석과 동시에 학습 텍스트로 미리 검색 (1이면 검색 단계가 LLM 질의 해석을 기다리지 않음)
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "1") == "1"
+# 미리 검색에 쓸 학습 텍스트 최대 글자 수 (임베딩 입력 길이 제한)
+SPECULATIVE_QUERY_MAX_CHARS = 2000
+
+
+def convert_numpy_types(obj):
+    """재귀적으로 numpy 타입을 Python 기본 타입으로 변환 (JSON 직렬화를 위해)"""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    elif isinstance(obj, np.floating):
+        return float(obj)
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    elif isinstance(obj, dict):
+        return {k: convert_numpy_types(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [convert_numpy_types(item) for item in obj]
+    return obj
 
 
 class RAGOrchestrator:
@@ -29,108 +74,268 @@ class RAGOrchestrator:
         """
         self.query_agent = QueryUnderstandingAgent(api_key, model)
         self.retriever_agent = RetrieverAgent(api_key, embeddings_path, index_path)
+        self.local_query_agent = LocalQueryAgent(self.retriever_agent.db)
         self.reasoner_agent = ReasonerAgent(api_key, model)
         self.generator_agent = GeneratorAgent(api_key, model)
         self.self_rag_agent = SelfRAGAgent(api_key, model)
     
-    def generate_lyrics(
+    async def generate_lyrics_async(
         self,
         study_text: str,
         top_k: int = 5,
-        use_rag: bool = True
+        use_rag: bool = True,
+        query_mode: Optional[str] = None,
+        budget_sec: Optional[float] = None
     ) -> Dict[str, Any]:
         """
-        학습 텍스트로부터 가사 생성 (전체 RAG 파이프라인)
+        학습 텍스트로부터 가사 생성 (전체 RAG 파이프라인, generate_lyrics_stream의 최종 결과)
+        모든 LLM/임베딩 호출은 AsyncOpenAI로, FAISS 검색은 CPU 풀에서 실행하여
+        한 워커가 여러 요청을 동시에 처리할 수 있도록 함
         
         Args:
             study_text: 학습 텍스트
             top_k: 검색할 상위 k개 동요
             use_rag: RAG 사용 여부
+            query_mode: 질의 해석 방식 (llm / local / auto, None이면 QUERY_AGENT_MODE)
+            budget_sec: 시간 예산(초), 부족하면 선택 단계(질의 해석 LLM, 검색, Reasoner, Self-RAG)를
+                건너뛰거나 대체값 사용 (None이면 적용 중인 deadline 또는 DEADLINE_DEFAULT_BUDGET_SEC)
             
         Returns:
             {
                 "lyrics": 생성된 가사,
                 "query_result": Query Agent 결과,
                 "retrieved_docs": 검색된 문서들,
-                "reasoner_result": Reasoner Agent 결과
+                "reasoner_result": Reasoner Agent 결과,
+                "self_rag_result": Self-RAG Agent 결과,
+                "stages": 단계별 실행 기록 (ran / skipped / timed_out / failed)
             }
         """
-        if not use_rag:
-            # RAG 없이 직접 생성
-            lyrics = self.generator_agent.generate_lyrics(
-                study_text,
-                {"style_guide": "", "recommendations": ""},
-                []
-            )
-            return {
-                "lyrics": lyrics,
-                "query_result": None,
-                "retrieved_docs": [],
-                "reasoner_result": None
-            }
-        
-        # 1. Query Understanding Agent
-        query_result = self.query_agent.process(study_text)
-        
-        # 2. Retriever Agent (하이브리드 검색 + 메타데이터 필터링)
-        retrieved_docs = self.retriever_agent.retrieve(
-            query_result["search_query"],
-            top_k=top_k,
-            categories=query_result.get("categories"),  # 카테고리 필터링
-            use_hybrid=True  # 하이브리드 검색 활성화
-        )
-        
-        # numpy 타입을 Python 기본 타입으로 변환 (JSON 직렬화를 위해)
-        def convert_numpy_types(obj):
-            """재귀적으로 numpy 타입을 Python 기본 타입으로 변환"""
-            import numpy as np
-            if isinstance(obj, np.integer):
-                return int(obj)
-            elif isinstance(obj, np.floating):
-                return float(obj)
-            elif isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif isinstance(obj, dict):
-                return {k: convert_numpy_types(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_numpy_types(item) for item in obj]
-            return obj
-        
-        # retrieved_docs의 numpy 타입 변환
-        retrieved_docs = convert_numpy_types(retrieved_docs)
-        
-        # 3. Reasoner Agent
-        reasoner_result = self.reasoner_agent.reason(
-            query_result,
-            retrieved_docs,
-            task_type="lyrics_generation"
-        )
-        
-        # reasoner_result의 numpy 타입 변환
-        reasoner_result = convert_numpy_types(reasoner_result)
-        
-        # 4. Generator Agent
-        lyrics = self.generator_agent.generate_lyrics(
-            study_text,
-            reasoner_result,
-            retrieved_docs
-        )
+        result: Dict[str, Any] = {}
+        async for event, data in self.generate_lyrics_stream(
+            study_text, top_k=top_k, use_rag=use_rag, stream_tokens=False, query_mode=query_mode,
+            budget_sec=budget_sec
+        ):
+            if event == "final":
+                result = data
+        return result
+    
+    @timed("rag_pipeline")
+    async def generate_lyrics_stream(
+        self,
+        study_text: str,
+        top_k: int = 5,
+        use_rag: bool = True,
+        stream_tokens: bool = True,
+        query_mode: Optional[str] = None,
+        budget_sec: Optional[float] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        RAG 파이프라인을 실행하면서 단계가 끝날 때마다 (이벤트 이름, 데이터)를 내보냄
         
-        # 5. Self-RAG Agent: 생성된 가사 검증 및 개선
-        self_rag_result = self.self_rag_agent.verify_and_improve(
-            str(lyrics) if lyrics else "",
-            study_text,
-            retrieved_docs,
-            reasoner_result
-        )
+        이벤트 순서:
+            "query"     - Query Agent 결과
+            "retrieved" - 검색된 동요들
+            "reasoned"  - Reasoner Agent 결과
+            "token"     - 초안 가사 토큰 (stream_tokens=True일 때, {"text": ...})
+            "draft"     - 초안 가사 전체
+            "final"     - Self-RAG까지 끝난 최종 결과 (generate_lyrics_async와 동일한 형식)
         
-        # 개선된 가사 사용 (개선이 없으면 원본 사용)
-        final_lyrics = self_rag_result.get("improved_lyrics", str(lyrics) if lyrics else "")
+        Args:
+            study_text: 학습 텍스트
+            top_k: 검색할 상위 k개 동요
+            use_rag: RAG 사용 여부
+            stream_tokens: 초안 가사를 토큰 단위로 스트리밍할지 여부
+            query_mode: 질의 해석 방식 (llm / local / auto, None이면 QUERY_AGENT_MODE)
+            budget_sec: 시간 예산(초) (generate_lyrics_async 참고)
+        """
+        current_span().set(study_chars=len(study_text), top_k=top_k, use_rag=use_rag, stream_tokens=stream_tokens)
+        deadline = self._deadline(budget_sec)
+        with deadline_scope(deadline):
+            if not use_rag:
+                # RAG 없이 직접 생성
+                lyrics = ""
+                async for event, data in self._generate_draft(
+                    study_text, {"style_guide": "", "recommendations": ""}, [], stream_tokens, deadline
+                ):
+                    if event == "draft":
+                        lyrics = data["lyrics"]
+                    yield event, data
+                yield "final", {
+                    "lyrics": lyrics,
+                    "query_result": None,
+                    "retrieved_docs": [],
+                    "reasoner_result": None,
+                    "stages": self._report(deadline)
+                }
+                return
+            
+            # 선택 단계는 생성(필수) 단계 몫을 남겨 두고 실행
+            reserve = estimate("generator")
+            local_result, use_local = self._local_query(study_text, query_mode)
+            if SPECULATIVE_RETRIEVAL:
+                # 2. 학습 텍스트와 로컬 검색 쿼리로 미리 검색 (배치 임베딩 한 번, 질의 해석과 동시에)
+                # 검색 태스크 자체를 단계로 감싸 시작부터 끝까지의 소요 시간을 "retriever"로 기록
+                # (질의 해석이 끝난 뒤 남은 대기 시간만 기록하면 예상 시간이 0에 가깝게 줄어듦)
+                queries = self._speculative_queries(study_text, local_result)
+                speculation = asyncio.ensure_future(run_optional_async(
+                    "retriever",
+                    lambda: self.retriever_agent.retrieve_candidates_async(queries, top_k=top_k, use_hybrid=True),
+                    None,
+                    reserve
+                ))
+                try:
+                    # 1. Query Understanding Agent (시간이 부족하면 로컬 해석 결과로 대체)
+                    query_result = local_result if use_local else await run_optional_async(
+                        "query_agent", lambda: self.query_agent.process_async(study_text), local_result, reserve
+                    )
+                    yield "query", convert_numpy_types(query_result)
+                    candidates = await speculation
+                finally:
+                    # 질의 해석 실패 / 스트림 중단 시 미리 검색도 취소 (끝났으면 영향 없음)
+                    speculation.cancel()
+                # 질의 해석 결과(검색 쿼리 키워드, 카테고리)를 후보에 반영
+                # (BM25 점수, 카테고리 비트맵 재검색은 CPU 바운드라 CPU 풀에서 실행)
+                retrieved_docs = await run_cpu_bound(
+                    self.retriever_agent.reconcile,
+                    candidates,
+                    query_result["search_query"],
+                    top_k=top_k,
+                    categories=query_result.get("categories"),
+                    use_hybrid=True
+                )
+            else:
+                # 1. Query Understanding Agent (시간이 부족하면 로컬 해석 결과로 대체)
+                query_result = local_result if use_local else await run_optional_async(
+                    "query_agent", lambda: self.query_agent.process_async(study_text), local_result, reserve
+                )
+                yield "query", convert_numpy_types(query_result)
+                
+                # 2. Retriever Agent (하이브리드 검색 + 메타데이터 필터링)
+                retrieved_docs = await run_optional_async("retriever", lambda: self.retriever_agent.retrieve_async(
+                    query_result["search_query"],
+                    top_k=top_k,
+                    categories=query_result.get("categories"),
+                    use_hybrid=True
+                ), [], reserve)
+            retrieved_docs = convert_numpy_types(retrieved_docs)
+            current_span().set(docs=len(retrieved_docs))
+            yield "retrieved", {"retrieved_docs": retrieved_docs}
+            
+            # 3. Reasoner Agent (시간이 부족하면 빈 스타일 가이드로 대체)
+            reasoner_result = await run_optional_async("reasoner", lambda: self.reasoner_agent.reason_async(
+                query_result,
+                retrieved_docs,
+                task_type="lyrics_generation"
+            ), self.reasoner_agent.empty_result(query_result), reserve)
+            reasoner_result = convert_numpy_types(reasoner_result)
+            yield "reasoned", {"reasoner_result": reasoner_result}
+            
+            # 4. Generator Agent (필수)
+            lyrics = None
+            async for event, data in self._generate_draft(
+                study_text, reasoner_result, retrieved_docs, stream_tokens, deadline
+            ):
+                if event == "draft":
+                    lyrics = data["lyrics"]
+                yield event, data
+            
+            # 5. Self-RAG Agent: 생성된 가사 검증 및 개선 (시간이 부족하면 초안 그대로 사용)
+            draft = str(lyrics) if lyrics else ""
+            self_rag_result = await run_optional_async("self_rag", lambda: self.self_rag_agent.verify_and_improve_async(
+                draft,
+                study_text,
+                retrieved_docs,
+                reasoner_result
+            ), self._unverified(draft))
+            
+            # 개선된 가사 사용 (개선이 없으면 원본 사용)
+            final_lyrics = self_rag_result.get("improved_lyrics", draft)
+            
+            yield "final", {
+                "lyrics": final_lyrics,
+                "query_result": convert_numpy_types(query_result),
+                "retrieved_docs": retrieved_docs,
+                "reasoner_result": reasoner_result,
+                "self_rag_result": convert_numpy_types(self_rag_result),
+                "stages": self._report(deadline)
+            }
+    
+    @staticmethod
+    def _deadline(budget_sec: Optional[float]) -> Deadline:
+        """이번 실행의 deadline: budget_sec > 이미 적용 중인 deadline(엔드포인트 등) > DEADLINE_DEFAULT_BUDGET_SEC"""
+        if budget_sec is None:
+            current = current_deadline()
+            if current is not None:
+                return current
+            budget_sec = DEADLINE_DEFAULT_BUDGET_SEC
+        return Deadline(budget_sec)
+    
+    @staticmethod
+    def _report(deadline: Deadline) -> Dict[str, Any]:
+        """실행 기록을 남기고 반환 (트레이스 span에 degraded 표시)"""
+        report = deadline.report()
+        current_span().set(budget_sec=report["budget_sec"], degraded=report["degraded"])
+        return report
+    
+    @staticmethod
+    def _unverified(lyrics: str) -> Dict[str, Any]:
+        """Self-RAG를 건너뛰었을 때의 결과 (초안 그대로)"""
+        return {"improved_lyrics": lyrics, "verification_result": {}, "improvements": [], "raw_result": ""}
+    
+    def _local_query(self, study_text: str, query_mode: Optional[str]) -> Tuple[Dict[str, Any], bool]:
+        """
+        로컬 질의 해석 결과와, 그것을 그대로 쓸지 여부 (False면 LLM Query Agent 결과를 사용)
+        로컬 결과의 검색 쿼리는 LLM 모드에서도 미리 검색에 사용
         
-        return {
-            "lyrics": final_lyrics,
-            "query_result": convert_numpy_types(query_result),
-            "retrieved_docs": retrieved_docs,
-            "reasoner_result": reasoner_result,
-            "self_rag_result": convert_numpy_types(self_rag_result)
-        }
\ No newline at end of file
+        Args:
+            study_text: 학습 텍스트
+            query_mode: llm / local / auto (None이면 QUERY_AGENT_MODE)
+        """
+        mode = query_mode or QUERY_AGENT_MODE
+        if mode not in QUERY_MODES:
+            raise ValueError(f"query_mode는 {', '.join(QUERY_MODES)} 중 하나여야 합니다: {mode}")
+        result = self.local_query_agent.process(study_text)
+        # 사전이 입력을 얼마나 덮는지: 코퍼스 키워드 수와 채워진 카테고리 수 (주제는 키워드에서 고르므로 제외)
+        known = len(result["known_keywords"])
+        filled = sum(1 for name, value in result["categories"].items() if value and name != "주제")
+        attrs = {"keywords": len(result["keywords"]), "known_keywords": known, "categories": filled}
+        if mode == "llm":
+            current_span().set(query_mode="llm")
+            return result, False
+        if mode == "auto" and (known < QUERY_AGENT_AUTO_MIN_KNOWN or filled < QUERY_AGENT_AUTO_MIN_CATEGORIES):
+            current_span().set(query_mode="auto:llm", **attrs)
+            return result, False
+        current_span().set(query_mode="auto:local" if mode == "auto" else "local", **attrs)
+        return result, True
+    
+    @staticmethod
+    def _speculative_queries(study_text: str, local_result: Dict[str, Any]) -> List[str]:
+        """미리 검색할 쿼리들: 로컬 검색 쿼리 + 학습 텍스트 앞부분 (중복, 빈 값 제외)"""
+        queries = [local_result["search_query"], study_text.strip()[:SPECULATIVE_QUERY_MAX_CHARS]]
+        return list(dict.fromkeys(q for q in queries if q))
+    
+    async def _generate_draft(
+        self,
+        study_text: str,
+        reasoner_result: Dict[str, Any],
+        retrieved_docs: List[Dict[str, Any]],
+        stream_tokens: bool,
+        deadline: Deadline
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """초안 가사 생성 (필수 단계): 토큰 스트리밍 여부에 따라 "token" 이벤트들과 "draft" 이벤트를 내보냄"""
+        if stream_tokens:
+            deadline.check("generator")
+            started = time.monotonic()
+            async for event, data in self.generator_agent.stream_lyrics_async(
+                study_text, reasoner_result, retrieved_docs
+            ):
+                if deadline.remaining() <= 0:
+                    deadline.record("generator", "timed_out", time.monotonic() - started, reason="budget")
+                    raise DeadlineExceeded("generator", deadline.budget_sec)
+                yield event, data
+            deadline.record("generator", "ran", time.monotonic() - started)
+        else:
+            lyrics = await run_required_async("generator", lambda: self.generator_agent.generate_lyrics_async(
+                study_text, reasoner_result, retrieved_docs
+            ))
+            yield "draft", {"lyrics": lyrics}
@@ -0,0 +1,426 @@
+"""
+mmap 기반 동요 메타데이터 저장소
+pickle 메타데이터(dict 형태 titles / summaries / lyrics, 또는 동요별 dict 리스트)를
+하나의 정규화된 스키마로 바꿔 열(column) 단위 파일로 저장하고, 읽을 때는 mmap으로 열어
+필요한 항목만 디코딩한다. 여러 워커가 같은 파일을 열면 OS 페이지 캐시를 공유하므로
+워커가 늘어도 메모리가 거의 늘지 않고, 로드 시간도 동요 수와 관계없이 일정하다.
+
+스키마 (버전 5, 모든 열의 항목 수 = 동요 수):
+    title              제목 (제목 / title / titles)
+    feature_summary    가사 특징 요약 (가사 특징 요약 / feature_summary / 특징 / summaries)
+    lyrics             가사 (가사 / lyrics)
+    search_text        키워드 검색용 텍스트 (제목 + 특징 + 가사, 소문자)
+    keywords           search_text의 BM25 역인덱스 (src/rag/bm25.py)
+    categories         카테고리 씨앗 단어별 동요 비트맵 (src/rag/term_bitmaps.py)
+(동요 임베딩은 FAISS index에만 있으므로 저장하지 않음)
+
+저장 구조 (디렉터리):
+    manifest.json          형식/버전/항목 수/열 목록/BM25 파라미터/원본 pickle(크기, 수정 시각, sha256)
+    <열>.offsets.npy       int64 오프셋 (항목 수 + 1)
+    <열>.blob              UTF-8 문자열을 이어 붙인 바이트
+    bm25.*                 BM25 단어 목록 / postings / 점수 / 문서 길이
+    category.*             카테고리 단어 목록 / 비트맵
+
+변환:
+    python -m src.rag.song_store data/dongyo_embeddings.pkl
+
+여러 워커가 동시에 시작해도 변환은 한 번만 일어나도록 저장소 옆 <이름>.lock 파일을 잠근다.
+(변환은 배타 잠금, 로드는 공유 잠금, 교체는 이전 디렉터리를 옆으로 옮긴 뒤 새 디렉터리로 바꿈)
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows (개발 환경, 단일 프로세스): 잠금 없이 동작
+    fcntl = None
+
+from src.rag.bm25 import BM25Index
+from src.rag.lexicon import SEED_TERMS
+from src.rag.string_column import StringColumn
+from src.rag.term_bitmaps import TermBitmaps
+
+STORE_FORMAT = "dongyo-song-store"
+STORE_VERSION = 5
+MANIFEST_NAME = "manifest.json"
+
+# 정규화된 문자열 열
+FIELDS = ("title", "feature_summary", "lyrics")
+# 동요별 dict 리스트 형태에서 각 열로 읽을 키 (앞에 있는 키 우선)
+_RECORD_KEYS = {
+    "title": ("제목", "title"),
+    "feature_summary": ("가사 특징 요약", "feature_summary", "특징"),
+    "lyrics": ("가사", "lyrics"),
+}
+# 열(column) dict 형태에서 각 열로 읽을 키
+_COLUMN_KEYS = {
+    "title": ("titles", "title"),
+    "feature_summary": ("summaries", "feature_summary", "feature_summaries"),
+    "lyrics": ("lyrics",),
+}
+
+
+class SongStore:
+    """정규화된 동요 메타데이터 (열마다 번호로 바로 조회)"""
+
+    def __init__(
+        self,
+        columns: Dict[str, StringColumn],
+        keywords: BM25Index,
+        categories: TermBitmaps,
+        mapped: bool,
+    ):
+        """
+        Args:
+            columns: {"title", "feature_summary", "lyrics", "search_text": StringColumn}
+            keywords: search_text의 BM25 인덱스
+            categories: 카테고리 씨앗 단어별 동요 비트맵
+            mapped: 파일 mmap 여부 (False면 힙 메모리)
+        """
+        self.title = columns["title"]
+        self.feature_summary = columns["feature_summary"]
+        self.lyrics = columns["lyrics"]
+        self.search_text = columns["search_text"]
+        self.keywords = keywords
+        self.categories = categories
+        self.mapped = mapped
+
+    def __len__(self) -> int:
+        return len(self.title)
+
+    def record(self, index: int) -> Dict[str, str]:
+        """동요 하나의 {"title", "feature_summary", "lyrics"}"""
+        return {
+            "title": self.title[index],
+            "feature_summary": self.feature_summary[index],
+            "lyrics": self.lyrics[index],
+        }
+
+    def column_bytes(self) -> Dict[str, int]:
+        """열별 크기(바이트) (/debug/memory 용)"""
+        sizes = {name: getattr(self, name).nbytes for name in FIELDS + ("search_text",)}
+        sizes["keyword_index"] = self.keywords.nbytes
+        sizes["category_bitmaps"] = self.categories.nbytes
+        return sizes
+
+
+def search_text(title: str, feature_summary: str, lyrics: str) -> str:
+    """키워드 검색용 텍스트 (소문자)"""
+    return f"{title} {feature_summary} {lyrics}".lower()
+
+
+def _first(mapping: Dict[str, Any], keys: Sequence[str]) -> Any:
+    for key in keys:
+        value = mapping.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+def _text(value: Any) -> str:
+    return str(value) if value else ""
+
+
+def normalize_metadata(metadata: Any) -> Dict[str, List[str]]:
+    """
+    pickle 메타데이터(열 dict 또는 동요별 dict 리스트)를 정규화된 열로 바꿉니다.
+    키 이름 차이(제목/title, 가사 특징 요약/feature_summary/특징, 가사/lyrics)는 여기서 한 번만 처리합니다.
+
+    Args:
+        metadata: pickle에서 읽은 메타데이터
+
+    Returns:
+        {"title", "feature_summary", "lyrics", "search_text": [문자열]}
+
+    Raises:
+        ValueError: 열 길이가 서로 다를 때
+    """
+    if isinstance(metadata, dict):
+        count = len(_first(metadata, _COLUMN_KEYS["title"]) or [])
+        columns: Dict[str, List[str]] = {}
+        for name in FIELDS:
+            values = list(_first(metadata, _COLUMN_KEYS[name]) or [""] * count)
+            if len(values) != count:
+                raise ValueError(f"'{name}' 열의 항목 수({len(values)})가 제목 수({count})와 다릅니다.")
+            columns[name] = [_text(v) for v in values]
+    else:
+        records = [meta if isinstance(meta, dict) else {} for meta in metadata]
+        columns = {name: [_text(_first(meta, _RECORD_KEYS[name])) for meta in records] for name in FIELDS}
+
+    columns["search_text"] = [
+        search_text(title, feature, lyrics)
+        for title, feature, lyrics in zip(columns["title"], columns["feature_summary"], columns["lyrics"])
+    ]
+    return columns
+
+
+def build_song_store(metadata: Any) -> SongStore:
+    """
+    pickle 메타데이터로 메모리에 저장소를 만듭니다. (파일 없이, mmap 저장소와 같은 조회 경로)
+
+    Args:
+        metadata: pickle에서 읽은 메타데이터
+
+    Returns:
+        힙 메모리에 있는 SongStore
+    """
+    values = normalize_metadata(metadata)
+    columns = {name: StringColumn.from_strings(column) for name, column in values.items()}
+    return SongStore(
+        columns,
+        BM25Index.build(values["search_text"]),
+        TermBitmaps.build(values["search_text"], (term for terms in SEED_TERMS.values() for term in terms)),
+        mapped=False,
+    )
+
+
+def default_store_path(embeddings_path: Union[str, Path]) -> Path:
+    """pickle 경로에 대응하는 저장소 디렉터리 (예: dongyo_embeddings.pkl → dongyo_embeddings.store)"""
+    return Path(embeddings_path).with_suffix(".store")
+
+
+def is_song_store(path: Union[str, Path]) -> bool:
+    """저장소 디렉터리인지 확인"""
+    return (Path(path) / MANIFEST_NAME).is_file()
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprint(embeddings_path: Union[str, Path]) -> Dict[str, Any]:
+    """원본 pickle의 크기 / 수정 시각 / sha256 (저장소가 이 pickle에서 만들어졌는지 확인용)"""
+    path = Path(embeddings_path)
+    stat = path.stat()
+    return {"name": path.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": _sha256(path)}
+
+
+def write_song_store(
+    metadata: Any,
+    store_dir: Union[str, Path],
+    source: Optional[Dict[str, Any]] = None
+) -> Path:
+    """
+    메타데이터를 정규화해 저장소 디렉터리로 저장합니다.
+    임시 디렉터리에 쓴 뒤 교체하므로 읽는 중인 프로세스가 깨진 파일을 보지 않습니다.
+
+    Args:
+        metadata: 열 dict({"titles": [...], "lyrics": [...]}) 또는 동요별 dict 리스트
+        store_dir: 저장할 디렉터리
+        source: 원본 pickle 정보 (source_fingerprint, manifest에 기록)
+
+    Returns:
+        저장소 디렉터리 경로
+    """
+    store = build_song_store(metadata)
+
+    store_dir = Path(store_dir)
+    tmp_dir = store_dir.with_name(f"{store_dir.name}.tmp{os.getpid()}")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    columns = list(FIELDS) + ["search_text"]
+    for name in columns:
+        getattr(store, name).save(tmp_dir, name)
+
+    manifest = {
+        "format": STORE_FORMAT,
+        "version": STORE_VERSION,
+        "count": len(store),
+        "columns": columns,
+        "keywords": store.keywords.save(tmp_dir),
+        "categories": store.categories.save(tmp_dir),
+        "source": source,
+    }
+    with open(tmp_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    # 이전 저장소는 지우기 전에 옆으로 옮김 (이미 mmap한 프로세스는 열린 파일을 계속 읽음)
+    old_dir = None
+    if store_dir.exists():
+        old_dir = store_dir.with_name(f"{store_dir.name}.old{os.getpid()}")
+        if old_dir.exists():
+            shutil.rmtree(old_dir)
+        os.replace(store_dir, old_dir)
+    os.replace(tmp_dir, store_dir)
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+    return store_dir
+
+
+@contextmanager
+def store_lock(store_dir: Union[str, Path], shared: bool = False) -> Iterator[None]:
+    """
+    저장소 잠금 (<저장소 이름>.lock, 같은 프로세스 안에서 중첩하지 않음)
+
+    Args:
+        store_dir: 저장소 디렉터리
+        shared: True면 공유 잠금 (로드용, 잠금 파일을 만들 수 없으면 잠금 없이 진행)
+
+    Raises:
+        OSError: 배타 잠금 파일을 만들 수 없을 때 (읽기 전용 디렉터리 등)
+    """
+    store_dir = Path(store_dir)
+    if fcntl is None:
+        yield
+        return
+    try:
+        lock_file = open(store_dir.with_name(f"{store_dir.name}.lock"), "a+")
+    except OSError:
+        if not shared:
+            raise
+        yield
+        return
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_manifest(store_dir: Union[str, Path]) -> Dict[str, Any]:
+    """
+    저장소 manifest만 읽습니다. (열 파일은 열지 않음)
+
+    Raises:
+        ValueError: 저장소 형식이나 버전이 맞지 않을 때 (다시 변환 필요)
+    """
+    store_dir = Path(store_dir)
+    with open(store_dir / MANIFEST_NAME, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != STORE_FORMAT:
+        raise ValueError(f"동요 메타데이터 저장소가 아닙니다: {store_dir}")
+    if manifest.get("version") != STORE_VERSION:
+        raise ValueError(
+            f"지원하지 않는 저장소 버전입니다: {manifest.get('version')} (지원: {STORE_VERSION}). "
+            "python -m src.rag.song_store 로 다시 변환해주세요."
+        )
+    return manifest
+
+
+def stale_reason(store_dir: Union[str, Path], embeddings_path: Union[str, Path]) -> Optional[str]:
+    """
+    저장소를 다시 만들어야 하는 이유 (최신이면 None)
+    형식/버전, 그리고 원본 pickle의 크기와 수정 시각을 비교하고,
+    크기는 같은데 수정 시각만 다르면 sha256으로 내용이 같은지 확인합니다.
+
+    Args:
+        store_dir: 저장소 디렉터리
+        embeddings_path: 원본 pickle 경로
+    """
+    try:
+        manifest = read_manifest(store_dir)
+    except (OSError, ValueError) as e:
+        return str(e)
+    source = manifest.get("source")
+    if not source:
+        return "원본 pickle 정보가 없는 저장소입니다."
+    stat = Path(embeddings_path).stat()
+    if stat.st_size != source.get("size"):
+        return f"원본 pickle 크기가 다릅니다: {stat.st_size} (저장소: {source.get('size')})"
+    if stat.st_mtime_ns != source.get("mtime_ns") and _sha256(Path(embeddings_path)) != source.get("sha256"):
+        return "원본 pickle 내용(sha256)이 저장소와 다릅니다."
+    return None
+
+
+def load_song_store(store_dir: Union[str, Path], use_mmap: bool = True) -> SongStore:
+    """
+    저장소를 엽니다. mmap이면 manifest만 읽고 항목은 조회할 때 디코딩하므로
+    로드 시간과 상주 메모리가 동요 수와 관계없이 일정합니다.
+
+    Args:
+        store_dir: 저장소 디렉터리
+        use_mmap: False면 파일 내용을 전부 메모리로 읽음
+
+    Returns:
+        SongStore
+
+    Raises:
+        ValueError: 저장소 형식이나 버전이 맞지 않을 때 (다시 변환 필요)
+    """
+    store_dir = Path(store_dir)
+    manifest = read_manifest(store_dir)
+    return SongStore(
+        {name: StringColumn.load(store_dir, name, use_mmap) for name in manifest["columns"]},
+        BM25Index.load(store_dir, manifest["keywords"], use_mmap),
+        TermBitmaps.load(store_dir, manifest["categories"], use_mmap),
+        mapped=use_mmap,
+    )
+
+
+def read_pickle(embeddings_path: Union[str, Path]) -> Any:
+    """기존 embeddings pickle 읽기"""
+    with open(embeddings_path, "rb") as f:
+        return pickle.load(f)
+
+
+def convert_pickle(embeddings_path: Union[str, Path], store_dir: Union[str, Path] = None) -> Path:
+    """
+    pickle 메타데이터를 저장소로 변환합니다.
+
+    Args:
+        embeddings_path: embeddings pickle 파일 경로
+        store_dir: 저장할 디렉터리 (없으면 pickle 옆 .store 디렉터리)
+
+    Returns:
+        저장소 디렉터리 경로
+    """
+    return write_song_store(
+        read_pickle(embeddings_path),
+        store_dir or default_store_path(embeddings_path),
+        source=source_fingerprint(embeddings_path),
+    )
+
+
+def refresh_song_store(embeddings_path: Union[str, Path], store_dir: Union[str, Path] = None) -> Optional[str]:
+    """
+    저장소가 없거나 오래됐으면 배타 잠금을 잡고 pickle에서 다시 변환합니다.
+    잠금을 기다리는 동안 다른 프로세스가 이미 변환했으면 다시 확인해 건너뜁니다.
+
+    Args:
+        embeddings_path: embeddings pickle 파일 경로
+        store_dir: 저장소 디렉터리 (없으면 pickle 옆 .store 디렉터리)
+
+    Returns:
+        다시 만든 이유 (이미 최신이면 None)
+
+    Raises:
+        OSError: 잠금 파일이나 저장소를 쓸 수 없을 때
+    """
+    store_dir = Path(store_dir or default_store_path(embeddings_path))
+    with store_lock(store_dir):
+        reason = stale_reason(store_dir, embeddings_path) if is_song_store(store_dir) else "저장소가 없습니다."
+        if reason is not None:
+            convert_pickle(embeddings_path, store_dir)
+        return reason
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="동요 메타데이터 pickle을 mmap 저장소로 변환")
+    parser.add_argument("embeddings_path", help="embeddings pickle 파일 경로")
+    parser.add_argument("--out", default=None, help="저장소 디렉터리 (기본: <pickle>.store)")
+    args = parser.parse_args()
+
+    store_dir = Path(args.out or default_store_path(args.embeddings_path))
+    with store_lock(store_dir):
+        convert_pickle(args.embeddings_path, store_dir)
+        store = load_song_store(store_dir)
+    print(f"✅ 저장소 변환 완료: {store_dir} ({len(store)}개 동요, 키워드 {len(store.keywords)}개)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+문자열 열(column) 저장 형식
+UTF-8 바이트를 이어 붙인 blob + int64 오프셋 배열로 문자열 목록을 저장하고,
+mmap으로 열어 인덱싱할 때 해당 항목만 디코딩한다.
+동요 메타데이터 저장소(song_store)와 BM25 인덱스의 단어 목록(bm25)이 같이 사용한다.
+"""
+import hashlib
+import mmap
+from pathlib import Path
+from typing import Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+
+class StringColumn:
+    """mmap된 문자열 열 (리스트처럼 인덱싱하면 해당 항목만 디코딩)"""
+
+    def __init__(self, offsets: np.ndarray, blob: Union[mmap.mmap, bytes]):
+        """
+        Args:
+            offsets: 각 항목의 시작 위치 (마지막 값은 전체 길이)
+            blob: UTF-8 바이트 (mmap 또는 bytes)
+        """
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        """오프셋 + UTF-8 바이트 크기 (mmap이면 힙이 아닌 페이지 캐시)"""
+        return int(self._offsets.nbytes) + len(self._blob)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("StringColumn index out of range")
+        start = int(self._offsets[index])
+        end = int(self._offsets[index + 1])
+        return self._blob[start:end].decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def sha256(self) -> str:
+        """오프셋 + UTF-8 바이트의 sha256 (디코딩 없이, 같은 문자열 목록이면 같은 값)"""
+        digest = hashlib.sha256(np.ascontiguousarray(self._offsets, dtype=np.int64).tobytes())
+        digest.update(memoryview(self._blob)[: int(self._offsets[-1])])
+        return digest.hexdigest()
+
+    @classmethod
+    def from_strings(cls, values: Sequence[str]) -> "StringColumn":
+        """문자열 목록으로 메모리에 열을 만듦"""
+        return cls(*encode_strings(values))
+
+    def save(self, directory: Union[str, Path], name: str) -> None:
+        """<name>.offsets.npy / <name>.blob 으로 저장"""
+        directory = Path(directory)
+        np.save(directory / f"{name}.offsets.npy", np.asarray(self._offsets))
+        with open(directory / f"{name}.blob", "wb") as f:
+            f.write(self._blob)
+
+    @classmethod
+    def load(cls, directory: Union[str, Path], name: str, use_mmap: bool = True) -> "StringColumn":
+        """
+        save로 저장한 열을 엽니다.
+
+        Args:
+            directory: 저장 디렉터리
+            name: 열 이름
+            use_mmap: False면 파일 내용을 전부 메모리로 읽음
+        """
+        directory = Path(directory)
+        offsets = np.load(directory / f"{name}.offsets.npy", mmap_mode="r" if use_mmap else None)
+        blob_path = directory / f"{name}.blob"
+        return cls(offsets, _mmap_blob(blob_path) if use_mmap else blob_path.read_bytes())
+
+
+def encode_strings(values: Sequence[str]) -> Tuple[np.ndarray, bytes]:
+    """문자열 목록 → (int64 오프셋, UTF-8 blob)"""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def _mmap_blob(path: Path) -> Union[mmap.mmap, bytes]:
+    # 길이 0인 파일은 mmap할 수 없음
+    if path.stat().st_size == 0:
+        return b""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
@@ -0,0 +1,104 @@
+"""
+단어별 동요 비트맵 (카테고리 사전 필터용)
+카테고리 씨앗 단어(src/rag/lexicon.py SEED_TERMS)마다 그 단어가 검색 텍스트에 들어 있는 동요를
+비트맵(동요 번호 i → 바이트 i >> 3의 비트 i & 7, FAISS IDSelectorBitmap과 같은 순서)으로 미리 만들어 둔다.
+검색할 때는 카테고리 값의 비트맵을 OR로 합쳐 FAISS 검색 안에서 바로 필터링하므로
+후보를 넉넉히 가져온 뒤 문자열을 훑는 후처리가 필요 없다.
+
+    bitmaps = TermBitmaps.build(song_texts, ["토끼", "봄", ...])
+    bitmaps.get("토끼")     # uint8 비트맵 (없는 단어면 None)
+    to_mask(bitmap, n)      # bool 배열
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+from src.rag.string_column import StringColumn
+
+
+def to_bitmap(mask: np.ndarray) -> np.ndarray:
+    """bool 배열 → uint8 비트맵 (작은 비트부터)"""
+    return np.packbits(mask, bitorder="little")
+
+
+def to_mask(bitmap: np.ndarray, size: int) -> np.ndarray:
+    """uint8 비트맵 → bool 배열 (길이 size)"""
+    return np.unpackbits(bitmap, count=size, bitorder="little").view(bool)
+
+
+def from_ids(ids: Iterable[int], size: int) -> np.ndarray:
+    """동요 번호 목록 → uint8 비트맵"""
+    mask = np.zeros(size, dtype=bool)
+    mask[np.fromiter(ids, dtype=np.int64)] = True
+    return to_bitmap(mask)
+
+
+class TermBitmaps:
+    """단어 → 동요 비트맵 (단어 목록은 정렬, 비트맵은 단어 수 × ceil(동요 수 / 8) 배열)"""
+
+    def __init__(self, terms: StringColumn, bitmaps: np.ndarray, size: int):
+        """
+        Args:
+            terms: 정렬된 단어 목록
+            bitmaps: uint8 (단어 수, ceil(size / 8))
+            size: 동요 수
+        """
+        self.terms = terms
+        self.bitmaps = bitmaps
+        self.size = size
+        # 단어 수가 작으므로(씨앗 단어 수백 개) 위치 사전은 로드 때 만듦
+        self._positions: Dict[str, int] = {term: i for i, term in enumerate(terms)}
+
+    @classmethod
+    def build(cls, texts: Sequence[str], terms: Iterable[str]) -> "TermBitmaps":
+        """
+        단어마다 그 단어가 들어 있는(부분 문자열) 동요의 비트맵을 만듭니다.
+
+        Args:
+            texts: 동요별 검색 텍스트 (소문자)
+            terms: 비트맵을 만들 단어 (소문자로 바꿔 중복 제거)
+        """
+        terms = sorted({t.lower() for t in terms if t and t.strip()})
+        bitmaps = np.zeros((len(terms), (len(texts) + 7) // 8), dtype=np.uint8)
+        for row, term in enumerate(terms):
+            bitmaps[row] = to_bitmap(np.fromiter((term in text for text in texts), dtype=bool, count=len(texts)))
+        return cls(StringColumn.from_strings(terms), bitmaps, len(texts))
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._positions
+
+    @property
+    def nbytes(self) -> int:
+        return self.terms.nbytes + int(self.bitmaps.nbytes)
+
+    def get(self, term: str) -> Optional[np.ndarray]:
+        """단어의 비트맵 (미리 만든 단어가 아니면 None)"""
+        row = self._positions.get(term)
+        return None if row is None else self.bitmaps[row]
+
+    def save(self, directory: Union[str, Path], prefix: str = "category") -> Dict[str, Any]:
+        """
+        <prefix>.terms.* / <prefix>.bitmaps.npy 로 저장합니다.
+
+        Returns:
+            load에 넘길 파라미터 (저장소 manifest에 기록)
+        """
+        directory = Path(directory)
+        self.terms.save(directory, f"{prefix}.terms")
+        np.save(directory / f"{prefix}.bitmaps.npy", np.asarray(self.bitmaps))
+        return {"prefix": prefix, "terms": len(self), "size": self.size}
+
+    @classmethod
+    def load(cls, directory: Union[str, Path], params: Dict[str, Any], use_mmap: bool = True) -> "TermBitmaps":
+        """save로 저장한 비트맵을 엽니다."""
+        directory = Path(directory)
+        prefix = params.get("prefix", "category")
+        return cls(
+            StringColumn.load(directory, f"{prefix}.terms", use_mmap),
+            np.load(directory / f"{prefix}.bitmaps.npy", mmap_mode="r" if use_mmap else None),
+            params["size"],
+        )
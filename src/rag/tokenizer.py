@@ -0,0 +1,100 @@
+"""
+가벼운 한국어/영어 토크나이저 (형태소 분석기 없이 규칙 기반)
+어절을 나누고 흔한 조사/어미를 떼어 검색용 토큰을 만든다.
+로컬 질의 해석(LocalQueryAgent)과 동요 코퍼스 어휘 사전(lexicon)이 같은 규칙을 사용한다.
+"""
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+_WORD_RE = re.compile(r"[가-힣]+|[a-zA-Z]+|[0-9]+")
+
+# 어절 끝에서 떼어낼 조사/어미
+_SUFFIXES = frozenset(
+    {
+        "에서는", "에게서", "으로는", "이라는", "이에요", "입니다", "합니다", "했어요", "해요", "해서",
+        "에서", "에게", "으로", "처럼", "까지", "부터", "보다", "하고", "이랑", "라는", "이나", "에는",
+        "와", "과", "은", "는", "이", "가", "을", "를", "에", "의", "도", "로", "만", "랑", "요",
+    }
+)
+# 긴 것부터 검사 (어절마다 길이별로 집합 조회 한 번씩)
+_SUFFIX_LENGTHS = sorted({len(s) for s in _SUFFIXES}, reverse=True)
+
+# 검색에 도움이 되지 않는 흔한 단어
+STOPWORDS = {
+    "the", "is", "are", "was", "were", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of",
+    "with", "by", "this", "that", "it",
+    "그리고", "그래서", "하지만", "그러나", "또는", "이것", "그것", "저것", "여기", "거기", "우리", "너희",
+    "있다", "있어", "있는", "없는", "하는", "되는", "된다", "한다", "것", "수", "등", "및", "때", "더",
+    "학습", "내용", "다음", "정리", "설명", "공부",
+}
+
+
+def strip_suffix(word: str) -> str:
+    """어절 끝의 조사/어미 하나를 떼어냄 (남는 부분이 2글자 이상일 때만)"""
+    for length in _SUFFIX_LENGTHS:
+        if len(word) - length >= 2 and word[-length:] in _SUFFIXES:
+            return word[:-length]
+    return word
+
+
+def tokenize(text: str, min_len: int = 2) -> List[str]:
+    """
+    텍스트를 검색용 토큰 목록으로 변환합니다. (소문자, 조사 제거, 불용어 제외, 순서 유지)
+
+    Args:
+        text: 입력 텍스트
+        min_len: 최소 토큰 길이
+
+    Returns:
+        토큰 목록 (중복 포함)
+    """
+    tokens = []
+    for word in _WORD_RE.findall((text or "").lower()):
+        if "가" <= word[0] <= "힣":
+            word = strip_suffix(word)
+        if len(word) >= min_len and word not in STOPWORDS:
+            tokens.append(word)
+    return tokens
+
+
+def extract_keywords(
+    text: str,
+    limit: int = 8,
+    idf: Optional[Dict[str, float]] = None,
+) -> List[str]:
+    """
+    텍스트에서 핵심 키워드를 뽑습니다.
+    등장 횟수(문서 앞쪽일수록 가산)와, idf가 주어지면 코퍼스 희소도를 곱해 점수를 매깁니다.
+
+    Args:
+        text: 입력 텍스트
+        limit: 최대 키워드 수
+        idf: {토큰: idf} (코퍼스에 있는 토큰 우대, 없으면 빈도만 사용)
+
+    Returns:
+        점수 순 키워드 목록
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return []
+    counts = Counter(tokens)
+    first_seen: Dict[str, int] = {}
+    for position, token in enumerate(tokens):
+        first_seen.setdefault(token, position)
+
+    total = len(tokens)
+    scores = {}
+    for token, count in counts.items():
+        position_bonus = 1.0 + 0.5 * (1.0 - first_seen[token] / total)
+        weight = idf.get(token, 0.5) if idf is not None else 1.0
+        scores[token] = count * position_bonus * weight
+    return sorted(scores, key=lambda t: (-scores[t], first_seen[t]))[:limit]
+
+
+def document_frequencies(texts: Iterable[str]) -> Counter:
+    """문서별 토큰 등장 여부를 세어 문서 빈도(df) 계산"""
+    df: Counter = Counter()
+    for text in texts:
+        df.update(set(tokenize(text)))
+    return df
@@ -1,31 +1,50 @@
 """
 동요 Vector DB 로더 및 RAG 검색 모듈
 """
-import pickle
+import os
 import sys
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 import faiss
-import re
-from collections import Counter
 
 # 프로젝트 루트를 Python 경로에 추가
 project_root = Path(__file__).parent.parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
+from src.rag.song_store import (
+    StringColumn,
+    build_song_store,
+    default_store_path,
+    is_song_store,
+    load_song_store,
+    read_pickle,
+    refresh_song_store,
+    stale_reason,
+    store_lock,
+)
+from src.rag.bm25 import BM25_MIN_TOKEN_LEN
+from src.rag.term_bitmaps import from_ids
+from src.rag.tokenizer import tokenize
+from src.core.metrics import timed
+
+# mmap 로드 사용 여부 (FAISS 인덱스 + 메타데이터 저장소). 0이면 메모리에 전부 읽음
+VECTOR_DB_MMAP = os.getenv("VECTOR_DB_MMAP", "1") != "0"
+
 
 class DongyoVectorDB:
     """동요 Vector DB 클래스"""
     
-    def __init__(self, embeddings_path: str = None, index_path: str = None):
+    def __init__(self, embeddings_path: str = None, index_path: str = None, use_mmap: Optional[bool] = None):
         """
         Vector DB 초기화
         
         Args:
-            embeddings_path: embeddings pickle 파일 경로
+            embeddings_path: embeddings pickle 파일 경로 (또는 song_store 저장소 디렉터리)
             index_path: FAISS index 파일 경로
+            use_mmap: mmap 로드 사용 여부 (None이면 VECTOR_DB_MMAP 환경 변수)
         """
         if embeddings_path is None:
             embeddings_path = project_root / "data" / "dongyo_embeddings.pkl"
@@ -34,67 +53,159 @@ class DongyoVectorDB:
         
         self.embeddings_path = Path(embeddings_path)
         self.index_path = Path(index_path)
+        self.use_mmap = VECTOR_DB_MMAP if use_mmap is None else use_mmap
         
-        # 데이터 로드
+        # 데이터 로드 (키워드 역인덱스는 저장소에 함께 들어 있음)
         self._load_data()
-        
-        # 키워드 검색을 위한 인덱스 구축 (비용 없음, 로컬 처리)
-        self._build_keyword_index()
     
     def _load_data(self):
         """Vector DB 데이터 로드"""
-        if not self.embeddings_path.exists():
+        store_path = self._store_path()
+        if store_path is None and not self.embeddings_path.exists():
             raise FileNotFoundError(f"Embeddings 파일을 찾을 수 없습니다: {self.embeddings_path}")
         if not self.index_path.exists():
             raise FileNotFoundError(f"FAISS index 파일을 찾을 수 없습니다: {self.index_path}")
         
-        # 메타데이터 로드 (제목, 가사 특징 요약, 가사)
-        with open(self.embeddings_path, "rb") as f:
-            self.metadata = pickle.load(f)
-        
-        # FAISS index 로드
-        self.index = faiss.read_index(str(self.index_path))
-        
-        # 동요 개수 계산 (딕셔너리 또는 리스트 형태 모두 지원)
-        if isinstance(self.metadata, dict):
-            song_count = len(self.metadata.get("titles", []))
+        # 메타데이터 로드 (제목, 가사 특징 요약, 가사, 키워드 역인덱스)
+        if store_path is not None:
+            # 저장소: mmap이면 항목을 읽을 때만 디코딩, 워커 간 페이지 캐시 공유
+            # (공유 잠금: 다른 워커가 저장소를 교체하는 중에 열지 않음)
+            with store_lock(store_path, shared=True):
+                self.songs = load_song_store(store_path, use_mmap=self.use_mmap)
         else:
-            song_count = len(self.metadata)
+            self.songs = build_song_store(read_pickle(self.embeddings_path))
+        
+        # FAISS index 로드 (메타데이터와 벡터 수가 다르면 검색 결과가 엉뚱한 동요를 가리키므로 중단)
+        self.index, self.index_mode = self._read_index()
+        if int(self.index.ntotal) != len(self.songs):
+            raise ValueError(
+                f"FAISS index 벡터 수({self.index.ntotal})와 동요 메타데이터 수({len(self.songs)})가 다릅니다. "
+                f"index({self.index_path})와 embeddings({self.embeddings_path})를 같은 데이터로 다시 만들어주세요."
+            )
         
-        print(f"✅ Vector DB 로드 완료: {song_count}개 동요")
+        self.metadata_mode = "mmap" if self.songs.mapped else ("store" if store_path is not None else "pickle")
+        print(f"✅ Vector DB 로드 완료: {len(self.songs)}개 동요 (index={self.index_mode}, metadata={self.metadata_mode})")
+    
+    def _store_path(self) -> Optional[Path]:
+        """
+        사용할 메타데이터 저장소 경로. 저장소가 없거나, 버전이 오래됐거나, 원본 pickle이 바뀌었으면
+        pickle에서 다시 변환해 만들고,
+        만들 수 없으면(읽기 전용 디렉터리 등) None을 반환해 pickle을 메모리에서 정규화합니다.
+        """
+        if is_song_store(self.embeddings_path):
+            return self.embeddings_path
+        store_path = default_store_path(self.embeddings_path)
+        if not self.embeddings_path.exists():
+            return store_path if is_song_store(store_path) else None
+        # 최신이면 잠금 없이 바로 사용, 아니면 잠금을 잡고 (다른 워커가 이미 만들지 않았으면) 변환
+        if is_song_store(store_path) and stale_reason(store_path, self.embeddings_path) is None:
+            return store_path
+        try:
+            reason = refresh_song_store(self.embeddings_path, store_path)
+            if reason is not None:
+                print(f"[VectorDB] 메타데이터 저장소 생성: {store_path} ({reason})")
+            return store_path
+        except OSError as e:
+            print(f"[VectorDB] 메타데이터 저장소를 만들지 못해 pickle로 로드합니다: {e}")
+            return None
+    
+    def _read_index(self) -> Tuple[Any, str]:
+        """FAISS 인덱스 로드 (가능하면 읽기 전용 mmap, 실패 시 메모리로 읽음)"""
+        if self.use_mmap:
+            # IO_FLAG_MMAP_IFC: Flat 계열 인덱스의 벡터 데이터를 mmap (구버전 faiss는 IO_FLAG_MMAP)
+            mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+            try:
+                return faiss.read_index(str(self.index_path), mmap_flag | faiss.IO_FLAG_READ_ONLY), "mmap"
+            except RuntimeError as e:
+                print(f"[VectorDB] FAISS mmap 로드 실패, 메모리로 로드합니다: {e}")
+        return faiss.read_index(str(self.index_path)), "memory"
+    
+    @property
+    def song_texts(self) -> StringColumn:
+        """각 동요의 검색 가능한 텍스트 (제목 + 특징 + 가사, 소문자)"""
+        return self.songs.search_text
+    
+    def song(self, index: int, **scores: Any) -> Dict[str, Any]:
+        """검색 결과 항목 (열에서 바로 조회, scores는 index 다음에 들어갈 점수 필드)"""
+        result: Dict[str, Any] = {"index": index}
+        result.update(scores)
+        result.update(self.songs.record(index))
+        return result
+    
+    def memory_usage(self) -> Dict[str, Any]:
+        """
+        주요 구조체의 크기 추정 (/debug/memory 용)
+        mapped=True인 항목은 mmap이라 워커 간에 공유되는 페이지 캐시에 있습니다.
+
+        Returns:
+            {"metadata": {...}, "song_texts": {...}, "keyword_index": {...}, "faiss_index": {...}}
+        """
+        columns = self.songs.column_bytes()
+        mapped = self.songs.mapped
+
+        index_bytes = None
+        if hasattr(self.index, "code_size"):
+            # Flat / PQ 계열: 벡터당 code_size 바이트
+            index_bytes = int(self.index.ntotal) * int(self.index.code_size)
+        return {
+            "metadata": {
+                "items": len(self.songs),
+                "bytes": sum(columns.values()),
+                "mapped": mapped,
+                "columns": columns,
+            },
+            "song_texts": {"items": len(self.song_texts), "bytes": columns["search_text"], "mapped": mapped},
+            "keyword_index": {
+                "keywords": len(self.songs.keywords),
+                "postings": self.songs.keywords.posting_count,
+                "bytes": columns["keyword_index"],
+                "mapped": mapped,
+            },
+            "faiss_index": {
+                "type": type(self.index).__name__,
+                "vectors": int(self.index.ntotal),
+                "dim": int(self.index.d),
+                "bytes": index_bytes,
+                "mapped": self.index_mode == "mmap",
+            },
+        }
     
-    def _build_keyword_index(self):
-        """키워드 검색을 위한 인덱스 구축 (BM25 스타일)"""
-        self.keyword_index = {}  # {keyword: [song_indices]}
-        self.song_texts = []  # 각 동요의 검색 가능한 텍스트
+    @timed("faiss_search")
+    def search_vectors(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 5,
+        bitmap: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        FAISS 유사도 검색 (결과 dict를 만들지 않고 배열로 반환)
         
-        # 메타데이터에서 텍스트 추출
-        if isinstance(self.metadata, dict):
-            titles = self.metadata.get("titles", [])
-            lyrics_list = self.metadata.get("lyrics", [])
-            for i in range(len(titles)):
-                title = titles[i] if i < len(titles) else ""
-                lyrics = lyrics_list[i] if i < len(lyrics_list) else ""
-                text = f"{title} {lyrics}".lower()
-                self.song_texts.append(text)
+        Args:
+            query_embedding: 쿼리 임베딩 벡터
+            top_k: 검색할 상위 k개
+            bitmap: 허용할 동요 비트맵 (category_bitmap 결과, FAISS 안에서 필터링)
+            
+        Returns:
+            (동요 번호 int64, L2 거리 float32) (가까운 순, FAISS가 채운 -1은 제외)
+        """
+        # query_embedding을 2D 배열로 변환 (1, dim), float32로 변환
+        query_embedding = np.asarray(query_embedding, dtype=np.float32).reshape(1, -1)
+        if bitmap is None:
+            distances, indices = self.index.search(query_embedding, top_k)
         else:
-            for i, meta in enumerate(self.metadata):
-                title = meta.get("제목") if isinstance(meta, dict) else (meta.get("title") if isinstance(meta, dict) else "")
-                lyrics = meta.get("가사") if isinstance(meta, dict) else (meta.get("lyrics") if isinstance(meta, dict) else "")
-                feature = meta.get("가사 특징 요약") if isinstance(meta, dict) else (meta.get("feature_summary") if isinstance(meta, dict) else "")
-                text = f"{title} {feature} {lyrics}".lower()
-                self.song_texts.append(text)
-        
-        # 키워드 인덱스 구축 (간단한 역인덱스)
-        for i, text in enumerate(self.song_texts):
-            # 한국어와 영어 단어 추출
-            words = re.findall(r'\b\w+\b', text)
-            for word in words:
-                if len(word) >= 2:  # 2글자 이상만 인덱싱
-                    if word not in self.keyword_index:
-                        self.keyword_index[word] = []
-                    if i not in self.keyword_index[word]:
-                        self.keyword_index[word].append(i)
+            # 검색이 끝날 때까지 비트맵 배열을 살려 둠 (selector는 포인터만 가짐)
+            bitmap = np.ascontiguousarray(bitmap, dtype=np.uint8)
+            # IDSelectorBitmap의 첫 인자는 비트맵 바이트 수, 모든 벡터 번호가 비트맵 안에 있어야 함
+            if len(bitmap) * 8 < self.index.ntotal:
+                raise ValueError(
+                    f"카테고리 비트맵({len(bitmap)}바이트)이 FAISS 벡터 수({self.index.ntotal})보다 작습니다."
+                )
+            selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+            distances, indices = self.index.search(
+                query_embedding, top_k, params=faiss.SearchParameters(sel=selector)
+            )
+        found = (indices[0] >= 0) & (indices[0] < len(self.songs))
+        return indices[0][found], distances[0][found]
     
     def search_similar(
         self, 
@@ -111,180 +222,120 @@ class DongyoVectorDB:
         Returns:
             유사한 동요 정보 리스트 (제목, 가사 특징 요약, 가사 포함)
         """
-        # query_embedding을 2D 배열로 변환 (1, dim)
-        if query_embedding.ndim == 1:
-            query_embedding = query_embedding.reshape(1, -1)
-        
-        # float32로 변환
-        query_embedding = query_embedding.astype(np.float32)
-        
-        # FAISS 검색
-        distances, indices = self.index.search(query_embedding, top_k)
+        ids, distances = self.search_vectors(query_embedding, top_k)
+        return [self.song(idx, distance=distance) for idx, distance in zip(ids.tolist(), distances.tolist())]
+    
+    @timed("keyword_search")
+    def keyword_scores(self, keywords: List[str]) -> np.ndarray:
+        """
+        모든 동요의 BM25 점수 (동요 번호로 인덱싱, 매칭되지 않으면 0)
         
-        # 결과 구성
-        results = []
-        for i, idx in enumerate(indices[0]):
-            # numpy 타입을 Python 기본 타입으로 변환
-            try:
-                if hasattr(idx, 'item'):
-                    idx_int = int(idx.item())
-                else:
-                    idx_int = int(idx)
-            except (ValueError, TypeError):
-                idx_int = int(idx)
-            
-            # metadata가 딕셔너리인지 리스트인지 확인
-            if isinstance(self.metadata, dict):
-                # 딕셔너리 형태인 경우
-                if idx_int < len(self.metadata.get("titles", [])):
-                    titles = self.metadata.get("titles", [])
-                    lyrics_list = self.metadata.get("lyrics", [])
-                    title = titles[idx_int] if idx_int < len(titles) else ""
-                    lyrics = lyrics_list[idx_int] if idx_int < len(lyrics_list) else ""
-                    feature_summary = ""
-                else:
-                    continue
-            else:
-                # 리스트 형태인 경우
-                if idx_int < len(self.metadata):
-                    meta = self.metadata[idx_int]
-                    # 다양한 키 이름 지원 (제목, 가사 특징 요약, 가사)
-                    title = meta.get("제목") if isinstance(meta, dict) else (meta.get("title") if isinstance(meta, dict) else "")
-                    feature_summary = meta.get("가사 특징 요약") if isinstance(meta, dict) else (meta.get("feature_summary") if isinstance(meta, dict) else (meta.get("특징") if isinstance(meta, dict) else ""))
-                    lyrics = meta.get("가사") if isinstance(meta, dict) else (meta.get("lyrics") if isinstance(meta, dict) else "")
-                else:
-                    continue
-            
-            # numpy 타입을 Python 기본 타입으로 변환
-            try:
-                if hasattr(distances[0][i], 'item'):
-                    distance_float = float(distances[0][i].item())
-                else:
-                    distance_float = float(distances[0][i])
-            except (ValueError, TypeError):
-                distance_float = float(distances[0][i])
+        Args:
+            keywords: 검색할 키워드 리스트
             
-            result = {
-                "index": idx_int,
-                "distance": distance_float,
-                "title": str(title) if title else "",
-                "feature_summary": str(feature_summary) if feature_summary else "",
-                "lyrics": str(lyrics) if lyrics else "",
-            }
-            results.append(result)
-        
-        return results
+        Returns:
+            float64 배열 (동요 수)
+        """
+        return self.songs.keywords.dense_scores(keywords)
     
+    @timed("keyword_search")
     def search_by_keywords(
         self,
         keywords: List[str],
         top_k: int = 5
     ) -> List[Dict[str, Any]]:
         """
-        키워드 기반 검색 (BM25 스타일, 비용 없음)
+        키워드 기반 BM25 검색 (비용 없음)
+        키워드는 인덱스와 같은 토크나이저로 나누므로 "토끼가"도 "토끼"로 검색됩니다.
         
         Args:
             keywords: 검색할 키워드 리스트
             top_k: 반환할 상위 k개 결과
             
         Returns:
-            검색된 동요 정보 리스트
+            검색된 동요 정보 리스트 (keyword_score: BM25 점수)
         """
         if not keywords:
             return []
         
-        # 키워드 점수 계산 (간단한 TF-IDF 스타일)
-        scores = Counter()
-        keywords_lower = [kw.lower() for kw in keywords]
-        
-        for keyword in keywords_lower:
-            if keyword in self.keyword_index:
-                # 키워드가 포함된 모든 동요에 점수 부여
-                for song_idx in self.keyword_index[keyword]:
-                    scores[song_idx] += 1
-        
-        # 상위 k개 선택
-        top_indices = [idx for idx, _ in scores.most_common(top_k * 2)]  # 여유있게 2배 선택
-        
-        # 결과 구성
-        results = []
-        for idx in top_indices[:top_k]:
-            score = scores[idx]
-            
-            # metadata에서 정보 추출
-            if isinstance(self.metadata, dict):
-                titles = self.metadata.get("titles", [])
-                lyrics_list = self.metadata.get("lyrics", [])
-                if idx < len(titles):
-                    title = titles[idx]
-                    lyrics = lyrics_list[idx] if idx < len(lyrics_list) else ""
-                    feature_summary = ""
-                else:
-                    continue
-            else:
-                if idx < len(self.metadata):
-                    meta = self.metadata[idx]
-                    title = meta.get("제목") if isinstance(meta, dict) else (meta.get("title") if isinstance(meta, dict) else "")
-                    feature_summary = meta.get("가사 특징 요약") if isinstance(meta, dict) else (meta.get("feature_summary") if isinstance(meta, dict) else (meta.get("특징") if isinstance(meta, dict) else ""))
-                    lyrics = meta.get("가사") if isinstance(meta, dict) else (meta.get("lyrics") if isinstance(meta, dict) else "")
-                else:
-                    continue
-            
-            result = {
-                "index": idx,
-                "distance": 1.0 / (score + 1),  # 점수가 높을수록 distance는 낮음
-                "keyword_score": score,
-                "title": str(title) if title else "",
-                "feature_summary": str(feature_summary) if feature_summary else "",
-                "lyrics": str(lyrics) if lyrics else "",
-            }
-            results.append(result)
-        
-        return results
+        # 점수가 높을수록 distance는 낮음
+        return [
+            self.song(idx, distance=1.0 / (score + 1), keyword_score=score)
+            for idx, score in self.songs.keywords.search(keywords, top_k=top_k)
+        ]
     
-    def filter_by_categories(
-        self,
-        results: List[Dict[str, Any]],
-        categories: Dict[str, str]
-    ) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _category_keywords(categories: Optional[Dict[str, str]]) -> List[str]:
+        """필터링에 쓸 카테고리 값 (소문자, 빈 값 제외)"""
+        if not categories:
+            return []
+        return [value.strip().lower() for value in categories.values() if value and value.strip()]
+    
+    @timed("category_filter")
+    def category_bitmap(self, categories: Optional[Dict[str, str]]) -> Optional[np.ndarray]:
         """
-        카테고리 기반 필터링 (비용 없음)
+        카테고리 값 중 하나라도 들어 있는 동요의 비트맵 (문자열 검사 없음)
+        카테고리 씨앗 단어는 저장소에 미리 만든 비트맵(부분 문자열 매칭)을 쓰고,
+        그 밖의 값은 BM25 역인덱스에서 값의 모든 토큰이 들어 있는 동요를 찾습니다.
         
         Args:
-            results: 검색 결과 리스트
             categories: 필터링할 카테고리 (주제, 감정, 계절, 동물, 행동 등)
             
         Returns:
-            필터링된 결과 리스트
+            uint8 비트맵 (FAISS IDSelectorBitmap 형식), 필터 조건이 없거나 매칭되는 동요가 없으면 None
         """
-        if not categories or not any(categories.values()):
-            return results  # 필터 조건이 없으면 원본 반환
-        
-        filtered = []
-        category_keywords = []
-        
-        # 카테고리 키워드 추출
-        for cat_type, cat_value in categories.items():
-            if cat_value and cat_value.strip():
-                category_keywords.append(cat_value.lower())
-        
-        if not category_keywords:
-            return results
-        
-        # 각 결과에 대해 카테고리 키워드 매칭
-        for result in results:
-            # 제목, 특징, 가사에서 키워드 검색
-            searchable_text = f"{result.get('title', '')} {result.get('feature_summary', '')} {result.get('lyrics', '')}".lower()
-            
-            # 카테고리 키워드 중 하나라도 매칭되면 포함
-            matched = False
-            for keyword in category_keywords:
-                if keyword in searchable_text:
-                    matched = True
-                    break
-            
-            if matched:
-                filtered.append(result)
-        
-        # 필터링 결과가 너무 적으면 원본 반환 (최소 1개는 보장)
-        return filtered if len(filtered) >= 1 else results
\ No newline at end of file
+        bitmap = None
+        for value in self._category_keywords(categories):
+            term_bitmap = self.songs.categories.get(value)
+            if term_bitmap is None:
+                term_bitmap = self._token_bitmap(value)
+            if term_bitmap is not None:
+                bitmap = term_bitmap.copy() if bitmap is None else np.bitwise_or(bitmap, term_bitmap)
+        # 매칭되는 동요가 없으면 필터 없이 (최소 1개는 보장)
+        if bitmap is None or not bitmap.any():
+            return None
+        return bitmap
+    
+    def _token_bitmap(self, value: str) -> Optional[np.ndarray]:
+        """값의 모든 토큰이 들어 있는 동요 비트맵 (BM25 postings 교집합, 토큰이 없으면 None)"""
+        ids = None
+        for token in dict.fromkeys(tokenize(value, min_len=BM25_MIN_TOKEN_LEN)):
+            token_ids = self.songs.keywords.postings(token)[0]
+            ids = token_ids if ids is None else np.intersect1d(ids, token_ids, assume_unique=True)
+        if ids is None:
+            return None
+        return from_ids(ids, len(self.songs))
+
+
+# 프로세스 전역 Vector DB 캐시 (경로별 하나, fork 전에 로드하면 워커들이 페이지를 공유)
+_shared_dbs: Dict[Tuple[str, str], DongyoVectorDB] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_db(embeddings_path: str = None, index_path: str = None) -> DongyoVectorDB:
+    """
+    경로별로 한 번만 로드한 DongyoVectorDB를 반환합니다. (스레드 안전)
+
+    Args:
+        embeddings_path: embeddings 파일 경로
+        index_path: FAISS index 파일 경로
+
+    Returns:
+        공유 DongyoVectorDB
+    """
+    key = (str(embeddings_path or ""), str(index_path or ""))
+    db = _shared_dbs.get(key)
+    if db is not None:
+        return db
+    with _shared_lock:
+        db = _shared_dbs.get(key)
+        if db is None:
+            db = DongyoVectorDB(embeddings_path=embeddings_path, index_path=index_path)
+            _shared_dbs[key] = db
+        return db
+
+
+def loaded_dbs() -> List[DongyoVectorDB]:
+    """이 프로세스에 로드된 공유 DongyoVectorDB 목록"""
+    with _shared_lock:
+        return list(_shared_dbs.values())
@@ -4,7 +4,7 @@ FastAPI 백엔드 서버: 이미지에서 학습 텍스트 추출, 멜로디 가
 import os
 import sys
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Literal, Optional, Tuple
 from dashboard_logs.logger import Timer, log_generation_event
 
 # 프로젝트 루트를 Python 경로에 추가
@@ -12,28 +12,119 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-import base64
+import asyncio
+import gc
+import json
+from contextlib import aclosing, asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 
 from src.core.mureka_utils import find_audio_urls
+from src.clients.openai_client import chat_completion_async, get_async_openai_client
+from src.clients.http_pool import close_sessions
+from src.clients.suno_callbacks import parse_callback, suno_tasks, verify_callback_token
+from src.clients.suno_client import get_suno_client
+from src.core.admin import verify_admin_token
+from src.core.jobs import Job, JobManager
+from src.core.llm_cache import cache_stats
+from src.core.memory import object_counts, rss_info, tracemalloc_report
+from src.core.metrics import REGISTRY, MetricsMiddleware, render_metrics
+from src.core.profiling import ProfilingMiddleware, load_profile, top_functions
+from src.core.tracing import TracingMiddleware, current_span, get_slow_trace, recent_slow_traces, span
+from src.core.singleflight import SingleFlight, make_key, normalize_text
+from src.core.uploads import UploadError, UploadedFile, read_limited_body, stream_multipart_files
+from src.core.admission import UpstreamBusyError, upstream_stats
+from src.core.deadline import (
+    DEADLINE_DEFAULT_BUDGET_SEC,
+    Deadline,
+    DeadlineExceeded,
+    deadline_scope,
+    run_optional_async,
+    run_required_async,
+)
+from src.core.executor import run_cpu_bound, run_io_bound
 from src.core.workflow import (
-    build_suno_request,
-    create_mnemonic_plan,
-    extract_study_text_from_base64,
-    request_suno_song,
+    build_suno_request_async,
+    extract_study_text_async,
+    extract_study_text_from_base64_async,
+    request_suno_song_async,
 )
-from src.processors.image_analyzer import analyze_multiple_images
-from src.processors.pdf_processor import extract_text_from_pdf, is_pdf_file
+from src.processors.image_analyzer import analyze_image_for_education_async, summarize_image_analyses_async
+from src.processors.pdf_processor import extract_text_from_pdf, is_pdf_file, load_pdf_libraries
+from src.rag.engine import engine
 
 load_dotenv()
 
-app = FastAPI(title="학습용 멜로디 생성 API")
+# 노래 생성 백그라운드 작업 관리자 (워커 프로세스 단위)
+song_jobs = JobManager()
+
+# 동일 입력으로 동시에 들어온 요청은 계산 하나를 공유
+lyrics_flight = SingleFlight("generate-lyrics")
+extract_flight = SingleFlight("extract-from-files")
+file_flight = SingleFlight("extract-file")
+
+
+def _collect_server_metrics():
+    """/metrics 수집 시점에 요청 병합 / 노래 작업 / Suno 콜백 상태를 읽어 노출"""
+    flights = {flight.name: flight.stats() for flight in (lyrics_flight, extract_flight, file_flight)}
+    yield "singleflight_inflight", "gauge", "진행 중인 병합 계산 수", [
+        ("singleflight_inflight", {"flight": name}, st["inflight"]) for name, st in flights.items()
+    ]
+    yield "singleflight_requests", "counter", "병합기에 들어온 요청 수 (role=leader|coalesced)", [
+        ("singleflight_requests_total", {"flight": name, "role": role}, st[key])
+        for name, st in flights.items() for role, key in (("leader", "leaders"), ("coalesced", "coalesced"))
+    ]
+    jobs = song_jobs.status_counts()
+    yield "song_jobs", "gauge", "상태별 노래 생성 작업 수", [
+        ("song_jobs", {"status": status}, count) for status, count in jobs.items()
+    ]
+    callbacks = suno_tasks.stats()
+    yield "suno_callbacks_received", "counter", "수신한 Suno 콜백 수", [
+        ("suno_callbacks_received_total", {}, callbacks["received"])
+    ]
+    yield "suno_callback_waiters", "gauge", "콜백을 기다리는 Suno 작업 수", [
+        ("suno_callback_waiters", {}, callbacks["pending"])
+    ]
+
+
+REGISTRY.register_collector(_collect_server_metrics)
+
+
+def _background_warm_up(api_key: Optional[str]) -> None:
+    """무거운 모듈(faiss, numpy, openai, PDF 라이브러리) import와 RAG 엔진 로드를 미리 수행"""
+    try:
+        if api_key:
+            engine.load(api_key)
+    finally:
+        # 첫 PDF 업로드가 느리지 않도록 PDF 라이브러리도 미리 import
+        load_pdf_libraries()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    워커 시작 시 RAG 엔진(Vector DB, 키워드 인덱스, 에이전트 클라이언트)을 백그라운드에서 워밍업.
+    무거운 모듈은 이때 처음 import되므로 포트는 바로 열리고, 워밍업이 끝날 때까지 /ready 는 503을 반환한다.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        engine.error = "OPENAI_API_KEY가 설정되지 않았습니다."
+    warmup_task = asyncio.create_task(asyncio.to_thread(_background_warm_up, api_key))
+    try:
+        yield
+    finally:
+        if not warmup_task.done():
+            warmup_task.cancel()
+        await song_jobs.shutdown()
+        close_sessions()
+
+
+app = FastAPI(title="학습용 멜로디 생성 API", lifespan=lifespan)
 
 # 프론트엔드(web 폴더) 경로
 FRONTEND_DIR = project_root / "web"
@@ -70,6 +161,37 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# X-Profile: 1 + 관리자 토큰 요청만 샘플링 프로파일러로 실행 (PROFILING_ENABLED=1일 때)
+app.add_middleware(ProfilingMiddleware)
+# 요청별 트레이스 (X-Trace-Id 헤더, 느린 요청은 span 트리를 JSON으로 저장)
+app.add_middleware(TracingMiddleware)
+# 엔드포인트별 지연 시간 / 진행 중 요청 수 (가장 바깥에서 측정)
+app.add_middleware(MetricsMiddleware)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """관리자 전용 엔드포인트 보호 (ADMIN_TOKEN과 X-Admin-Token 헤더 비교)"""
+    if not verify_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="관리자 토큰(X-Admin-Token)이 필요합니다.")
+
+
+@app.exception_handler(UpstreamBusyError)
+async def upstream_busy_handler(request: Request, exc: UpstreamBusyError) -> JSONResponse:
+    """업스트림 혼잡 시 빠르게 503 + Retry-After로 응답 (load shedding)"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "upstream": exc.upstream, "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded) -> JSONResponse:
+    """요청 시간 예산 안에 필수 단계를 마치지 못함 (504)"""
+    return JSONResponse(
+        status_code=504,
+        content={"detail": str(exc), "stage": exc.stage, "budget_sec": exc.budget_sec},
+    )
 
 
 class ExtractTextRequest(BaseModel):
@@ -78,25 +200,33 @@ class ExtractTextRequest(BaseModel):
 
 class ExtractTextResponse(BaseModel):
     study_text: str
+    stages: Optional[Dict[str, Any]] = None  # 단계별 실행 기록 (/extract-from-files의 summary 단계)
 
 
 class MnemonicPlanRequest(BaseModel):
     study_text: str
     lyrics: Optional[str] = None  # 이미 생성된 가사 (선택사항)
+    budget_sec: Optional[float] = Field(None, gt=0)  # 시간 예산(초), 생략하면 DEADLINE_DEFAULT_BUDGET_SEC
 
 
 class MnemonicPlanResponse(BaseModel):
     mnemonic_plan: str
+    stages: Optional[Dict[str, Any]] = None  # 단계별 실행 기록 (가사 생성 단계 + mnemonic_plan)
 
 
 class GenerateLyricsRequest(BaseModel):
     study_text: str
+    # 질의 해석 방식 (llm / local / auto, 생략하면 서버 기본값 QUERY_AGENT_MODE)
+    query_mode: Optional[Literal["llm", "local", "auto"]] = None
+    # 시간 예산(초): 부족하면 선택 단계(Reasoner, Self-RAG 등)를 건너뜀, 생략하면 DEADLINE_DEFAULT_BUDGET_SEC
+    budget_sec: Optional[float] = Field(None, gt=0)
 
 
 class GenerateLyricsResponse(BaseModel):
     lyrics: str
     retrieved_docs: Optional[List[Dict[str, Any]]] = None
     reasoner_result: Optional[Dict[str, Any]] = None
+    stages: Optional[Dict[str, Any]] = None  # 단계별 실행 기록 (budget_sec, degraded, stages)
 
 
 class GenerateSongRequest(BaseModel):
@@ -118,6 +248,24 @@ class GenerateSongResponse(BaseModel):
     status: str = "completed"
 
 
+class SongJobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+    stage: str
+
+
+class SongJobStatusResponse(BaseModel):
+    job_id: str
+    status: str                       # queued | running | completed | failed
+    stage: str                        # preparing_payload | submitting | rendering | completed | failed ...
+    task_id: Optional[str] = None     # Suno task id (제출 이후)
+    audio_urls: list[str] = []
+    error: Optional[str] = None
+    trace_id: Optional[str] = None    # 작업 트레이스 id (느리면 /debug/traces/{trace_id}로 조회)
+    created_at: float
+    updated_at: float
+
+
 def get_openai_key() -> str:
     key = os.getenv("OPENAI_API_KEY")
     if not key:
@@ -134,122 +282,288 @@ async def extract_text(req: ExtractTextRequest) -> ExtractTextResponse:
     """이미지(base64)에서 학습용 텍스트 추출"""
     try:
         api_key = get_openai_key()
-        study_text = extract_study_text_from_base64(req.image_base64, api_key)
+        study_text = await extract_study_text_from_base64_async(req.image_base64, api_key)
+        if not study_text.strip():
+            raise HTTPException(status_code=400, detail="텍스트를 추출하지 못했습니다.")
+        return ExtractTextResponse(study_text=study_text)
+    except UpstreamBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"텍스트 추출 실패: {str(e)}")
+
+
+# 본문이 이미지 바이트 그대로이므로 OpenAPI 문서용 스키마만 따로 지정
+_IMAGE_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"image/*": {"schema": {"type": "string", "format": "binary"}}},
+    },
+}
+
+
+@app.post("/extract-text-binary", response_model=ExtractTextResponse, openapi_extra=_IMAGE_REQUEST_BODY)
+async def extract_text_binary(request: Request) -> ExtractTextResponse:
+    """
+    이미지 바이트(본문 그대로, Content-Type: image/*)에서 학습용 텍스트 추출
+    /extract-text와 같지만 base64 JSON 대신 원본을 보내므로 전송량이 약 25% 적다.
+    """
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith(("image/", "application/octet-stream")):
+        raise HTTPException(status_code=415, detail="이미지 바이트(Content-Type: image/*)로 업로드해주세요.")
+    try:
+        api_key = get_openai_key()
+        image_bytes = await read_limited_body(request)
+        study_text = await extract_study_text_async(memoryview(image_bytes), api_key, mime=content_type)
         if not study_text.strip():
             raise HTTPException(status_code=400, detail="텍스트를 추출하지 못했습니다.")
         return ExtractTextResponse(study_text=study_text)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except (HTTPException, UpstreamBusyError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"텍스트 추출 실패: {str(e)}")
 
 
-@app.post("/extract-from-files", response_model=ExtractTextResponse)
-async def extract_from_files(files: List[UploadFile] = File(...)) -> ExtractTextResponse:
+# 업로드 파일 개수 제한
+MAX_UPLOAD_IMAGES = 5
+MAX_UPLOAD_PDFS = 1
+
+# 본문은 직접 스트리밍으로 파싱하므로 OpenAPI 문서용 스키마만 따로 지정
+_FILES_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["files"],
+                    "properties": {
+                        "files": {"type": "array", "items": {"type": "string", "format": "binary"}},
+                    },
+                },
+            },
+        },
+    },
+}
+
+
+@app.post("/extract-from-files", response_model=ExtractTextResponse, openapi_extra=_FILES_REQUEST_BODY)
+async def extract_from_files(request: Request, budget_sec: Optional[float] = None) -> ExtractTextResponse:
     """
     다중 파일(이미지 최대 5장, PDF 1개)에서 학습용 텍스트 추출 및 종합
+    업로드는 스트리밍으로 받아 임시 파일에 기록하고(파일별/요청별 크기 제한, 초과 시 413),
+    파일 하나가 도착할 때마다 바로 추출/분석을 시작한다.
+    budget_sec(쿼리 파라미터)를 주면 남은 시간이 부족할 때 여러 자료 종합 요약을 건너뛰고 원문을 이어 붙인다.
     """
+    with deadline_scope(Deadline(budget_sec if budget_sec is not None else DEADLINE_DEFAULT_BUDGET_SEC)) as deadline:
+        return await _extract_from_files(request, deadline)
+
+
+async def _extract_from_files(request: Request, deadline: Deadline) -> ExtractTextResponse:
+    """extract_from_files 본문 (deadline 적용 범위 안에서 실행)"""
+    uploads: List[UploadedFile] = []
+    # 공유 계산(single-flight)이 가져간 업로드는 그쪽에서 닫음
+    claimed: set = set()
+    pdf_jobs: List[Tuple[UploadedFile, asyncio.Task]] = []
+    image_jobs: List[Tuple[UploadedFile, asyncio.Task]] = []
     try:
-        if not files:
-            raise HTTPException(status_code=400, detail="파일이 업로드되지 않았습니다.")
-        
-        # 파일 타입 확인
-        images = []
-        pdfs = []
-        
-        for file in files:
-            if is_pdf_file(file.filename):
-                pdfs.append(file)
-            elif file.content_type and file.content_type.startswith("image/"):
-                images.append(file)
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"지원하지 않는 파일 형식입니다: {file.filename}"
-                )
-        
-        # 제한 확인
-        if len(images) > 5:
-            raise HTTPException(status_code=400, detail="이미지는 최대 5장까지 업로드할 수 있습니다.")
-        if len(pdfs) > 1:
-            raise HTTPException(status_code=400, detail="PDF는 최대 1개까지 업로드할 수 있습니다.")
-        
         api_key = get_openai_key()
-        all_texts = []
-        
-        # PDF 처리
-        for pdf_file in pdfs:
-            try:
-                pdf_bytes = await pdf_file.read()
-                if not pdf_bytes or len(pdf_bytes) == 0:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"PDF 파일이 비어있습니다: {pdf_file.filename}"
-                    )
-                
-                pdf_text = extract_text_from_pdf(pdf_bytes)
-                if pdf_text.strip():
-                    all_texts.append(f"[PDF: {pdf_file.filename}]\n{pdf_text}")
+
+        files = stream_multipart_files(request, max_files=MAX_UPLOAD_IMAGES + MAX_UPLOAD_PDFS)
+        async with aclosing(files):
+            async for upload in files:
+                uploads.append(upload)
+                if is_pdf_file(upload.filename):
+                    if len(pdf_jobs) >= MAX_UPLOAD_PDFS:
+                        raise HTTPException(status_code=400, detail="PDF는 최대 1개까지 업로드할 수 있습니다.")
+                    if upload.size == 0:
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"PDF 파일이 비어있습니다: {upload.filename}"
+                        )
+                    pdf_jobs.append((upload, _start_file_job("pdf", upload, api_key, claimed)))
+                elif upload.content_type.startswith("image/"):
+                    if len(image_jobs) >= MAX_UPLOAD_IMAGES:
+                        raise HTTPException(status_code=400, detail="이미지는 최대 5장까지 업로드할 수 있습니다.")
+                    image_jobs.append((upload, _start_file_job("image", upload, api_key, claimed)))
                 else:
                     raise HTTPException(
                         status_code=400,
-                        detail=f"PDF 파일에서 텍스트를 추출하지 못했습니다: {pdf_file.filename}. "
-                               "이미지로만 구성된 PDF이거나 텍스트가 없는 PDF일 수 있습니다."
+                        detail=f"지원하지 않는 파일 형식입니다: {upload.filename}"
                     )
-            except ImportError as e:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"PDF 처리 라이브러리가 설치되지 않았습니다. "
-                           "다음 명령어로 설치해주세요: pip install pdfplumber PyPDF2"
-                )
-            except ValueError as e:
-                raise HTTPException(status_code=400, detail=str(e))
-            except RuntimeError as e:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"PDF 처리 실패 ({pdf_file.filename}): {str(e)}"
-                )
-            except Exception as e:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"PDF 파일 처리 중 오류 발생 ({pdf_file.filename}): {str(e)}"
-                )
-        
-        # 이미지 처리
-        if images:
-            image_b64_list = []
-            for img_file in images:
-                img_bytes = await img_file.read()
-                img_b64 = base64.b64encode(img_bytes).decode("utf-8")
-                image_b64_list.append(img_b64)
-            
-            # 여러 이미지 분석 및 종합
-            if len(image_b64_list) == 1:
-                # 단일 이미지: 간단한 분석
-                from src.processors.image_analyzer import analyze_image_for_education
-                from openai import OpenAI
-                client = OpenAI(api_key=api_key)
-                img_text = analyze_image_for_education(image_b64_list[0], client)
-                if img_text.strip():
-                    all_texts.append(f"[이미지: {images[0].filename}]\n{img_text}")
-            else:
-                # 다중 이미지: 종합 분석
-                img_text = analyze_multiple_images(image_b64_list, api_key)
-                if img_text.strip():
-                    all_texts.append(f"[이미지 {len(images)}장 종합]\n{img_text}")
+
+        if not uploads:
+            raise HTTPException(status_code=400, detail="파일이 업로드되지 않았습니다.")
+        current_span().set(
+            pdfs=len(pdf_jobs),
+            images=len(image_jobs),
+            upload_bytes=sum(upload.size for upload in uploads),
+        )
+
+        # 파일별 결과 수집 (PDF 오류는 그대로, 이미지 오류는 종합 단계에서 처리)
+        pdf_results = [(upload.filename, await task) for upload, task in pdf_jobs]
+        image_results = list(zip(
+            [upload.filename for upload, _ in image_jobs],
+            await asyncio.gather(*(task for _, task in image_jobs), return_exceptions=True),
+        ))
+
+        # 같은 파일(이름+내용)로 동시에 들어온 요청은 종합 단계도 한 번만 수행
+        key = make_key(
+            "extract-from-files",
+            deadline.budget_sec,
+            *(part for upload in uploads for part in (upload.filename, upload.sha256)),
+        )
+        with span("combine_files") as combine_span:
+            study_text = await extract_flight.do(
+                key, lambda: _combine_file_texts(pdf_results, image_results, api_key)
+            )
+            combine_span.set(chars=len(study_text))
+        return ExtractTextResponse(study_text=study_text, stages=deadline.report())
+
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except (HTTPException, UpstreamBusyError, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"파일 처리 실패: {str(e)}")
+    finally:
+        for _, task in pdf_jobs + image_jobs:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # 앞선 오류로 결과를 받지 않은 태스크의 예외 소비
+                task.exception()
+        for upload in uploads:
+            if id(upload) not in claimed:
+                upload.close()
+
+
+def _start_file_job(kind: str, upload: UploadedFile, api_key: str, claimed: set) -> asyncio.Task:
+    """
+    도착한 파일 하나의 추출/분석을 바로 시작합니다.
+    같은 내용의 파일이 동시에 처리 중이면 그 결과를 공유합니다. (파일 내용 sha256 기준)
+
+    Args:
+        kind: "pdf" 또는 "image"
+        upload: 다 받은 업로드 파일
+        api_key: OpenAI API 키
+        claimed: 공유 계산이 가져간 업로드 id 집합 (요청 쪽에서 닫지 않도록)
+
+    Returns:
+        추출 텍스트를 반환하는 태스크
+    """
+    async def run() -> str:
+        try:
+            with span(f"file.{kind}", filename=upload.filename, bytes=upload.size) as file_span:
+                if kind == "pdf":
+                    text = await _extract_uploaded_pdf(upload)
+                else:
+                    text = await _analyze_uploaded_image(upload, api_key)
+                file_span.set(chars=len(text))
+                return text
+        finally:
+            upload.close()
+
+    def factory():
+        # 이 요청이 계산을 맡게 되면 업로드 파일 정리도 계산 쪽으로 넘김
+        claimed.add(id(upload))
+        return run()
+
+    key = make_key("extract-file", kind, upload.sha256)
+    return asyncio.create_task(file_flight.do(key, factory))
+
+
+async def _extract_uploaded_pdf(upload: UploadedFile) -> str:
+    """업로드된 PDF에서 텍스트 추출 (임시 파일을 그대로 읽어 bytes로 복사하지 않음)"""
+    try:
+        # PDF 파싱은 CPU 바운드이므로 이벤트 루프 밖에서 실행
+        pdf_text = await run_cpu_bound(extract_text_from_pdf, upload.file)
+    except ImportError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"PDF 처리 라이브러리가 설치되지 않았습니다. "
+                   "다음 명령어로 설치해주세요: pip install pdfplumber PyPDF2"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"PDF 처리 실패 ({upload.filename}): {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"PDF 파일 처리 중 오류 발생 ({upload.filename}): {str(e)}"
+        )
+
+    if not pdf_text.strip():
+        raise HTTPException(
+            status_code=400,
+            detail=f"PDF 파일에서 텍스트를 추출하지 못했습니다: {upload.filename}. "
+                   "이미지로만 구성된 PDF이거나 텍스트가 없는 PDF일 수 있습니다."
+        )
+    return pdf_text
+
+
+async def _analyze_uploaded_image(upload: UploadedFile, api_key: str) -> str:
+    """업로드된 이미지 하나를 교육용으로 분석"""
+    # 원본 바이트를 그대로 넘기면 data URL을 만들 때 한 번만 base64로 인코딩됨
+    img_bytes = await run_io_bound(upload.read)
+    client = get_async_openai_client(api_key)
+    return await analyze_image_for_education_async(img_bytes, client, mime=upload.content_type)
+
+
+async def _combine_file_texts(
+    pdf_results: List[Tuple[str, str]],
+    image_results: List[Tuple[str, Any]],
+    api_key: str,
+) -> str:
+    """
+    파일별 추출 결과를 종합하여 학습 텍스트를 만듭니다.
+
+    Args:
+        pdf_results: (파일명, PDF 텍스트) 목록
+        image_results: (파일명, 분석 텍스트 또는 예외) 목록
+        api_key: OpenAI API 키
+
+    Returns:
+        종합된 학습 텍스트
+    """
+    all_texts = []
+
+    # PDF 처리
+    for filename, pdf_text in pdf_results:
+        all_texts.append(f"[PDF: {filename}]\n{pdf_text}")
+
+    # 이미지 처리
+    if len(image_results) == 1:
+        # 단일 이미지: 간단한 분석
+        filename, img_text = image_results[0]
+        if isinstance(img_text, Exception):
+            raise img_text
+        if img_text.strip():
+            all_texts.append(f"[이미지: {filename}]\n{img_text}")
+    elif image_results:
+        # 다중 이미지: 종합 분석
+        img_text = await summarize_image_analyses_async([result for _, result in image_results], api_key)
+        if img_text.strip():
+            all_texts.append(f"[이미지 {len(image_results)}장 종합]\n{img_text}")
+
+    if not all_texts:
+        raise HTTPException(status_code=400, detail="파일에서 내용을 추출하지 못했습니다.")
+    
+    # 모든 내용 종합
+    if len(all_texts) == 1:
+        study_text = all_texts[0]
+    else:
+        # 여러 파일 내용을 종합하여 요약
+        combined_text = "\n\n".join(all_texts)
         
-        if not all_texts:
-            raise HTTPException(status_code=400, detail="파일에서 내용을 추출하지 못했습니다.")
+        client = get_async_openai_client(api_key)
         
-        # 모든 내용 종합
-        if len(all_texts) == 1:
-            study_text = all_texts[0]
-        else:
-            # 여러 파일 내용을 종합하여 요약
-            combined_text = "\n\n".join(all_texts)
-            
-            from openai import OpenAI
-            client = OpenAI(api_key=api_key)
-            
-            summary_prompt = f"""다음은 여러 학습 자료(이미지, PDF)에서 추출한 내용입니다.
+        summary_prompt = f"""다음은 여러 학습 자료(이미지, PDF)에서 추출한 내용입니다.
 이 내용들을 종합하여 하나의 일관된 학습 자료로 정리해주세요.
 중복되는 내용은 제거하고, 핵심 내용만 간결하게 정리해주세요.
 노래 가사로 만들 수 있도록 자연스러운 문장으로 작성해주세요.
@@ -259,32 +573,29 @@ async def extract_from_files(files: List[UploadFile] = File(...)) -> ExtractText
 
 [요약된 학습 자료]"""
 
-            try:
-                resp = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "너는 교육 자료 요약 전문가입니다. 여러 자료를 종합하여 학습자가 쉽게 외울 수 있는 형태로 정리해줍니다."
-                        },
-                        {"role": "user", "content": summary_prompt},
-                    ],
-                    temperature=0.5,
-                )
-                study_text = resp.choices[0].message.content.strip()
-            except Exception:
-                # 요약 실패 시 원본 텍스트 반환
-                study_text = combined_text
-        
-        if not study_text.strip():
-            raise HTTPException(status_code=400, detail="파일에서 내용을 추출하지 못했습니다.")
-        
-        return ExtractTextResponse(study_text=study_text)
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"파일 처리 실패: {str(e)}")
+        try:
+            # 선택 단계: 시간 예산이 부족하면 요약하지 않고 원본 텍스트 사용
+            resp = await run_optional_async("summary", lambda: chat_completion_async(
+                client,
+                model="gpt-4o-mini",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "너는 교육 자료 요약 전문가입니다. 여러 자료를 종합하여 학습자가 쉽게 외울 수 있는 형태로 정리해줍니다."
+                    },
+                    {"role": "user", "content": summary_prompt},
+                ],
+                temperature=0.5,
+            ), None)
+            study_text = resp.choices[0].message.content.strip() if resp is not None else combined_text
+        except Exception:
+            # 요약 실패 시 원본 텍스트 반환
+            study_text = combined_text
+    
+    if not study_text.strip():
+        raise HTTPException(status_code=400, detail="파일에서 내용을 추출하지 못했습니다.")
+    
+    return study_text
 
 
 @app.post("/generate-lyrics", response_model=GenerateLyricsResponse)
@@ -293,10 +604,16 @@ async def generate_lyrics(req: GenerateLyricsRequest) -> GenerateLyricsResponse:
     try:
         api_key = get_openai_key()
         
-        # 가사 생성
-        from src.rag.orchestrator import RAGOrchestrator
-        orchestrator = RAGOrchestrator(api_key=api_key)
-        result = orchestrator.generate_lyrics(req.study_text, top_k=3, use_rag=True)
+        # 가사 생성 (워커 전역에서 공유하는 오케스트레이터 사용)
+        orchestrator = await engine.get_orchestrator_async(api_key)
+        # 같은 학습 텍스트로 동시에 들어온 요청은 파이프라인을 한 번만 실행
+        key = make_key("generate-lyrics", normalize_text(req.study_text), 3, True, req.query_mode, req.budget_sec)
+        result = await lyrics_flight.do(
+            key,
+            lambda: orchestrator.generate_lyrics_async(
+                req.study_text, top_k=3, use_rag=True, query_mode=req.query_mode, budget_sec=req.budget_sec
+            ),
+        )
         final_lyrics = result["lyrics"]
         
         # 문자열로 변환 (numpy 타입 등이 포함될 수 있으므로)
@@ -307,38 +624,139 @@ async def generate_lyrics(req: GenerateLyricsRequest) -> GenerateLyricsResponse:
         return GenerateLyricsResponse(
             lyrics=final_lyrics,
             retrieved_docs=result.get("retrieved_docs"),
-            reasoner_result=result.get("reasoner_result")
+            reasoner_result=result.get("reasoner_result"),
+            stages=result.get("stages")
         )
+    except (UpstreamBusyError, DeadlineExceeded):
+        raise
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
         raise HTTPException(status_code=500, detail=f"가사 생성 실패: {error_detail}")
 
 
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Server-Sent Events 한 건을 직렬화"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/generate-lyrics/stream")
+async def generate_lyrics_stream(req: GenerateLyricsRequest) -> StreamingResponse:
+    """
+    /generate-lyrics의 스트리밍 버전 (text/event-stream)
+    단계가 끝날 때마다 이벤트를 보내고, 초안 가사는 토큰 단위로 전송:
+    start → query → retrieved → reasoned → token* → draft → final (실패 시 error)
+    final 이벤트의 data는 GenerateLyricsResponse와 같은 형식
+    """
+    api_key = get_openai_key()
+
+    async def event_stream():
+        # 첫 바이트를 바로 보내 연결이 살아있음을 알림
+        yield _sse_event("start", {"stage": "start"})
+        try:
+            orchestrator = await engine.get_orchestrator_async(api_key)
+            async for event, data in orchestrator.generate_lyrics_stream(
+                req.study_text, top_k=3, use_rag=True, query_mode=req.query_mode, budget_sec=req.budget_sec
+            ):
+                if event == "final":
+                    final_lyrics = data["lyrics"]
+                    if not isinstance(final_lyrics, str):
+                        final_lyrics = str(final_lyrics)
+                    data = GenerateLyricsResponse(
+                        lyrics=final_lyrics,
+                        retrieved_docs=data.get("retrieved_docs"),
+                        reasoner_result=data.get("reasoner_result"),
+                        stages=data.get("stages")
+                    ).model_dump()
+                yield _sse_event(event, data)
+        except UpstreamBusyError as e:
+            # 스트림은 이미 200으로 시작했으므로 상태 코드 대신 이벤트로 전달
+            yield _sse_event("error", {"detail": str(e), "status": 503, "retry_after": e.retry_after})
+        except DeadlineExceeded as e:
+            yield _sse_event("error", {"detail": str(e), "status": 504, "stage": e.stage})
+        except Exception as e:
+            yield _sse_event("error", {"detail": f"가사 생성 실패: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/mnemonic-plan", response_model=MnemonicPlanResponse)
 async def mnemonic_plan(req: MnemonicPlanRequest) -> MnemonicPlanResponse:
     """학습 텍스트로부터 가사를 먼저 생성하고, 그 가사를 포함한 멜로디 가이드 생성"""
     try:
         api_key = get_openai_key()
         
-        # 가사가 제공되면 사용, 없으면 생성
-        if req.lyrics:
-            final_lyrics = req.lyrics
-        else:
-            # 1. 가사를 먼저 생성
-            from src.rag.orchestrator import RAGOrchestrator
-            orchestrator = RAGOrchestrator(api_key=api_key)
-            result = orchestrator.generate_lyrics(req.study_text, top_k=3, use_rag=True)
-            final_lyrics = result["lyrics"]
-        
-        # 2. 생성된 가사를 포함하여 멜로디 가이드 생성
-        plan = create_mnemonic_plan(req.study_text, api_key, final_lyrics=final_lyrics)
+        orchestrator = await engine.get_orchestrator_async(api_key)
+
+        # 가사 생성과 멜로디 가이드 생성이 같은 시간 예산을 나눠 씀
+        budget_sec = req.budget_sec if req.budget_sec is not None else DEADLINE_DEFAULT_BUDGET_SEC
+        with deadline_scope(Deadline(budget_sec)) as deadline:
+            # 가사가 제공되면 사용, 없으면 생성
+            if req.lyrics:
+                final_lyrics = req.lyrics
+            else:
+                # 1. 가사를 먼저 생성
+                result = await orchestrator.generate_lyrics_async(req.study_text, top_k=3, use_rag=True)
+                final_lyrics = result["lyrics"]
+            
+            # 2. 생성된 가사를 포함하여 멜로디 가이드 생성
+            plan = await run_required_async(
+                "mnemonic_plan",
+                lambda: orchestrator.generator_agent.generate_mnemonic_plan_async(req.study_text, final_lyrics=final_lyrics),
+            )
         
-        return MnemonicPlanResponse(mnemonic_plan=plan)
+        return MnemonicPlanResponse(mnemonic_plan=plan, stages=deadline.report())
+    except (UpstreamBusyError, DeadlineExceeded):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"멜로디 가이드 생성 실패: {str(e)}")
 
 
+async def _prepare_song_payload(req: GenerateSongRequest, openai_key: str) -> Dict[str, Any]:
+    """가사를 확정하고 Suno 요청 페이로드를 구성 (가사가 없으면 400)"""
+    # 생성된 가사 우선 사용 (프론트엔드에서 직접 전달받은 가사)
+    final_lyrics = req.lyrics
+    if not final_lyrics or not final_lyrics.strip():
+        # 가사가 없으면 멜로디 가이드에서 추출 시도
+        from src.lyrics.lyrics_extractor import extract_final_lyrics
+        final_lyrics = extract_final_lyrics(req.mnemonic_plan)
+        if not final_lyrics or not final_lyrics.strip():
+            # 추출 실패 시 가사를 다시 생성
+            generator_agent = (await engine.get_orchestrator_async(openai_key)).generator_agent
+            final_lyrics = await generator_agent.generate_lyrics_async(req.study_text)
+
+    # 가사가 비어있으면 에러
+    if not final_lyrics or not final_lyrics.strip():
+        raise HTTPException(status_code=400, detail="가사가 없습니다. 먼저 가사를 생성해주세요.")
+
+    return await build_suno_request_async(
+        req.study_text, 
+        req.mnemonic_plan, 
+        final_lyrics=final_lyrics, 
+        api_key=openai_key,
+        emotion_tags=req.emotion_tags,
+        retrieved_docs=req.retrieved_docs,
+        reasoner_result=req.reasoner_result
+    )
+
+
+def _collect_audio_urls(result: Dict[str, Any]) -> List[str]:
+    """Suno 응답에서 오디오 URL 추출"""
+    audio_urls: List[str] = []
+    if "tracks" in result:
+        for track in result["tracks"]:
+            if "audioUrl" in track and track["audioUrl"]:
+                audio_urls.append(track["audioUrl"])
+    # fallback: 기존 find_audio_urls도 시도
+    if not audio_urls:
+        audio_urls = find_audio_urls(result)
+    return audio_urls
+
+
 @app.post("/generate-song", response_model=GenerateSongResponse)
 async def generate_song(req: GenerateSongRequest) -> GenerateSongResponse:
     """Suno API를 사용해 노래 생성"""
@@ -354,7 +772,6 @@ async def generate_song(req: GenerateSongRequest) -> GenerateSongResponse:
     emotion_tags = req.emotion_tags or []
     retry_count = req.retry_count or 0
 
-    success = True
     result = None
     audio_urls: list[str] = []
 
@@ -364,42 +781,11 @@ async def generate_song(req: GenerateSongRequest) -> GenerateSongResponse:
 
         # ⚡ 여기부터 전체 파이프라인 시간 측정
         with Timer() as t:
-            # 생성된 가사 우선 사용 (프론트엔드에서 직접 전달받은 가사)
-            final_lyrics = req.lyrics
-            if not final_lyrics or not final_lyrics.strip():
-                # 가사가 없으면 멜로디 가이드에서 추출 시도
-                from src.lyrics.lyrics_extractor import extract_final_lyrics
-                final_lyrics = extract_final_lyrics(req.mnemonic_plan)
-                if not final_lyrics or not final_lyrics.strip():
-                    # 추출 실패 시 가사를 다시 생성
-                    from src.rag.agents.generator_agent import GeneratorAgent
-                    generator_agent = GeneratorAgent(api_key=openai_key)
-                    final_lyrics = generator_agent.generate_lyrics(req.study_text)
-
-            # 가사가 비어있으면 에러
-            if not final_lyrics or not final_lyrics.strip():
-                success = False
-                raise HTTPException(status_code=400, detail="가사가 없습니다. 먼저 가사를 생성해주세요.")
-
-            payload = build_suno_request(
-                req.study_text, 
-                req.mnemonic_plan, 
-                final_lyrics=final_lyrics, 
-                api_key=openai_key,
-                emotion_tags=req.emotion_tags,
-                retrieved_docs=req.retrieved_docs,
-                reasoner_result=req.reasoner_result
-            )
-            result = request_suno_song(payload, suno_key, wait=req.wait_for_audio)
+            payload = await _prepare_song_payload(req, openai_key)
+            result = await request_suno_song_async(payload, suno_key, wait=req.wait_for_audio)
 
             # Suno 응답에서 오디오 URL 추출
-            if "tracks" in result:
-                for track in result["tracks"]:
-                    if "audioUrl" in track and track["audioUrl"]:
-                        audio_urls.append(track["audioUrl"])
-            # fallback: 기존 find_audio_urls도 시도
-            if not audio_urls:
-                audio_urls = find_audio_urls(result)
+            audio_urls = _collect_audio_urls(result)
 
         # ⚡ with Timer 블록 끝난 후: 실제 전체 시간(초)
         generation_time_sec = t.elapsed
@@ -434,8 +820,10 @@ async def generate_song(req: GenerateSongRequest) -> GenerateSongResponse:
         # 예: 
         # log_generation_event(..., success=False)
         raise
+    except UpstreamBusyError:
+        # 혼잡으로 거절된 요청은 실패 로그 대신 503으로 바로 응답
+        raise
     except Exception as e:
-        success = False
         # 예외 발생 시에도 성능 로그 남길지 여부는 선택
         # 여기서는 "노래 생성 전체 실패"도 기록한다고 가정
         log_generation_event(
@@ -450,6 +838,134 @@ async def generate_song(req: GenerateSongRequest) -> GenerateSongResponse:
         raise HTTPException(status_code=500, detail=f"노래 생성 실패: {str(e)}")
 
 
+async def _run_song_job(job: Job, req: GenerateSongRequest, suno_key: str, openai_key: str) -> Dict[str, Any]:
+    """백그라운드 노래 생성 작업: 페이로드 구성 → Suno 제출 → 렌더링 완료까지 대기"""
+    user_id = req.user_id or "guest"
+    upload_type = req.upload_type or "text"
+    text_length = len(req.study_text) if req.study_text else 0
+    emotion_tags = req.emotion_tags or []
+    retry_count = req.retry_count or 0
+
+    try:
+        with Timer() as t:
+            job.set_stage("preparing_payload")
+            payload = await _prepare_song_payload(req, openai_key)
+
+            client = get_suno_client(suno_key)
+            job.set_stage("submitting")
+            task_id = await client.create_song_async(payload)
+            job.info["task_id"] = task_id
+
+            job.set_stage("rendering")
+            result = await client.poll_result_async(task_id)
+            audio_urls = _collect_audio_urls(result)
+    except HTTPException as e:
+        raise RuntimeError(e.detail)
+    except Exception:
+        log_generation_event(
+            user_id=user_id,
+            emotion_tags=emotion_tags,
+            upload_type=upload_type,
+            text_length=text_length,
+            generation_time_sec=0.0,
+            retry_count=retry_count,
+            success=False,
+        )
+        raise
+
+    log_generation_event(
+        user_id=user_id,
+        emotion_tags=emotion_tags,
+        upload_type=upload_type,
+        text_length=text_length,
+        generation_time_sec=t.elapsed,
+        retry_count=retry_count,
+        success=True,
+    )
+    return {
+        "task_id": result.get("task_id") or task_id,
+        "audio_urls": audio_urls,
+        "status": result.get("status", "completed"),
+    }
+
+
+# 콜백 본문 최대 크기
+_SUNO_CALLBACK_MAX_BYTES = 1024 * 1024
+
+
+@app.post("/suno/callback")
+async def suno_callback(request: Request, token: Optional[str] = None) -> Dict[str, str]:
+    """
+    Suno 렌더링 콜백 수신 (callBackUrl)
+    토큰을 검증한 뒤 해당 task_id를 기다리던 노래 생성 작업을 바로 깨운다.
+    """
+    if not verify_callback_token(token):
+        raise HTTPException(status_code=403, detail="콜백 토큰이 올바르지 않습니다.")
+    try:
+        body = json.loads(await read_limited_body(request, _SUNO_CALLBACK_MAX_BYTES))
+        task_id, callback_type, tracks, error = parse_callback(body)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"잘못된 콜백입니다: {str(e)}")
+
+    print(f"[Suno] 콜백 수신: task_id={task_id}, type={callback_type}")
+    suno_tasks.deliver(task_id, callback_type, tracks, error)
+    return {"status": "received"}
+
+
+def _song_job_status(job: Job) -> SongJobStatusResponse:
+    result = job.result or {}
+    return SongJobStatusResponse(
+        job_id=job.id,
+        status=job.status,
+        stage=job.stage,
+        task_id=result.get("task_id") or job.info.get("task_id"),
+        audio_urls=result.get("audio_urls", []),
+        error=job.error,
+        trace_id=job.info.get("trace_id"),
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
+
+
+@app.post("/jobs/song", response_model=SongJobSubmitResponse, status_code=202)
+async def submit_song_job(req: GenerateSongRequest) -> SongJobSubmitResponse:
+    """
+    노래 생성 작업 제출: job id를 즉시 반환하고 렌더링은 백그라운드에서 진행
+    (wait_for_audio 값과 무관하게 완료까지 서버가 대기하며, 클라이언트는 GET /jobs/{job_id}로 폴링)
+    """
+    suno_key = get_suno_key()
+    if not suno_key:
+        raise HTTPException(status_code=500, detail="SUNO_API_KEY가 설정되지 않았습니다.")
+    openai_key = get_openai_key()
+
+    job = song_jobs.submit("song", lambda job: _run_song_job(job, req, suno_key, openai_key))
+    return SongJobSubmitResponse(job_id=job.id, status=job.status, stage=job.stage)
+
+
+@app.get("/jobs/{job_id}", response_model=SongJobStatusResponse)
+async def get_song_job(job_id: str) -> SongJobStatusResponse:
+    """노래 생성 작업 상태 조회 (진행 단계, 완료 시 audio_urls 포함)"""
+    job = song_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다. (만료되었거나 존재하지 않는 job id)")
+    return _song_job_status(job)
+
+
+@app.get("/jobs/{job_id}/result", response_model=GenerateSongResponse)
+async def get_song_job_result(job_id: str) -> GenerateSongResponse:
+    """완료된 노래 생성 작업의 결과 조회 (완료 전이면 409)"""
+    job = song_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다. (만료되었거나 존재하지 않는 job id)")
+    if job.status == Job.FAILED:
+        raise HTTPException(status_code=500, detail=f"노래 생성 실패: {job.error}")
+    if job.status != Job.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"작업이 아직 완료되지 않았습니다. (stage={job.stage})")
+    return GenerateSongResponse(**job.result)
+
+
 @app.get("/api-info")
 async def root() -> Dict[str, Any]:
     """루트 엔드포인트: API 정보 제공"""
@@ -458,10 +974,23 @@ async def root() -> Dict[str, Any]:
         "version": "1.0.0",
         "endpoints": {
             "POST /extract-text": "이미지에서 텍스트 추출",
+            "POST /extract-text-binary": "이미지 바이트(base64 없이)에서 텍스트 추출",
             "POST /extract-from-files": "다중 파일(이미지/PDF)에서 텍스트 추출 및 종합",
             "POST /mnemonic-plan": "멜로디 가이드 생성",
+            "POST /generate-lyrics/stream": "가사 생성 진행 상황/토큰 스트리밍 (SSE)",
             "POST /generate-song": "Suno 노래 생성",
+            "POST /jobs/song": "Suno 노래 생성 작업 제출 (job id 즉시 반환)",
+            "GET /jobs/{job_id}": "노래 생성 작업 상태 조회",
+            "GET /jobs/{job_id}/result": "완료된 노래 생성 작업 결과 조회",
             "GET /health": "헬스 체크",
+            "GET /ready": "워밍업 완료 여부 (readiness 프로브)",
+            "POST /suno/callback": "Suno 렌더링 완료 콜백 수신 (SUNO_CALLBACK_TOKEN 필요)",
+            "GET /metrics": "Prometheus 메트릭 (단계/엔드포인트/업스트림별 지연 시간 히스토그램 등)",
+            "GET /debug/upstreams": "업스트림별 동시 호출 수/대기열 깊이/대기 시간, LLM 응답 캐시 상태",
+            "GET /debug/traces": "최근 느린 요청 트레이스 목록",
+            "GET /debug/traces/{trace_id}": "느린 요청의 span 트리 (JSON)",
+            "GET /debug/profiles/{profile_id}": "X-Profile 요청의 샘플링 프로파일 (collapsed stack, 관리자 전용)",
+            "GET /debug/memory": "RSS, tracemalloc 상위 할당/증가분, 타입별 객체 수, Vector DB 구조체 크기 (관리자 전용)",
         },
         "docs": "/docs",
     }
@@ -473,3 +1002,80 @@ async def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    """readiness 프로브: RAG 엔진 워밍업이 끝난 뒤에만 200 반환"""
+    status = engine.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Prometheus 수집용 메트릭 (단계/엔드포인트/업스트림별 지연 시간, 진행 중 수, 토큰/오류 수)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/debug/upstreams", dependencies=[Depends(require_admin)])
+async def debug_upstreams() -> Dict[str, Any]:
+    """업스트림(OpenAI/Suno)별 동시 호출 제한기 상태(사용 중 슬롯, 대기열 깊이, 대기 시간, 거절 수)와 LLM 응답 캐시 상태 (관리자 전용)"""
+    return {
+        "upstreams": upstream_stats(),
+        "suno_callbacks": suno_tasks.stats(),
+        "llm_cache": await run_io_bound(cache_stats),
+    }
+
+
+@app.get("/debug/traces", dependencies=[Depends(require_admin)])
+async def debug_traces() -> Dict[str, Any]:
+    """TRACE_SLOW_MS를 넘은 최근 요청 트레이스 목록 (최신순, 관리자 전용)"""
+    return {"traces": recent_slow_traces()}
+
+
+@app.get("/debug/traces/{trace_id}", dependencies=[Depends(require_admin)])
+async def debug_trace(trace_id: str) -> Dict[str, Any]:
+    """느린 요청 하나의 span 트리 (응답 헤더 X-Trace-Id 값으로 조회, 관리자 전용)"""
+    trace = get_slow_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="트레이스를 찾을 수 없습니다. (느린 요청만 보관됩니다)")
+    return trace
+
+
+@app.get("/debug/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def debug_profile(profile_id: str, format: str = "collapsed", project_only: bool = False):
+    """
+    X-Profile 요청의 샘플링 프로파일 조회 (관리자 전용)
+    format=collapsed: flamegraph.pl / speedscope 입력 텍스트, format=top: 함수별 self/total 샘플 수
+    """
+    collapsed = load_profile(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="프로파일을 찾을 수 없습니다.")
+    if format == "top":
+        return {"profile_id": profile_id, "functions": top_functions(collapsed, project_only=project_only)}
+    return PlainTextResponse(collapsed)
+
+
+def _memory_report(top: int, start_tracemalloc: bool) -> Dict[str, Any]:
+    """메모리 진단 보고서 (gc 객체 순회가 있어 CPU 풀에서 실행)"""
+    # faiss를 import하지 않도록 이미 로드된 경우에만 Vector DB 크기를 측정
+    vector_db = sys.modules.get("src.rag.vector_db")
+    return {
+        "process": rss_info(),
+        "tracemalloc": tracemalloc_report(limit=top, start=start_tracemalloc),
+        "objects": object_counts(limit=top),
+        "gc_counts": gc.get_count(),
+        "vector_dbs": [
+            dict(db.memory_usage(), path=str(db.embeddings_path))
+            for db in (vector_db.loaded_dbs() if vector_db else [])
+        ],
+    }
+
+
+@app.get("/debug/memory", dependencies=[Depends(require_admin)])
+async def debug_memory(top: int = 20, start_tracemalloc: bool = False) -> Dict[str, Any]:
+    """
+    메모리 진단 (관리자 전용)
+    tracemalloc의 diff는 직전 /debug/memory 호출 이후의 증가분이므로,
+    요청 전후로 두 번 호출하면 요청당 늘어나는 메모리를 확인할 수 있습니다.
+    """
+    top = max(1, min(top, 200))
+    return await run_cpu_bound(_memory_report, top, start_tracemalloc)
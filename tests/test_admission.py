@@ -0,0 +1,86 @@
+"""
+업스트림 동시 호출 제한 테스트 (대기열 가득 참 / 대기 시간 초과 → UpstreamBusyError, 503 + Retry-After 응답)
+
+    python -m pytest -q tests
+"""
+import asyncio
+import json
+import threading
+
+import pytest
+
+from src.core.admission import UpstreamBusyError, UpstreamLimiter
+from src.server import app, upstream_busy_handler
+
+
+def test_full_queue_rejects_immediately():
+    limiter = UpstreamLimiter("test", limit=1, max_queue=1, max_wait=5.0)
+
+    async def main():
+        async with limiter.slot_async():
+            # 두 번째 요청은 대기열에서 기다리고, 세 번째는 대기열이 가득 차 바로 거절
+            queued = asyncio.ensure_future(limiter.acquire_async())
+            await asyncio.sleep(0.01)
+            assert limiter.stats()["queued"] == 1
+            with pytest.raises(UpstreamBusyError) as busy:
+                await limiter.acquire_async()
+        # 슬롯을 반환하면 대기하던 요청이 넘겨받음
+        await queued
+        limiter.release()
+        return busy.value
+
+    error = asyncio.run(main())
+    assert error.upstream == "test" and error.reason == "대기열 가득 참"
+    assert 1 <= error.retry_after <= 30
+    stats = limiter.stats()
+    assert (stats["admitted"], stats["rejected"], stats["in_use"], stats["queued"]) == (2, 1, 0, 0)
+
+
+def test_wait_timeout_raises_busy():
+    limiter = UpstreamLimiter("test", limit=1, max_queue=4, max_wait=0.05)
+    limiter.acquire()
+    errors = []
+
+    def waiter():
+        try:
+            with limiter.slot():
+                pass
+        except UpstreamBusyError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    thread.join(timeout=5)
+    assert [e.reason for e in errors] == ["대기 시간 초과"]
+    assert limiter.stats()["timed_out"] == 1 and limiter.stats()["queued"] == 0
+
+    # 포기한 대기자에게 슬롯이 넘어가지 않고 반환됨
+    limiter.release()
+    assert limiter.stats()["in_use"] == 0
+
+
+def test_cancelled_waiter_passes_slot_on():
+    limiter = UpstreamLimiter("test", limit=1, max_queue=4, max_wait=5.0)
+
+    async def main():
+        await limiter.acquire_async()
+        first = asyncio.ensure_future(limiter.acquire_async())
+        second = asyncio.ensure_future(limiter.acquire_async())
+        await asyncio.sleep(0.01)
+        first.cancel()
+        limiter.release()
+        await asyncio.wait_for(second, 1)
+        assert first.cancelled()
+        limiter.release()
+
+    asyncio.run(main())
+    assert limiter.stats()["in_use"] == 0
+
+
+def test_busy_handler_returns_503_with_retry_after():
+    assert app.exception_handlers[UpstreamBusyError] is upstream_busy_handler
+    response = asyncio.run(upstream_busy_handler(None, UpstreamBusyError("chat", 7, "대기열 가득 참")))
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    body = json.loads(response.body)
+    assert body["upstream"] == "chat" and body["retry_after"] == 7
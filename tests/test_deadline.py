@@ -0,0 +1,117 @@
+"""
+요청 시간 예산 테스트 (선택 단계 건너뛰기 / 타임아웃 시 fallback, 필수 단계 DeadlineExceeded)
+다른 테스트의 단계 예상 시간에 영향을 주지 않도록 테스트 전용 단계 이름을 쓴다. (처음 보는 단계는 1초 × 여유 배수)
+
+    python -m pytest -q tests
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.core.deadline import (
+    DEADLINE_MIN_CALL_SEC,
+    Deadline,
+    DeadlineExceeded,
+    call_timeout,
+    deadline_scope,
+    estimate,
+    run_optional,
+    run_optional_async,
+    run_required,
+    run_required_async,
+)
+
+
+def _statuses(deadline: Deadline) -> list:
+    return [(entry["stage"], entry["status"]) for entry in deadline.report()["stages"]]
+
+
+def test_optional_skipped_when_budget_is_short():
+    calls = []
+    with deadline_scope(Deadline(estimate("test_short") / 2)) as deadline:
+        result = run_optional("test_short", lambda: calls.append(1) or "결과", fallback="대체값")
+    assert result == "대체값" and calls == []
+    assert _statuses(deadline) == [("test_short", "skipped")]
+    assert deadline.report()["degraded"]
+
+
+def test_optional_reserve_keeps_time_for_later_stages():
+    budget = estimate("test_reserve") + 1.0
+    with deadline_scope(Deadline(budget)) as deadline:
+        assert run_optional("test_reserve", lambda: "결과", "대체값") == "결과"
+        # 뒤 필수 단계 몫을 남기면 같은 단계도 건너뜀
+        assert run_optional("test_reserve", lambda: "결과", "대체값", reserve=budget) == "대체값"
+    assert _statuses(deadline) == [("test_reserve", "ran"), ("test_reserve", "skipped")]
+
+
+def test_optional_async_times_out_to_fallback():
+    async def slow():
+        await asyncio.sleep(5)
+        return "결과"
+
+    async def main():
+        with deadline_scope(Deadline(estimate("test_slow") + 0.1)) as deadline:
+            started = time.monotonic()
+            result = await run_optional_async("test_slow", slow, "대체값")
+            return deadline, result, time.monotonic() - started
+
+    deadline, result, elapsed = asyncio.run(main())
+    assert result == "대체값"
+    assert elapsed < 3
+    assert _statuses(deadline) == [("test_slow", "timed_out")]
+
+
+def test_optional_errors_fall_back_only_with_budget():
+    def fail():
+        raise RuntimeError("실패")
+
+    with deadline_scope(Deadline(30)) as deadline:
+        assert run_optional("test_error", fail, "대체값") == "대체값"
+    assert _statuses(deadline) == [("test_error", "failed")]
+    # 예산이 없으면 기존처럼 예외 전달
+    with deadline_scope(Deadline(None)):
+        with pytest.raises(RuntimeError):
+            run_optional("test_error", fail, "대체값")
+
+
+def test_required_raises_deadline_exceeded():
+    async def slow():
+        await asyncio.sleep(5)
+
+    async def main():
+        with deadline_scope(Deadline(0.3)) as deadline:
+            with pytest.raises(DeadlineExceeded) as error:
+                await run_required_async("test_required", slow)
+            return deadline, error.value
+
+    deadline, error = asyncio.run(main())
+    assert error.stage == "test_required" and error.budget_sec == pytest.approx(0.3)
+    assert _statuses(deadline) == [("test_required", "timed_out")]
+
+    # 시작 전에 남은 시간이 최소 호출 시간보다 적으면 실행하지 않음
+    calls = []
+    with deadline_scope(Deadline(DEADLINE_MIN_CALL_SEC / 2)) as deadline:
+        with pytest.raises(DeadlineExceeded):
+            run_required("test_required", lambda: calls.append(1))
+        with pytest.raises(DeadlineExceeded):
+            call_timeout()
+    assert calls == []
+    assert _statuses(deadline) == [("test_required", "skipped")]
+
+
+def test_required_passes_through_other_errors():
+    def fail():
+        raise ValueError("잘못된 입력")
+
+    with deadline_scope(Deadline(30)) as deadline:
+        with pytest.raises(ValueError):
+            run_required("test_required_error", fail)
+        assert run_required("test_required_ok", lambda: "결과") == "결과"
+    assert _statuses(deadline) == [("test_required_error", "failed"), ("test_required_ok", "ran")]
+
+
+def test_no_deadline_runs_stages_directly():
+    assert run_optional("test_none", lambda: "결과", "대체값") == "결과"
+    assert run_required("test_none", lambda: "결과") == "결과"
+    assert call_timeout() is None
@@ -0,0 +1,235 @@
+"""
+검색 순위 테스트 (BM25 / 하이브리드 점수 결합 / 카테고리 비트맵 / 비트맵 필터 FAISS 검색 / 저장소 / 어휘 사전)
+작은 합성 동요 6곡으로 저장소와 FAISS 인덱스를 만들어 확인한다. (OpenAI 호출 없음)
+
+    python -m pytest -q tests
+"""
+import math
+import os
+import pickle
+
+import faiss
+import numpy as np
+import pytest
+
+from src.rag.agents.retriever_agent import RetrieverAgent
+from src.rag.bm25 import BM25_B, BM25_K1, BM25Index, top_k_ids
+from src.rag.fusion import HybridScores
+from src.rag.lexicon import build_lexicon, corpus_fingerprint, stale_reason
+from src.rag.song_store import build_song_store, load_song_store, write_song_store
+from src.rag.term_bitmaps import from_ids, to_bitmap, to_mask
+from src.rag.vector_db import DongyoVectorDB
+
+SONGS = {
+    "titles": ["산토끼", "곰 세 마리", "봄나들이", "달토끼", "나비야", "개구리"],
+    "summaries": ["토끼 노래", "곰 가족", "봄 소풍", "달나라 토끼", "나비 노래", "개구리 노래"],
+    "lyrics": [
+        "토끼가 깡총깡총 뛰어간다",
+        "곰 세 마리가 한 집에 있어",
+        "봄이 오면 꽃이 핀다",
+        "달에서 토끼를 본다",
+        "나비야 이리 날아오너라",
+        "개구리 개굴개굴 노래한다",
+    ],
+}
+DIM = 8
+
+
+def _vector(i: int) -> np.ndarray:
+    """동요 i의 임베딩 (서로 거리 2인 단위 벡터)"""
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[i] = 1.0
+    return vector
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory) -> DongyoVectorDB:
+    data_dir = tmp_path_factory.mktemp("data")
+    embeddings_path = data_dir / "songs.pkl"
+    with open(embeddings_path, "wb") as f:
+        pickle.dump(SONGS, f)
+    index = faiss.IndexFlatL2(DIM)
+    index.add(np.stack([_vector(i) for i in range(len(SONGS["titles"]))]))
+    faiss.write_index(index, str(data_dir / "songs.index"))
+    return DongyoVectorDB(embeddings_path=embeddings_path, index_path=data_dir / "songs.index")
+
+
+@pytest.fixture(scope="module")
+def retriever(db: DongyoVectorDB) -> RetrieverAgent:
+    # 임베딩이 준비된 뒤의 로컬 검색 단계만 쓰므로 OpenAI 클라이언트 없이 만듦
+    agent = RetrieverAgent.__new__(RetrieverAgent)
+    agent.db = db
+    return agent
+
+
+# ---- BM25 ----
+
+def test_bm25_postings_strip_particles(db: DongyoVectorDB):
+    keywords = db.songs.keywords
+    # "토끼가" / "토끼를"은 "토끼"로 색인 ("산토끼", "달토끼"는 다른 단어)
+    ids, weights = keywords.postings("토끼")
+    assert ids.tolist() == [0, 3]
+    assert weights.dtype == np.float32 and (weights > 0).all()
+    assert keywords.document_frequency("토끼") == 2
+    assert keywords.document_frequency("토끼가") == 0
+    assert keywords.postings("없는단어")[0].size == 0
+
+
+def test_bm25_weights_match_formula():
+    texts = ["토끼 토끼 노래", "토끼 곰", "곰 곰 곰 노래"]
+    index = BM25Index.build(texts)
+    lengths = [3, 2, 4]
+    average = sum(lengths) / len(lengths)
+    idf = math.log(1 + (3 - 2 + 0.5) / (2 + 0.5))
+    for doc, tf in ((0, 2), (1, 1)):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc] / average)
+        expected = idf * tf * (BM25_K1 + 1) / (tf + norm)
+        ids, weights = index.postings("토끼")
+        assert weights[ids.tolist().index(doc)] == pytest.approx(expected, rel=1e-5)
+
+
+def test_bm25_search_matches_dense_scores(db: DongyoVectorDB):
+    keywords = db.songs.keywords
+    dense = keywords.dense_scores("토끼가 노래")
+    results = keywords.search("토끼가 노래", top_k=10)
+    assert [doc for doc, _ in results] == top_k_ids(dense, 10).tolist()
+    assert [score for _, score in results] == pytest.approx(dense[[doc for doc, _ in results]].tolist())
+    assert set(np.flatnonzero(dense)) == {doc for doc, _ in results}
+
+
+def test_bm25_save_load_roundtrip(tmp_path):
+    index = BM25Index.build(SONGS["lyrics"])
+    loaded = BM25Index.load(tmp_path, index.save(tmp_path))
+    assert loaded.search("토끼 노래", top_k=3) == index.search("토끼 노래", top_k=3)
+
+
+# ---- 점수 결합 ----
+
+def test_top_k_ids_breaks_boundary_ties_by_id():
+    scores = np.array([0.5, 1.0, 1.0, 0.0, 1.0, 1.0, 2.0], dtype=np.float32)
+    assert top_k_ids(scores, 3).tolist() == [6, 1, 2]
+    assert top_k_ids(scores, 10).tolist() == [6, 1, 2, 4, 5, 0]
+    assert top_k_ids(scores, 0).size == 0
+
+
+def test_hybrid_scores_fused_order():
+    scores = HybridScores(6)
+    scores.add_vector(np.array([4, 2, 0, 2]), np.array([1.0, 1.0, 1.0, 0.5]))
+    scores.add_keyword(np.array([0, 0, 0, 0, 0, 3.0]))
+    fused = scores.fused()
+    # 같은 동요는 가까운 거리, 후보가 아닌 동요(1, 3)는 0점
+    assert scores.distance[2] == pytest.approx(0.5)
+    assert fused[1] == 0 and fused[3] == 0
+    assert len(scores) == 4
+    assert fused[5] == pytest.approx(0.3 * 3 / 4)
+    # 같은 거리(0, 4)는 동요 번호 순, 키워드만 걸린 동요(5)는 그 뒤
+    assert scores.top(3).tolist() == [2, 0, 4]
+    assert scores.top(10).tolist() == [2, 0, 4, 5]
+
+
+def test_hybrid_scores_keyword_masked_by_bitmap():
+    scores = HybridScores(6, from_ids([1, 5], 6))
+    scores.add_keyword(np.array([1.0, 2.0, 0, 0, 0, 4.0]))
+    assert scores.keyword.tolist() == [0, 2.0, 0, 0, 0, 4.0]
+    assert scores.filtered_by(from_ids([1, 5], 6))
+    assert not scores.filtered_by(None)
+
+
+# ---- 카테고리 비트맵 ----
+
+def test_bitmap_packing_little_endian():
+    bitmap = from_ids([0, 9, 12], 13)
+    # FAISS IDSelectorBitmap 순서: 동요 i → 바이트 i >> 3의 비트 i & 7
+    assert bitmap.tolist() == [0b00000001, 0b00010010]
+    mask = to_mask(bitmap, 13)
+    assert mask.dtype == bool and np.flatnonzero(mask).tolist() == [0, 9, 12]
+    assert np.array_equal(to_bitmap(mask), bitmap)
+
+
+def test_category_bitmap(db: DongyoVectorDB):
+    size = len(db.songs)
+    # 씨앗 단어는 부분 문자열 매칭 (산토끼, 달토끼 포함)
+    assert np.flatnonzero(to_mask(db.category_bitmap({"동물": "토끼"}), size)).tolist() == [0, 3]
+    # 여러 카테고리는 OR
+    bitmap = db.category_bitmap({"동물": "곰", "계절": "봄"})
+    assert np.flatnonzero(to_mask(bitmap, size)).tolist() == [1, 2]
+    # 매칭되는 동요가 없으면 필터 없음
+    assert db.category_bitmap({"동물": "기린"}) is None
+    assert db.category_bitmap(None) is None
+
+
+# ---- 비트맵 필터 FAISS 검색 / 하이브리드 검색 ----
+
+def test_search_vectors_with_bitmap(db: DongyoVectorDB):
+    ids, distances = db.search_vectors(_vector(4), top_k=6)
+    assert ids[0] == 4 and distances[0] == pytest.approx(0.0)
+    ids, _ = db.search_vectors(_vector(4), top_k=6, bitmap=from_ids([1, 3], len(db.songs)))
+    assert sorted(ids.tolist()) == [1, 3]
+    with pytest.raises(ValueError):
+        db.search_vectors(_vector(4), top_k=6, bitmap=np.zeros(0, dtype=np.uint8))
+
+
+def test_hybrid_search(retriever: RetrieverAgent):
+    # 벡터로 가장 가까운 나비야(4) 다음에 키워드가 매칭된 토끼 동요(0, 3)
+    results = retriever._search(_vector(4), "토끼", top_k=3, categories=None, use_hybrid=True)
+    assert [r["index"] for r in results][0] == 4
+    assert {r["index"] for r in results[1:]} == {0, 3}
+    assert all(r["keyword_score"] > 0 for r in results[1:])
+    assert results[0]["title"] == "나비야"
+    combined = [r["combined_score"] for r in results]
+    assert combined == sorted(combined, reverse=True)
+
+
+def test_hybrid_search_with_category(retriever: RetrieverAgent):
+    results = retriever._search(_vector(4), "노래", top_k=3, categories={"동물": "토끼"}, use_hybrid=True)
+    assert sorted(r["index"] for r in results) == [0, 3]
+    # 필터 없이 미리 검색한 후보도 같은 비트맵으로 다시 제한
+    candidates = HybridScores(len(retriever.db.songs))
+    retriever._candidates(_vector(4), "노래", 3, True, candidates)
+    reconciled = retriever.reconcile(candidates, "노래", top_k=3, categories={"동물": "토끼"})
+    assert [r["index"] for r in reconciled] == [r["index"] for r in results]
+
+
+# ---- 저장소 ----
+
+def test_song_store_roundtrip(tmp_path):
+    store = build_song_store(SONGS)
+    loaded = load_song_store(write_song_store(SONGS, tmp_path / "songs.store"))
+    assert len(loaded) == len(store) == 6
+    assert loaded.record(3) == {"title": "달토끼", "feature_summary": "달나라 토끼", "lyrics": "달에서 토끼를 본다"}
+    assert list(loaded.search_text) == list(store.search_text)
+
+
+def test_store_rebuilt_when_pickle_changes(tmp_path):
+    embeddings_path = tmp_path / "songs.pkl"
+    with open(embeddings_path, "wb") as f:
+        pickle.dump(SONGS, f)
+    index = faiss.IndexFlatL2(DIM)
+    index.add(np.stack([_vector(i) for i in range(len(SONGS["titles"]))]))
+    faiss.write_index(index, str(tmp_path / "songs.index"))
+    assert DongyoVectorDB(embeddings_path, tmp_path / "songs.index").songs.title[0] == "산토끼"
+
+    # 같은 크기로 제목만 바꿔도 sha256으로 감지해 다시 변환
+    changed = dict(SONGS, titles=["집토끼"] + SONGS["titles"][1:])
+    with open(embeddings_path, "wb") as f:
+        pickle.dump(changed, f)
+    # 수정 시각이 바뀌었을 때만 sha256을 비교하므로 확실히 다른 시각으로 설정
+    os.utime(embeddings_path, ns=(0, 0))
+    assert DongyoVectorDB(embeddings_path, tmp_path / "songs.index").songs.title[0] == "집토끼"
+
+    # 메타데이터와 FAISS 벡터 수가 다르면 로드 실패
+    with open(embeddings_path, "wb") as f:
+        pickle.dump({key: values[:5] for key, values in SONGS.items()}, f)
+    with pytest.raises(ValueError):
+        DongyoVectorDB(embeddings_path, tmp_path / "songs.index")
+
+
+def test_lexicon_stale_when_corpus_changes(db: DongyoVectorDB):
+    texts = list(db.song_texts)
+    lexicon = build_lexicon(db.song_texts)
+    # mmap 열과 문자열 목록의 지문이 같음
+    assert lexicon["corpus"] == corpus_fingerprint(texts)
+    assert stale_reason(lexicon, db.song_texts) is None
+    assert stale_reason(lexicon, texts[:5]) is not None
+    assert stale_reason(lexicon, ["집토끼"] + texts[1:]) is not None
+    assert stale_reason({k: v for k, v in lexicon.items() if k != "corpus"}, texts) is not None
@@ -0,0 +1,84 @@
+"""
+Single-flight 요청 병합 테스트 (동시 요청 병합 / 예외 전달 / 한 요청 취소 시 공유 계산 유지)
+
+    python -m pytest -q tests
+"""
+import asyncio
+
+import pytest
+
+from src.core.singleflight import SingleFlight, make_key, normalize_text
+
+
+def test_make_key_separates_parts():
+    assert make_key("ab", "c") != make_key("a", "bc")
+    assert make_key("텍스트", b"\x00\x01", 3) == make_key("텍스트", b"\x00\x01", 3)
+    assert normalize_text("  같은\n\n 학습지\t텍스트 ") == "같은 학습지 텍스트"
+
+
+def test_concurrent_requests_share_one_call():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"lyrics": "같은 결과"}
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+        other = await flight.do("other", compute)
+        return results, other
+
+    results, other = asyncio.run(main())
+    assert calls == 2
+    assert all(r is results[0] for r in results)
+    assert other == results[0] and other is not results[0]
+    assert flight.stats() == {"inflight": 0, "leaders": 2, "coalesced": 4}
+
+
+def test_error_reaches_every_waiter_and_key_is_released():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("업스트림 실패")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert errors[0] is errors[1] is errors[2]
+    # 실패한 계산은 남지 않으므로 다음 요청은 새로 계산
+    assert flight.stats()["inflight"] == 0
+    async def succeed():
+        return "재시도 성공"
+
+    assert asyncio.run(flight.do("key", succeed)) == "재시도 성공"
+    assert flight.stats() == {"inflight": 0, "leaders": 2, "coalesced": 2}
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight("test")
+    finished = []
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        finished.append(True)
+        return "결과"
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("key", compute))
+        second = asyncio.ensure_future(flight.do("key", compute))
+        await asyncio.sleep(0.01)
+        # 먼저 시작한 요청(계산을 띄운 쪽)이 끊겨도 합류한 요청은 결과를 받음
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "결과"
+    assert finished == [True]
+    assert flight.stats()["inflight"] == 0
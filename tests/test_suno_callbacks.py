@@ -0,0 +1,125 @@
+"""
+Suno 콜백 테스트 (가짜 Suno + /suno/callback 을 같은 프로세스의 uvicorn 스레드로 띄워 확인)
+폴링 대기가 안전망 폴링이 아닌 콜백으로 깨어나는지, 토큰 검증, 대기 전에 도착한 콜백 보관을 본다.
+
+    python -m pytest -q tests
+"""
+import asyncio
+import socket
+import threading
+import time
+import uuid
+
+import pytest
+import requests
+import uvicorn
+
+from src.bench.fake_suno import create_app
+from src.clients.suno_callbacks import SUNO_SAFETY_POLL_SEC, build_callback_url, suno_tasks
+from src.clients.suno_client import SunoClient
+from src.server import app as server_app
+
+TOKEN = "test-callback-token"
+
+
+class _Server:
+    """uvicorn 서버를 백그라운드 스레드에서 임의 포트로 실행"""
+
+    def __init__(self, app):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self.sock.getsockname()[1]}"
+        # 서버 lifespan(RAG 워밍업)은 콜백 수신에 필요 없으므로 끔
+        config = uvicorn.Config(app, lifespan="off", log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, kwargs={"sockets": [self.sock]}, daemon=True)
+
+    def __enter__(self) -> "_Server":
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("uvicorn 서버가 시작되지 않았습니다.")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+        self.sock.close()
+
+
+@pytest.fixture(scope="module")
+def servers():
+    with _Server(server_app) as server, _Server(create_app(render_sec=0.05)) as fake:
+        yield server, fake
+
+
+@pytest.fixture
+def client(servers, monkeypatch) -> SunoClient:
+    server, fake = servers
+    monkeypatch.setenv("SUNO_CALLBACK_URL", f"{server.url}/suno/callback")
+    monkeypatch.setenv("SUNO_CALLBACK_TOKEN", TOKEN)
+    return SunoClient(api_key="test", base_url=f"{fake.url}/api/v1", timeout_seconds=20, verbose=False)
+
+
+def _fake_stats(servers) -> dict:
+    return requests.get(f"{servers[1].url}/stats", timeout=5).json()
+
+
+def _complete_body(task_id: str) -> dict:
+    return {
+        "code": 200,
+        "msg": "All generated successfully.",
+        "data": {
+            "callbackType": "complete",
+            "task_id": task_id,
+            "data": [{"id": f"{task_id}-0", "audio_url": f"https://example.com/{task_id}.mp3"}],
+        },
+    }
+
+
+def test_poll_wakes_on_callback(servers, client: SunoClient):
+    polls = _fake_stats(servers)["record_info"]
+    started = time.monotonic()
+    result = asyncio.run(client.generate_and_wait_async({"prompt": "test", "callBackUrl": build_callback_url()}))
+    elapsed = time.monotonic() - started
+
+    assert result["status"] == "SUCCESS"
+    assert [t["audioUrl"] for t in result["tracks"]] == [
+        f"https://example.com/{result['task_id']}-{i}.mp3" for i in range(2)
+    ]
+    # 안전망 폴링(SUNO_SAFETY_POLL_SEC) 전에 콜백으로 깨어나 record-info를 한 번도 조회하지 않음
+    assert elapsed < min(SUNO_SAFETY_POLL_SEC, 5)
+    assert _fake_stats(servers)["record_info"] == polls
+    assert _fake_stats(servers)["callbacks_failed"] == 0
+
+
+def test_callback_rejects_bad_token(servers, client: SunoClient):
+    server, _ = servers
+    task_id = uuid.uuid4().hex
+    received = suno_tasks.stats()["received"]
+    for params in ({"token": "wrong"}, {}):
+        response = requests.post(f"{server.url}/suno/callback", params=params, json=_complete_body(task_id), timeout=5)
+        assert response.status_code == 403
+    assert suno_tasks.stats()["received"] == received
+
+    # 올바른 토큰이어도 task_id가 없는 본문은 400
+    response = requests.post(f"{server.url}/suno/callback", params={"token": TOKEN}, json={"code": 200}, timeout=5)
+    assert response.status_code == 400
+
+
+def test_early_callback_is_kept(servers, client: SunoClient):
+    server, _ = servers
+    task_id = uuid.uuid4().hex
+    # 대기자가 등록되기 전에 완료 콜백이 먼저 도착
+    response = requests.post(f"{server.url}/suno/callback", params={"token": TOKEN}, json=_complete_body(task_id), timeout=5)
+    assert response.status_code == 200
+    polls = _fake_stats(servers)["record_info"]
+
+    result = asyncio.run(client.poll_result_async(task_id))
+    assert result["task_id"] == task_id
+    assert result["tracks"][0]["audioUrl"] == f"https://example.com/{task_id}.mp3"
+    assert _fake_stats(servers)["record_info"] == polls
+    # 결과를 가져간 작업은 레지스트리에서 정리
+    assert asyncio.run(suno_tasks.wait_async(task_id, 0.01)) is None
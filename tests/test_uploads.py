@@ -0,0 +1,118 @@
+"""
+스트리밍 multipart 업로드 테스트 (파일별 / 요청 전체 413, 최대 파일 수, 초과 시 나머지 본문을 읽지 않음)
+ASGI receive로 본문을 청크 단위로 흘려 Starlette 요청을 만든다.
+
+    python -m pytest -q tests
+"""
+import asyncio
+import hashlib
+from typing import List, Optional, Tuple
+
+import pytest
+from starlette.requests import Request
+
+from src.core.uploads import UploadError, read_limited_body, stream_multipart_files
+
+BOUNDARY = "test-boundary"
+KB = 1024
+
+
+def _multipart(files: List[Tuple[str, bytes]]) -> bytes:
+    body = b""
+    for name, content in files:
+        body += (
+            f"--{BOUNDARY}\r\n"
+            f'Content-Disposition: form-data; name="files"; filename="{name}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n"
+        ).encode() + content + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+class _Body:
+    """본문을 chunk 크기로 나눠 보내는 ASGI receive (읽힌 청크 수 기록)"""
+
+    def __init__(self, body: bytes, chunk: int = 4 * KB):
+        self.chunks = [body[i:i + chunk] for i in range(0, len(body), chunk)]
+        self.sent = 0
+
+    async def __call__(self) -> dict:
+        self.sent += 1
+        index = self.sent - 1
+        return {
+            "type": "http.request",
+            "body": self.chunks[index] if index < len(self.chunks) else b"",
+            "more_body": index < len(self.chunks) - 1,
+        }
+
+
+def _request(receive: _Body, content_type: Optional[str] = None, content_length: Optional[int] = None) -> Request:
+    headers = [(b"content-type", (content_type or f"multipart/form-data; boundary={BOUNDARY}").encode())]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": headers}, receive)
+
+
+def _collect(request: Request, **limits) -> List[Tuple[str, int, str, bytes]]:
+    async def main():
+        files = []
+        async for upload in stream_multipart_files(request, **limits):
+            files.append((upload.filename, upload.size, upload.sha256, upload.read()))
+            upload.close()
+        return files
+
+    return asyncio.run(main())
+
+
+def test_streams_files_in_order():
+    small, large = b"a" * KB, b"b" * (40 * KB)
+    # 메모리 한도(spool)를 넘는 파일은 디스크에 기록
+    files = _collect(_request(_Body(_multipart([("a.png", small), ("b.pdf", large)]))), spool_bytes=8 * KB)
+    assert [(name, size) for name, size, _, _ in files] == [("a.png", KB), ("b.pdf", 40 * KB)]
+    assert files[1][2] == hashlib.sha256(large).hexdigest()
+    assert files[1][3] == large
+
+
+def test_file_over_limit_is_rejected_without_reading_the_rest():
+    body = _Body(_multipart([("ok.png", b"a" * KB), ("big.pdf", b"b" * (64 * KB)), ("later.png", b"c" * (64 * KB))]))
+    with pytest.raises(UploadError) as error:
+        _collect(_request(body), max_file_bytes=16 * KB)
+    assert error.value.status_code == 413 and "big.pdf" in error.value.detail
+    assert body.sent < len(body.chunks)
+
+
+def test_total_over_limit_is_rejected():
+    files = [(f"{i}.png", b"x" * (10 * KB)) for i in range(5)]
+    body = _Body(_multipart(files))
+    with pytest.raises(UploadError) as error:
+        _collect(_request(body), max_file_bytes=16 * KB, max_total_bytes=32 * KB)
+    assert error.value.status_code == 413 and "업로드 용량" in error.value.detail
+
+
+def test_content_length_over_limit_is_rejected_before_reading():
+    body = _Body(_multipart([("a.png", b"a" * KB)]))
+    with pytest.raises(UploadError) as error:
+        _collect(_request(body, content_length=10 * 1024 * KB), max_total_bytes=KB)
+    assert error.value.status_code == 413
+    assert body.sent == 0
+
+
+def test_too_many_files_and_bad_content_type():
+    body = _Body(_multipart([(f"{i}.png", b"x") for i in range(3)]))
+    with pytest.raises(UploadError) as error:
+        _collect(_request(body), max_files=2)
+    assert error.value.status_code == 400 and "최대 2개" in error.value.detail
+
+    with pytest.raises(UploadError) as error:
+        _collect(_request(_Body(b"{}"), content_type="application/json"))
+    assert error.value.status_code == 400
+
+
+def test_read_limited_body():
+    assert asyncio.run(read_limited_body(_request(_Body(b"x" * (10 * KB))), max_bytes=16 * KB)) == b"x" * (10 * KB)
+    body = _Body(b"x" * (64 * KB))
+    with pytest.raises(UploadError) as error:
+        asyncio.run(read_limited_body(_request(body), max_bytes=16 * KB))
+    assert error.value.status_code == 413 and body.sent < len(body.chunks)
+    with pytest.raises(UploadError) as error:
+        asyncio.run(read_limited_body(_request(_Body(b"")), max_bytes=16 * KB))
+    assert error.value.status_code == 400
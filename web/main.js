@@ -474,6 +474,98 @@ async function postFormData(path, formData) {
   return resp.json();
 }
 
+// SSE(text/event-stream) 응답을 읽으며 이벤트마다 onEvent(name, data) 호출
+async function postSSE(path, payload, onEvent, signal = null) {
+  const options = {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Accept: "text/event-stream",
+    },
+    body: JSON.stringify(payload),
+  };
+  if (signal) {
+    options.signal = signal;
+  }
+
+  const resp = await fetch(`${backendBase}${path}`, options);
+
+  if (!resp.ok) {
+    const text = await resp.text();
+    throw new Error(`${path} 요청 실패 (${resp.status}): ${text}`);
+  }
+
+  const reader = resp.body.getReader();
+  const decoder = new TextDecoder("utf-8");
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+
+    // 이벤트는 빈 줄로 구분
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let eventName = "message";
+      const dataLines = [];
+      rawEvent.split("\n").forEach((line) => {
+        if (line.startsWith("event:")) {
+          eventName = line.slice(6).trim();
+        } else if (line.startsWith("data:")) {
+          dataLines.push(line.slice(5).trim());
+        }
+      });
+
+      const data = dataLines.length ? JSON.parse(dataLines.join("\n")) : {};
+      onEvent(eventName, data);
+    }
+  }
+}
+
+async function getJSON(path) {
+  const resp = await fetch(`${backendBase}${path}`);
+
+  if (!resp.ok) {
+    const text = await resp.text();
+    throw new Error(`${path} 요청 실패 (${resp.status}): ${text}`);
+  }
+
+  return resp.json();
+}
+
+// 노래 생성 작업 단계별 진행률
+const SONG_JOB_PROGRESS = {
+  queued: 50,
+  running: 50,
+  preparing_payload: 55,
+  submitting: 60,
+  rendering: 80,
+  completed: 100,
+};
+
+// 노래 생성 작업이 끝날 때까지 상태를 폴링
+async function pollSongJob(jobId, intervalMs = 3000) {
+  while (true) {
+    const job = await getJSON(`/jobs/${jobId}`);
+
+    if (job.status === "completed") {
+      return job;
+    }
+    if (job.status === "failed") {
+      throw new Error(job.error || "노래 생성에 실패했습니다.");
+    }
+
+    setProgress(SONG_JOB_PROGRESS[job.stage] || 80);
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
 /* ----------------- 가사 생성 단계 ----------------- */
 async function handleGenerate() {
   try {
@@ -559,12 +651,39 @@ async function handleGenerate() {
     lyricsAbortController = new AbortController();
 
     try {
-      const lyricsResp = await postJSON(
-        "/generate-lyrics",
+      let streamedText = "";
+      let lyricsResp = null;
+
+      await postSSE(
+        "/generate-lyrics/stream",
         { study_text: studyText },
+        (event, data) => {
+          if (event === "query") {
+            setStatus("관련 동요 검색 중...");
+            setProgress(25);
+          } else if (event === "retrieved") {
+            setStatus("학습 내용 분석 중...");
+            setProgress(30);
+          } else if (event === "reasoned") {
+            setStatus("가사 작성 중...");
+            setProgress(35);
+          } else if (event === "token") {
+            // 생성되는 가사를 바로 보여줌
+            streamedText += data.text || "";
+            setPre(lyricsTextEl, streamedText);
+          } else if (event === "final") {
+            lyricsResp = data;
+          } else if (event === "error") {
+            throw new Error(data.detail || "가사 생성에 실패했습니다.");
+          }
+        },
         lyricsAbortController.signal
       );
 
+      if (!lyricsResp) {
+        throw new Error("가사 생성 응답이 중간에 끊겼습니다.");
+      }
+
       generatedLyrics = lyricsResp.lyrics || "";
       retrievedDocs = lyricsResp.retrieved_docs || null;
       reasonerResult = lyricsResp.reasoner_result || null;
@@ -654,17 +773,18 @@ async function handleGenerateMelody() {
     setProgress(40);
 
     setStatus("Suno 노래 생성 중...");
-    setProgress(80);
+    setProgress(50);
 
-    const songResp = await postJSON("/generate-song", {
+    // 노래 생성은 작업(job)으로 제출하고, 완료될 때까지 상태만 가볍게 폴링
+    const jobResp = await postJSON("/jobs/song", {
       study_text: currentStudyText,
       mnemonic_plan: mnemonicPlan,
       lyrics: generatedLyrics,
-      wait_for_audio: true, // 멜로디 생성은 항상 완료까지 대기
       emotion_tags: selectedEmotionTags,
       retrieved_docs: retrievedDocs,
       reasoner_result: reasonerResult,
     });
+    const songResp = await pollSongJob(jobResp.job_id);
 
     renderAudio(songResp.audio_urls || []);
 